@@ -6,43 +6,64 @@ from common import (
     save_results,
     get_compile_function,
     get_native_rep,
+    measure_memory,
 )
 
-parser = argparse.ArgumentParser(
-    description="Benchmarking script for quantum compilers."
-)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarking script for quantum compilers."
+    )
 
-# Define arguments
-parser.add_argument("qasm_file", type=str, help="Path to the QASM file.")
-parser.add_argument("compiler", type=str, help="Compiler alias to use.")
-parser.add_argument("results_folder", type=str, help="Folder to save results.")
+    # Define arguments
+    parser.add_argument("qasm_file", type=str, help="Path to the QASM file.")
+    parser.add_argument("compiler", type=str, help="Compiler alias to use.")
+    parser.add_argument(
+        "results_folder", type=str, help="Folder to save results."
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Number of timed runs after the first (cold) one.",
+    )
+    parser.add_argument(
+        "--skip-memory",
+        action="store_true",
+        help="Do not measure the peak memory of the compilation.",
+    )
 
-args = parser.parse_args()
+    args = parser.parse_args()
 
-# Get the QASM file, compiler, and results folder passed as command-line arguments
-qasm_file = args.qasm_file
-compiler_alias = args.compiler
-results_folder = args.results_folder
+    # Get the QASM file, compiler, and results folder passed as command-line arguments
+    qasm_file = args.qasm_file
+    compiler_alias = args.compiler
+    results_folder = args.results_folder
 
-# Read the QASM file
-with open(qasm_file, "r") as file:
-    print(f"Compiling {qasm_file} using {compiler_alias}")
-    circuit_name = qasm_file.split("/")[-1].split("_N")[0]
+    # Read the QASM file
+    with open(qasm_file, "r") as file:
+        print(f"Compiling {qasm_file} using {compiler_alias}")
+        circuit_name = qasm_file.split("/")[-1].split("_N")[0]
 
-    # Load the QASM file and get the native representation
-    qasm_string = file.read()
-    native_circuit = get_native_rep(qasm_string, compiler_alias)
-    compile_function = get_compile_function(compiler_alias)
+        # Load the QASM file and get the native representation
+        qasm_string = file.read()
+        native_circuit = get_native_rep(qasm_string, compiler_alias)
+        compile_function = get_compile_function(compiler_alias)
 
-    # Log performance
-    log_entry = log_performance(
-        compile_function, native_circuit, compiler_alias, circuit_name
-    )
+        # Log performance
+        log_entry = log_performance(
+            compile_function,
+            native_circuit,
+            compiler_alias,
+            circuit_name,
+            repeats=args.repeats,
+        )
+        if not args.skip_memory:
+            log_entry.update(measure_memory(compile_function, native_circuit))
 
-    # Save the log entry (you can add it to a list if needed)
-    results_log = [log_entry]
+        # Save the log entry (you can add it to a list if needed)
+        results_log = [log_entry]
 
-# Save the results to a CSV file
-save_results(
-    results_log, benchmark_name="gates", folder=results_folder, append=True
-)
+    # Save the results to a CSV file
+    save_results(
+        results_log, benchmark_name="gates", folder=results_folder, append=True
+    )
@@ -0,0 +1,351 @@
+# check_regressions.py
+"""Checks a benchmark run for compile time and gate count regressions.
+
+Each result of the run is compared to the results of the same circuit and
+compiler in the previous runs on the same class of machine (OS,
+architecture and number of cores), from the results store. A result is a
+regression when it is worse than the median of that history by more than
+a minimum relative change, and is an outlier of the history by its robust
+z-score, which uses the median absolute deviation so that a few noisy runs
+don't hide or cause regressions. Results that are better in the same way
+are reported as improvements.
+
+Small slowdowns that are within the noise of each circuit but affect most
+circuits are caught by a one-sided sign test across the circuits of each
+compiler.
+
+Compile times are only compared to runs that timed them the same way: runs
+that record ``repeats`` hold the median of several warm compilations, and
+earlier runs a single cold one.
+
+Usage:
+    python check_regressions.py [--db <path>] [--run-id <id>]
+        [--compilers ucc ...] [--window 20] [--output verdict.json]
+        [--no-fail]
+
+The verdict is printed as a short report, optionally saved as JSON, and the
+script exits with status 1 if there are regressions unless ``--no-fail``
+is passed.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Run as a script, or imported by tests as part of the benchmarks.scripts
+# package
+try:
+    from .results_store import DB_NAME, load_results
+except ImportError:
+    from results_store import DB_NAME, load_results
+
+# Thresholds for each checked metric, where larger values are worse:
+# min_change: Relative change from the historical median needed for a
+#     result to be a regression or improvement.
+# max_z: Robust z-score above which a result is an outlier of its history.
+# min_overall_change: Geometric mean change across circuits needed for the
+#     sign test of a compiler to report a regression.
+# timed: Whether the value depends on how compile times were measured.
+METRICS = {
+    "compile_time": {
+        "min_change": 0.25,
+        "max_z": 5.0,
+        "min_overall_change": 0.1,
+        "timed": True,
+    },
+    "compiled_multiq_gates": {
+        "min_change": 0.0,
+        "max_z": 3.5,
+        "min_overall_change": 0.0,
+    },
+}
+
+MACHINE_COLUMNS = ["os", "architecture", "cpu_count"]
+
+# Recorded by runs that time warm compilations, see common.log_performance
+TIMING_COLUMN = "repeats"
+
+
+def robust_z_score(value, history):
+    """Returns how many standard deviations ``value`` is above the median
+    of ``history``, estimating the standard deviation from the median
+    absolute deviation.
+
+    If all of ``history`` is the same, any change is infinitely many
+    standard deviations away.
+    """
+    median = np.median(history)
+    mad = np.median(np.abs(np.asarray(history) - median))
+    if mad == 0:
+        if value == median:
+            return 0.0
+        return math.copysign(math.inf, value - median)
+    return 0.6745 * (value - median) / mad
+
+
+def sign_test_p_value(worse, total):
+    """Returns the probability of at least ``worse`` of ``total`` results
+    being worse than their median by chance, i.e. the one-sided p-value of
+    the sign test.
+    """
+    return sum(math.comb(total, k) for k in range(worse, total + 1)) / (
+        2**total
+    )
+
+
+def check_run(df, run_id=None, metrics=METRICS, window=20, min_history=3):
+    """Compares the results of a run to their history.
+
+    Parameters:
+        df (pd.DataFrame): Results, as loaded by ``load_results``, with the
+            ``repeats`` column to tell how compile times were measured.
+        run_id (int): (optional) Run to check. Default is the latest run.
+        metrics (dict): (optional) Thresholds of the metrics to check.
+        window (int): (optional) Number of previous runs of each circuit and
+            compiler to compare to.
+        min_history (int): (optional) Number of previous runs needed to
+            check a result.
+
+    Returns:
+        list[dict]: A check per result and metric, with the ``value``, the
+        ``baseline`` median of its history, the relative ``change``, the
+        robust ``z_score`` (None if the history has no spread), the number
+        of ``history`` runs and the ``status``: "regression",
+        "improvement", "ok" or "no history".
+    """
+    df = df.copy()
+    machines = df[MACHINE_COLUMNS].astype(object)
+    df[MACHINE_COLUMNS] = machines.fillna("unknown")
+    if run_id is None:
+        run_id = df.loc[df["date"].idxmax(), "run_id"]
+    new_run = df[df["run_id"] == run_id]
+    run_date = new_run["date"].iloc[0]
+    history = df[(df["date"] < run_date) & (df["run_id"] != run_id)]
+    for column in MACHINE_COLUMNS:
+        history = history[history[column] == new_run[column].iloc[0]]
+    history = history.sort_values("date")
+
+    checks = []
+    for _, row in new_run.iterrows():
+        previous = history[
+            (history["circuit_name"] == row["circuit_name"])
+            & (history["compiler"] == row["compiler"])
+        ]
+        for metric, thresholds in metrics.items():
+            if metric not in df or np.isnan(row[metric]):
+                continue
+            same_method = previous
+            if thresholds.get("timed") and TIMING_COLUMN in df:
+                same_method = previous[
+                    previous[TIMING_COLUMN].notna()
+                    == pd.notna(row[TIMING_COLUMN])
+                ]
+            values = same_method[metric].dropna().to_numpy()[-window:]
+            check = {
+                "circuit_name": row["circuit_name"],
+                "compiler": row["compiler"],
+                "compiler_version": row["compiler_version"],
+                "metric": metric,
+                "value": float(row[metric]),
+                "history": len(values),
+            }
+            if len(values) < min_history:
+                check["status"] = "no history"
+                checks.append(check)
+                continue
+            baseline = float(np.median(values))
+            change = (row[metric] - baseline) / baseline if baseline else 0.0
+            z_score = robust_z_score(row[metric], values)
+            status = "ok"
+            if (
+                change > thresholds["min_change"]
+                and z_score > thresholds["max_z"]
+            ):
+                status = "regression"
+            elif (
+                change < -thresholds["min_change"]
+                and z_score < -thresholds["max_z"]
+            ):
+                status = "improvement"
+            check.update(
+                baseline=baseline,
+                change=float(change),
+                z_score=float(z_score) if math.isfinite(z_score) else None,
+                status=status,
+            )
+            checks.append(check)
+    return checks
+
+
+def summarize_compilers(checks, metrics=METRICS, alpha=0.01):
+    """Tests for each compiler and metric whether results are worse than
+    their history across circuits more often than chance.
+
+    Parameters:
+        checks (list[dict]): Checks returned by ``check_run``.
+        metrics (dict): (optional) Thresholds of the metrics checked.
+        alpha (float): (optional) Significance level of the sign test.
+
+    Returns:
+        list[dict]: A summary per compiler and metric, with the number of
+        circuits ``worse`` than their baseline out of the ``circuits``
+        checked, the sign test ``p_value``, the geometric mean
+        ``overall_change`` and the ``status``: "regression" or "ok".
+    """
+    summaries = []
+    groups = {}
+    for check in checks:
+        if check.get("baseline", 0) > 0 and check["value"] > 0:
+            key = (check["compiler"], check["metric"])
+            groups.setdefault(key, []).append(check)
+    for (compiler, metric), group in sorted(groups.items()):
+        ratios = np.array(
+            [check["value"] / check["baseline"] for check in group]
+        )
+        # Ties are left out of the sign test
+        worse = int(np.sum(ratios > 1))
+        total = worse + int(np.sum(ratios < 1))
+        p_value = sign_test_p_value(worse, total) if total else 1.0
+        overall_change = float(np.exp(np.mean(np.log(ratios))) - 1)
+        regression = (
+            p_value < alpha
+            and overall_change > metrics[metric]["min_overall_change"]
+        )
+        summaries.append(
+            {
+                "compiler": compiler,
+                "metric": metric,
+                "circuits": len(group),
+                "worse": worse,
+                "p_value": p_value,
+                "overall_change": overall_change,
+                "status": "regression" if regression else "ok",
+            }
+        )
+    return summaries
+
+
+def get_verdict(df, run_id=None, **kwargs):
+    """Checks a run and returns the machine-readable verdict.
+
+    Parameters:
+        df (pd.DataFrame): Results, as loaded by ``load_results``.
+        run_id (int): (optional) Run to check. Default is the latest run.
+        **kwargs: Passed to ``check_run``.
+
+    Returns:
+        dict: The ``run_id`` and ``date`` of the run, its ``checks`` and
+        compiler ``summaries``, the number of ``regressions`` and the
+        ``status``: "fail" if there are regressions, otherwise "pass".
+    """
+    if run_id is None:
+        run_id = int(df.loc[df["date"].idxmax(), "run_id"])
+    checks = check_run(df, run_id, **kwargs)
+    summaries = summarize_compilers(checks, kwargs.get("metrics", METRICS))
+    regressions = sum(
+        item["status"] == "regression" for item in checks + summaries
+    )
+    return {
+        "run_id": int(run_id),
+        "date": df.loc[df["run_id"] == run_id, "date"].iloc[0],
+        "status": "fail" if regressions else "pass",
+        "regressions": regressions,
+        "checks": checks,
+        "summaries": summaries,
+    }
+
+
+def format_report(verdict):
+    """Returns a short, human-readable report of a verdict."""
+    lines = [
+        f"Regression check of run {verdict['run_id']} ({verdict['date']}): "
+        f"{verdict['status'].upper()}"
+    ]
+    for status in ("regression", "improvement"):
+        for check in verdict["checks"]:
+            if check["status"] == status:
+                z_score = check["z_score"]
+                z_score = "inf" if z_score is None else f"{z_score:.1f}"
+                lines.append(
+                    f"  {status}: {check['compiler']} on "
+                    f"{check['circuit_name']}, {check['metric']} "
+                    f"{check['value']:.4g} vs {check['baseline']:.4g} "
+                    f"({check['change']:+.1%}, z={z_score}, "
+                    f"{check['history']} runs)"
+                )
+    for summary in verdict["summaries"]:
+        if summary["status"] == "regression":
+            lines.append(
+                f"  regression: {summary['compiler']} {summary['metric']} "
+                f"is worse on {summary['worse']} of {summary['circuits']} "
+                f"circuits ({summary['overall_change']:+.1%} overall, "
+                f"p={summary['p_value']:.2g})"
+            )
+    no_history = sum(
+        check["status"] == "no history" for check in verdict["checks"]
+    )
+    if no_history:
+        lines.append(f"  {no_history} results have too little history")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check a benchmark run for regressions."
+    )
+    parser.add_argument(
+        "--db",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "../results", DB_NAME
+        ),
+        help="Results store.",
+    )
+    parser.add_argument(
+        "--benchmark", default="gates", help="Benchmark to check."
+    )
+    parser.add_argument(
+        "--run-id", type=int, help="Run to check (default: the latest)."
+    )
+    parser.add_argument(
+        "--compilers", nargs="+", help="Compilers to check (default: all)."
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=20,
+        help="Number of previous runs to compare to.",
+    )
+    parser.add_argument(
+        "--min-history",
+        type=int,
+        default=3,
+        help="Number of previous runs needed to check a result.",
+    )
+    parser.add_argument("--output", help="File to save the verdict to.")
+    parser.add_argument(
+        "--no-fail",
+        action="store_true",
+        help="Exit with status 0 even if there are regressions.",
+    )
+    args = parser.parse_args()
+
+    df = load_results(
+        args.db,
+        args.benchmark,
+        metrics=[*METRICS, TIMING_COLUMN],
+        compilers=args.compilers,
+    )
+    verdict = get_verdict(
+        df, args.run_id, window=args.window, min_history=args.min_history
+    )
+    print(format_report(verdict))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(verdict, file, indent=2)
+    if verdict["status"] == "fail" and not args.no_fail:
+        sys.exit(1)
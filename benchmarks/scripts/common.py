@@ -1,8 +1,14 @@
-from time import time
+from time import perf_counter_ns, process_time_ns
+import gc
+import json
+import pickle
 import platform
+import tracemalloc
 import os
+import numpy as np
 import pandas as pd
 import matplotlib
+from matplotlib.transforms import Bbox
 import re
 from datetime import datetime
 from typing import List
@@ -27,10 +33,143 @@ from ucc import __version__ as ucc_version
 import sys  # Add sys to accept command line arguments
 from ucc import compile as ucc_compile
 
+# Scripts import this module as `common`, and tests as part of the
+# benchmarks.scripts package
+try:
+    from . import results_store
+except ImportError:
+    import results_store
+
+
+def time_function(function, argument, repeats=5, disable_gc=True):
+    """Times ``function(argument)`` once cold and ``repeats`` times warm.
+
+    The first call includes one-off costs such as imports and caches filled
+    on first use; the following calls measure the steady state.
+
+    Parameters:
+        function: The function to time.
+        argument: The argument to call it with.
+        repeats: Number of warm calls, at least 1. Default is 5.
+        disable_gc: Whether to collect garbage before each call and disable
+            the garbage collector during it, as ``timeit`` does. Default is
+            True.
+
+    Returns:
+        A tuple of the result of the last call and a dict of timings, in
+        seconds: ``cold`` (wall time of the first call), ``wall`` and
+        ``cpu`` (lists of the wall and process CPU times of the warm calls).
+    """
+    if repeats < 1:
+        raise ValueError(f"repeats must be at least 1, got {repeats}")
+    gc_was_enabled = gc.isenabled()
+    wall_times = []
+    cpu_times = []
+    try:
+        for _ in range(repeats + 1):
+            if disable_gc:
+                gc.collect()
+                gc.disable()
+            t1, c1 = perf_counter_ns(), process_time_ns()
+            result = function(argument)
+            t2, c2 = perf_counter_ns(), process_time_ns()
+            if gc_was_enabled:
+                gc.enable()
+            wall_times.append((t2 - t1) / 1e9)
+            cpu_times.append((c2 - c1) / 1e9)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    timings = {
+        "cold": wall_times[0],
+        "wall": wall_times[1:],
+        "cpu": cpu_times[1:],
+    }
+    return result, timings
+
+
+def summarize_times(times):
+    """Summary statistics of a list of times.
+
+    Parameters:
+        times: Times in seconds.
+
+    Returns:
+        A dict with the ``median``, ``iqr`` (interquartile range) and ``min``
+        of the times.
+    """
+    if len(times) == 0:
+        raise ValueError("Cannot summarize an empty list of times")
+    q1, median, q3 = np.percentile(times, [25, 50, 75])
+    return {"median": median, "iqr": q3 - q1, "min": min(times)}
+
+
+def fit_scaling_exponents(
+    df, size="num_gates", time="compile_time", by=("compiler",)
+):
+    """Fits ``time ~ c * size**k`` to each group of results.
+
+    The exponent ``k`` is the slope of a least-squares line through the
+    results on a log-log scale: 1 for compile times growing linearly with
+    the size, 2 for quadratically, and so on.
+
+    Parameters:
+        df: Benchmark results.
+        size: Column with the size of the circuits. Default is "num_gates".
+        time: Column with the compile times. Default is "compile_time".
+        by: Columns to group the results by. Default is ("compiler",).
+
+    Returns:
+        A DataFrame with the ``by`` columns, the fitted ``exponent`` and
+        ``coefficient``, and the number of ``points`` of each group. Groups
+        with fewer than two distinct sizes are left out.
+    """
+    fits = []
+    for key, group in df.groupby(list(by)):
+        group = group[(group[size] > 0) & (group[time] > 0)]
+        if group[size].nunique() < 2:
+            continue
+        exponent, intercept = np.polyfit(
+            np.log(group[size]), np.log(group[time]), 1
+        )
+        fits.append(
+            {
+                **dict(zip(by, key)),
+                "exponent": exponent,
+                "coefficient": np.exp(intercept),
+                "points": len(group),
+            }
+        )
+    return pd.DataFrame(
+        fits, columns=[*by, "exponent", "coefficient", "points"]
+    )
+
 
 def log_performance(
-    compiler_function, raw_circuit, compiler_alias, circuit_name
+    compiler_function,
+    raw_circuit,
+    compiler_alias,
+    circuit_name,
+    repeats=5,
+    disable_gc=True,
 ):
+    """Compiles a circuit and records its compile time and gate counts.
+
+    ``compile_time`` is the median wall time of ``repeats`` warm runs, after
+    a cold run recorded as ``compile_time_cold``. The wall and CPU times of
+    every warm run are kept as JSON lists so their distributions can be
+    compared across benchmark runs.
+
+    Parameters:
+        compiler_function: Function compiling the circuit.
+        raw_circuit: The circuit, in the native format of the compiler.
+        compiler_alias: Alias of the compiler.
+        circuit_name: Name of the circuit.
+        repeats: Number of warm runs. Default is 5.
+        disable_gc: Whether to disable garbage collection while timing.
+            Default is True.
+    """
     log_entry = {"compiler": compiler_alias}
     log_entry["circuit_name"] = circuit_name
 
@@ -38,23 +177,128 @@ def log_performance(
         raw_circuit, compiler_alias
     )
 
-    t1 = time()
-    compiled_circuit = compiler_function(raw_circuit)
-    t2 = time()
-    log_entry["compile_time"] = t2 - t1
+    compiled_circuit, timings = time_function(
+        compiler_function, raw_circuit, repeats, disable_gc
+    )
+    wall = summarize_times(timings["wall"])
+    log_entry["compile_time"] = wall["median"]
+    log_entry["compile_time_iqr"] = wall["iqr"]
+    log_entry["compile_time_min"] = wall["min"]
+    log_entry["compile_time_cold"] = timings["cold"]
+    log_entry["cpu_time"] = summarize_times(timings["cpu"])["median"]
+    log_entry["repeats"] = repeats
+    log_entry["compile_times"] = json.dumps(timings["wall"])
+    log_entry["cpu_times"] = json.dumps(timings["cpu"])
     log_entry["compiled_multiq_gates"] = count_multi_qubit_gates(
         compiled_circuit, compiler_alias
     )
     [
         print(f"{key}: {value}")
         for key, value in log_entry.items()
-        if key != "raw_circuit"
+        if key not in ("compile_times", "cpu_times")
     ]
     print("\n")
 
     return log_entry
 
 
+def _proc_status_mb(field):
+    # Linux only: VmRSS is the current resident set size, and VmHWM its peak
+    # since the process started or the peak was last reset
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    # Returns whether the peak could be reset, which is only possible on Linux
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _measure_memory_here(compile_function, native_circuit):
+    gc.collect()
+    rss_before = _proc_status_mb("VmRSS")
+    reset = _reset_peak_rss()
+    compile_function(native_circuit)
+    peak_rss = _proc_status_mb("VmHWM")
+    if not reset or rss_before is None or peak_rss is None:
+        # The peak would be that of the whole process so far
+        peak_rss = rss_before = None
+
+    # Traced separately, as tracing inflates the resident set size
+    tracemalloc.start()
+    compile_function(native_circuit)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "peak_rss_mb": peak_rss,
+        "compile_rss_mb": None if peak_rss is None else peak_rss - rss_before,
+        "tracemalloc_peak_mb": traced_peak / 2**20,
+    }
+
+
+def measure_memory(compile_function, native_circuit):
+    """Measures the memory used to compile a circuit in a forked process.
+
+    The process is forked from the calling one, typically a benchmark worker
+    that already imported the compilers, so a measurement costs a fork rather
+    than a new interpreter, and its allocations don't stay in the caller. In
+    the child, the peak resident set size (RSS) is reset before compiling the
+    circuit once, and the new peak is recorded, along with how much the
+    compilation raised the RSS. The circuit is then compiled again with
+    ``tracemalloc`` tracing, for the peak of the memory allocated by Python
+    during a compilation. Where the peak RSS can't be reset (outside Linux),
+    the RSS values are None rather than the peak of the process so far, and
+    where processes can't be forked, the circuit is compiled in this process.
+
+    Parameters:
+        compile_function: Function compiling the circuit.
+        native_circuit: The circuit, in the native format of the compiler.
+
+    Returns:
+        A dict with the ``peak_rss_mb``, ``compile_rss_mb`` and
+        ``tracemalloc_peak_mb`` of the compilation, in MiB.
+    """
+    if not hasattr(os, "fork"):
+        return _measure_memory_here(compile_function, native_circuit)
+
+    gc.collect()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            outcome = (
+                True,
+                _measure_memory_here(compile_function, native_circuit),
+            )
+        except BaseException as error:
+            outcome = (False, error)
+        with os.fdopen(write_fd, "wb") as pipe:
+            pickle.dump(outcome, pipe)
+        # Skip the exit handlers of the parent, such as those of its pool
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        succeeded, outcome = pickle.load(pipe)
+    os.waitpid(pid, 0)
+    if not succeeded:
+        raise outcome
+    return outcome
+
+
 # Generalized compile function that handles Qiskit, Cirq, and PyTkets
 def get_compile_function(compiler_alias):
     match compiler_alias:
@@ -225,7 +469,7 @@ def get_n_qubit_gateset(
 
 
 def create_depolarizing_noise_model(
-    circuit: qiskit.QuantumCircuit,
+    circuit: qiskit.QuantumCircuit | List[qiskit.QuantumCircuit],
     single_qubit_error_rate: float = 0.01,
     two_qubit_error_rate: float = 0.03,
 ) -> NoiseModel:
@@ -233,15 +477,23 @@ def create_depolarizing_noise_model(
     two-qubit gates of the circuit.
 
     Args:
-        circuit: Quantum circuit to apply the model to.
+        circuit: Quantum circuit to apply the model to, or a list of
+            circuits to share the model, applied to the gates of all of them.
         single_qubit_error_rate: Error rate for a single qubit gate.
         two_qubit_error_rate: Error rate for a two qubit gate.
 
     Returns:
         Depolarizing noise model.
     """
-    single_qubit_gates = get_n_qubit_gateset(circuit, num_qubits=1)
-    two_qubit_gates = get_n_qubit_gateset(circuit, num_qubits=2)
+    circuits = (
+        [circuit] if isinstance(circuit, qiskit.QuantumCircuit) else circuit
+    )
+    single_qubit_gates = set().union(
+        *(get_n_qubit_gateset(circuit, num_qubits=1) for circuit in circuits)
+    )
+    two_qubit_gates = set().union(
+        *(get_n_qubit_gateset(circuit, num_qubits=2) for circuit in circuits)
+    )
 
     noise_model = NoiseModel()
     noise_model.add_all_qubit_quantum_error(
@@ -290,34 +542,40 @@ def count_multi_qubit_gates(circuit, compiler_alias):
             return "Unknown compiler alias."
 
 
-def get_header(df):
-    # Get version information for the compilers
-    compiler_versions = {
+def get_compiler_versions():
+    """Versions of the compiler packages, keyed by package name."""
+    return {
         "qiskit": qiskit_version,
         "cirq": cirq_version,
         "pytket": pytket_version,
         "ucc": ucc_version,
     }
 
+
+def get_machine_info():
+    """The ``os``, ``os_version``, ``architecture`` and ``cpu_count`` of the
+    machine running the benchmarks."""
+    return {
+        "os": platform.system(),  # e.g. 'Darwin' for macOS, 'Linux'
+        "os_version": platform.version(),
+        "architecture": platform.architecture()[0],  # e.g. '64bit'
+        "cpu_count": os.cpu_count(),  # Number of available CPU cores
+    }
+
+
+def get_header(df):
     # Create version header as a string formatted for CSV
     version_header = "# Compiler versions: " + ", ".join(
-        f"{key}={value}" for key, value in compiler_versions.items()
+        f"{key}={value}" for key, value in get_compiler_versions().items()
     )
 
-    # Get Operating System Info
-    os_info = (
-        platform.system()
-    )  # OS name (e.g., 'Darwin' for macOS, 'Linux', 'Windows')
-    os_version = platform.version()  # OS version
-    architecture = (
-        platform.architecture()
-    )  # System architecture (e.g., '64bit')
-
-    # Get Parallelism Info (number of CPU cores)
-    cpu_count = os.cpu_count()  # Number of available CPU cores
-
-    # Combine the information into a header
-    header_info = f"OS: {os_info} {os_version}, Architecture: {architecture[0]}, CPU Cores: {cpu_count}"
+    # Combine the machine information into a header
+    machine = get_machine_info()
+    header_info = (
+        f"OS: {machine['os']} {machine['os_version']}, "
+        f"Architecture: {machine['architecture']}, "
+        f"CPU Cores: {machine['cpu_count']}"
+    )
     version_header += f" # {header_info}"
     return version_header
 
@@ -327,6 +585,9 @@ def save_results(
 ):
     """Save the results of the benchmarking to a CSV file with compiler versions as a header.
 
+    The results are also appended to the results store (``results.db`` in
+    ``folder``, see ``results_store.py``) as a new run.
+
     Parameters:
         results_log: Benchmark results. Type can be any accepted by pd.DataFrame.
         benchmark_name: Name of the benchmark to be stored as prefix to the filename. Default is "gates".
@@ -334,7 +595,8 @@ def save_results(
         append: Whether to append to an existing file created on the same date (if True) or overwrite (if False). Default is False.
     """
     df = pd.DataFrame(results_log)
-    current_date = datetime.now().strftime("%Y-%m-%d_%H")
+    now = datetime.now()
+    current_date = now.strftime("%Y-%m-%d_%H")
     os.makedirs(folder, exist_ok=True)
     file_name = f"{benchmark_name}_{current_date}.csv"
     file_path = os.path.join(folder, file_name)
@@ -352,6 +614,16 @@ def save_results(
         # Always write the DataFrame
         df.to_csv(f, header=not file_exists or not append, index=False)
 
+    results_store.append_results(
+        os.path.join(folder, results_store.DB_NAME),
+        df,
+        benchmark_name,
+        date=now,
+        versions=get_compiler_versions(),
+        machine=get_machine_info(),
+        source=file_name,
+    )
+
     print(f"Results saved to {file_name}")
 
 
@@ -380,6 +652,10 @@ def annotate_and_adjust(
     """
     Annotates the plot while dynamically adjusting the position to avoid overlaps. In-place operation.
 
+    The annotation is measured once and moved up by ``increment`` points until it no longer overlaps a previous
+    one. All the candidate positions are checked against all the previous boxes with array operations, so the
+    whole figure is not drawn until it is saved.
+
     Parameters:
         ax (matplotlib.axes.Axes): The axis object to annotate.
         text (str): The annotation text.
@@ -419,48 +695,71 @@ def annotate_and_adjust(
         ),
     )
 
-    # Force a renderer update to ensure bounding box accuracy
-    ax.figure.canvas.draw()
+    # Measure the annotation once, drawing only the annotation, which
+    # positions its arrow. Reading the limits applies any pending
+    # autoscaling of both axes, as drawing the figure would; otherwise the
+    # annotation is measured against stale limits.
+    ax.get_xlim()
     renderer = ax.figure.canvas.get_renderer()
-
-    # Get the bounding box of the annotation in data coordinates
-    bbox = annotation.get_tightbbox(renderer).transformed(
-        ax.transData.inverted()
+    annotation.draw(renderer)
+    bbox = annotation.get_tightbbox(renderer)
+    arrow_bbox = annotation.arrow_patch.get_window_extent(renderer)
+
+    # Moving the text moves its box and the end of the arrow at the text,
+    # while the end at xy stays, so the box of each candidate position is
+    # the union of the shifted box and the initial arrow
+    shifts = np.arange(max_attempts + 1) * increment * ax.figure.dpi / 72
+    x0 = min(bbox.x0, arrow_bbox.x0)
+    x1 = max(bbox.x1, arrow_bbox.x1)
+    lower = np.column_stack(
+        [
+            np.full(len(shifts), x0),
+            np.minimum(bbox.y0 + shifts, arrow_bbox.y0),
+        ]
+    )
+    upper = np.column_stack(
+        [
+            np.full(len(shifts), x1),
+            np.maximum(bbox.y1 + shifts, arrow_bbox.y1),
+        ]
+    )
+    # Candidate boxes in data coordinates, as (x0, y0, x1, y1)
+    to_data = ax.transData.inverted()
+    candidates = np.hstack(
+        [to_data.transform(lower), to_data.transform(upper)]
     )
-    # print(f"Initial annotation: '{text}' at {xy}, bbox: {bbox}", '\n')
 
+    # Check all candidates against all previous boxes at once
     attempts = 0
-    current_offset = offset[1]
-    # Adjust position to avoid overlap
-    while any(bbox.overlaps(prev_bbox) for prev_bbox in previous_bboxes):
-        for prev_bbox in previous_bboxes:
-            if bbox.overlaps(prev_bbox):
-                # print(f"\nOverlapping with previous annotation:\n"
-                #       f"  Previous bbox: {prev_bbox}\n"
-                #       f"  Annotation text: '{annotation.get_text()}'\n")
-                break
-        # Increase vertical offset to move annotation upward
-        current_offset += increment
-        annotation.set_position((offset[0], current_offset))
-
-        # Force the renderer to update after position adjustment
-        ax.figure.canvas.draw()
-        bbox = annotation.get_tightbbox(renderer).transformed(
-            ax.transData.inverted()
+    if previous_bboxes:
+        previous = np.array(
+            [prev_bbox.extents for prev_bbox in previous_bboxes]
         )
-
-        # Update the plot to show the new position
-        ax.figure.canvas.flush_events()
-        # Increment the attempt counter and check for max attempts
-        attempts += 1
-        if attempts >= max_attempts:
+        previous = np.hstack(
+            [
+                np.minimum(previous[:, :2], previous[:, 2:]),
+                np.maximum(previous[:, :2], previous[:, 2:]),
+            ]
+        )
+        overlaps = (
+            (candidates[:, None, 0] <= previous[None, :, 2])
+            & (previous[None, :, 0] <= candidates[:, None, 2])
+            & (candidates[:, None, 1] <= previous[None, :, 3])
+            & (previous[None, :, 1] <= candidates[:, None, 3])
+        ).any(axis=1)
+        free = np.flatnonzero(~overlaps[:max_attempts])
+        if len(free):
+            attempts = free[0]
+        else:
+            attempts = max_attempts
             print(
                 f"Warning: Maximum adjustment attempts reached for annotation '{text}'."
             )
-            break
+        # Increase vertical offset to move annotation upward
+        annotation.set_position((offset[0], offset[1] + attempts * increment))
 
     # Add the final bounding box to the list of previous bounding boxes
-    previous_bboxes.append(bbox)
+    previous_bboxes.append(Bbox.from_extents(*candidates[attempts]))
 
 
 def adjust_axes_to_fit_labels(
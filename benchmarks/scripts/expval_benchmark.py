@@ -1,3 +1,6 @@
+import fcntl
+import hashlib
+import json
 import sys
 import os.path
 from typing import Any, Set
@@ -10,14 +13,26 @@ from qiskit.quantum_info import Operator, Statevector, SparsePauliOp
 from qiskit_aer import AerSimulator
 import numpy as np
 
-from common import (
-    cirq_compile,
-    pytket_peep_compile,
-    qiskit_compile,
-    save_results,
-    get_native_rep,
-    create_depolarizing_noise_model,
-)
+# Run as a script, or imported by tests as part of the benchmarks.scripts
+# package
+try:
+    from .common import (
+        cirq_compile,
+        pytket_peep_compile,
+        qiskit_compile,
+        save_results,
+        get_native_rep,
+        create_depolarizing_noise_model,
+    )
+except ImportError:
+    from common import (
+        cirq_compile,
+        pytket_peep_compile,
+        qiskit_compile,
+        save_results,
+        get_native_rep,
+        create_depolarizing_noise_model,
+    )
 from ucc import compile as ucc_compile
 
 # error rates representative of current hardware as of Mar 24, 2025
@@ -25,6 +40,9 @@ from ucc import compile as ucc_compile
 SINGLE_QUBIT_ERROR_RATE = 0.00052
 TWO_QUBIT_ERROR_RATE = 0.0071
 
+# Name of the cache of ideal expectation values in the results folder
+IDEAL_CACHE_NAME = "ideal_expvals.json"
+
 
 def compile_for_simulation(
     circuit: Any, compiler_alias: str
@@ -70,25 +88,68 @@ def compile_for_simulation(
             raise ValueError(f"Unknown compiler alias: {compiler_alias}")
 
 
-def simulate_density_matrix(circuit: qiskit.QuantumCircuit) -> np.ndarray:
-    """Simulates the given quantum circuit using a density matrix simulator
-    with depolarizing noise.
+def get_available_cores() -> int:
+    """Returns the number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_simulator(
+    method: str,
+    circuits: list[qiskit.QuantumCircuit],
+    noisy: bool = True,
+    max_parallel_threads: int | None = None,
+) -> AerSimulator:
+    """Creates a simulator that runs circuits together in one job, with a
+    depolarizing noise model shared by all of them.
 
     Args:
-        circuit: The quantum circuit to simulate.
+        method: The simulation method, e.g. "density_matrix".
+        circuits: The circuits to run.
+        noisy: If True, applies the depolarizing noise model.
+        max_parallel_threads: The number of threads to use. Defaults to the
+            cores available to this process.
 
     Returns:
-        The resulting density matrix from the simulation.
+        The simulator, which runs up to one circuit per thread at once.
     """
-    depolarizing_noise = create_depolarizing_noise_model(
-        circuit, SINGLE_QUBIT_ERROR_RATE, TWO_QUBIT_ERROR_RATE
+    threads = max_parallel_threads or get_available_cores()
+    options = {}
+    if noisy:
+        options["noise_model"] = create_depolarizing_noise_model(
+            circuits, SINGLE_QUBIT_ERROR_RATE, TWO_QUBIT_ERROR_RATE
+        )
+    return AerSimulator(
+        method=method,
+        max_parallel_threads=threads,
+        max_parallel_experiments=min(len(circuits), threads),
+        **options,
     )
-    simulator = AerSimulator(
-        method="density_matrix",
-        noise_model=depolarizing_noise,
-        max_parallel_threads=1,
+
+
+def simulate_density_matrices(
+    circuits: list[qiskit.QuantumCircuit],
+    max_parallel_threads: int | None = None,
+) -> list[np.ndarray]:
+    """Simulates the given quantum circuits in one job using a density
+    matrix simulator with depolarizing noise.
+
+    Args:
+        circuits: The quantum circuits to simulate.
+        max_parallel_threads: The number of threads to use. Defaults to the
+            cores available to this process.
+
+    Returns:
+        The resulting density matrix of each circuit.
+    """
+    simulator = get_simulator(
+        "density_matrix", circuits, max_parallel_threads=max_parallel_threads
     )
-    return simulator.run(circuit).result().data()["density_matrix"]
+    result = simulator.run(circuits).result()
+    return [
+        result.data(index)["density_matrix"] for index in range(len(circuits))
+    ]
 
 
 def qiskit_gateset(circuit: qiskit.QuantumCircuit) -> set[str]:
@@ -102,7 +163,8 @@ def parse_arguments() -> tuple[str, str, str, bool]:
     Returns:
         A tuple containing the following elements:
             - qasm_path: The file path to the QASM file.
-            - compiler_alias: The alias of the compiler to use.
+            - compiler_aliases: The comma-separated aliases of the
+                compilers to use.
             - results_folder: The folder where results will be stored.
             - log: A boolean indicating whether to log compilation
                 gateset/number details
@@ -110,16 +172,16 @@ def parse_arguments() -> tuple[str, str, str, bool]:
 
     if len(sys.argv) < 5:
         print(
-            "Usage: python expval_benchmark.py <qasm_filepath> <compiler> <results_folder> <log details>"
+            "Usage: python expval_benchmark.py <qasm_filepath> <compiler,...> <results_folder> <log details>"
         )
         sys.exit(1)
 
     qasm_path: str = sys.argv[1]
-    compiler_alias: str = sys.argv[2]
+    compiler_aliases: str = sys.argv[2]
     results_folder: str = sys.argv[3]
     log: bool = True if sys.argv[4].lower() == "true" else False
 
-    return qasm_path, compiler_alias, results_folder, log
+    return qasm_path, compiler_aliases, results_folder, log
 
 
 def fetch_pre_post_compiled_circuits(
@@ -171,40 +233,44 @@ def get_heavy_bitstrings(circuit: qiskit.QuantumCircuit) -> Set[str]:
     return set(bitstring for (bitstring, c) in counts if c > median)
 
 
-def estimate_heavy_output_prob(
-    circuit: qiskit.QuantumCircuit, noisy: bool = True
-) -> float:
-    """Sample the heavy bitstrings on the backend and estimate the heavy output
-    probability from the counts of the heavy bitstrings.
+def estimate_heavy_output_probs(
+    circuits: list[qiskit.QuantumCircuit],
+    heavy_bitstrings: list[Set[str]],
+    noisy: bool = True,
+    max_parallel_threads: int | None = None,
+) -> list[float]:
+    """Sample circuits on the backend in one job and estimate the heavy output
+    probability of each from the counts of its heavy bitstrings.
 
     Args:
-        circuit: The circuit for which to compute the heavy output metric.
-        qv_1q_err: The single qubit error rate for the backend noise model.
-        qv_2q_err: The two-qubit error rate for the backend noise model.
+        circuits: The circuits for which to compute the heavy output metric.
+        heavy_bitstrings: The heavy bitstrings of each circuit, from its
+            noiseless simulation. Each circuit has its own, as compilers may
+            permute the qubits of the outputs.
+        noisy: If True, samples with the depolarizing noise model.
+        max_parallel_threads: The number of threads to use. Defaults to the
+            cores available to this process.
 
     Returns:
-        The heavy output probability as a float.
+        The heavy output probability of each circuit.
     """
-    heavy_bitstrings = get_heavy_bitstrings(circuit)
-
-    if noisy:
-        simulator = AerSimulator(
-            method="statevector",
-            noise_model=create_depolarizing_noise_model(
-                circuit, SINGLE_QUBIT_ERROR_RATE, TWO_QUBIT_ERROR_RATE
-            ),
-            max_parallel_threads=1,
-        )
-    else:
-        simulator = AerSimulator(method="statevector", max_parallel_threads=1)
-    result = simulator.run(circuit).result()
-
-    heavy_counts = sum(
-        result.get_counts().get(bitstring, 0) for bitstring in heavy_bitstrings
+    simulator = get_simulator(
+        "statevector",
+        circuits,
+        noisy=noisy,
+        max_parallel_threads=max_parallel_threads,
     )
+    result = simulator.run(circuits).result()
+
     nshots = 1024
-    hop = heavy_counts / nshots
-    return hop
+    return [
+        sum(
+            result.get_counts(index).get(bitstring, 0)
+            for bitstring in heavy_set
+        )
+        / nshots
+        for index, heavy_set in enumerate(heavy_bitstrings)
+    ]
 
 
 def generate_qaoa_observable(num_qubits):
@@ -273,67 +339,246 @@ def generate_qcnn_observable(num_qubits):
     return qcnn_observable
 
 
+def get_observable(circuit_name: str, num_qubits: int) -> tuple[Any, str]:
+    """Returns the observable of a benchmark circuit and its description.
+
+    The quantum volume circuits have no observable: their heavy output
+    probability is estimated instead, described as "HOP".
+    """
+    if circuit_name == "qv":
+        return None, "HOP"
+    elif circuit_name == "qaoa_barabasi_albert":
+        # observable is the problem Hamiltonian
+        observable = generate_qaoa_observable(num_qubits)
+        return observable, "".join(
+            ("H_p = ", str(observable.to_sparse_list()))
+        )
+    elif circuit_name == "qcnn":
+        observable = generate_qcnn_observable(num_qubits)
+        return observable, str(observable.to_sparse_list())
+    else:
+        obs_str = "Z" * num_qubits
+        return Operator.from_label(obs_str), obs_str
+
+
+def simulate_ideal(
+    uncompiled_circuit: qiskit.QuantumCircuit, circuit_name: str
+) -> dict:
+    """Simulates the ideal expectation value of the observable of an
+    uncompiled circuit, which is the same for all compilers.
+
+    Args:
+        uncompiled_circuit: The original quantum circuit before compilation.
+        circuit_name: The name of the quantum circuit in string format.
+
+    Returns:
+        A dictionary with the ``observable`` description and the
+        ``ideal_expval``.
+    """
+    observable, obs_str = get_observable(
+        circuit_name, uncompiled_circuit.num_qubits
+    )
+    if circuit_name == "qv":
+        measured_circuit = uncompiled_circuit.measure_all(inplace=False)
+        return {
+            "observable": obs_str,
+            "ideal_expval": estimate_heavy_output_probs(
+                [measured_circuit],
+                [get_heavy_bitstrings(measured_circuit)],
+                noisy=False,
+                max_parallel_threads=1,
+            )[0],
+        }
+
+    ideal_state = Statevector.from_instruction(uncompiled_circuit)
+    return {
+        "observable": obs_str,
+        "ideal_expval": float(
+            np.real(ideal_state.expectation_value(observable))
+        ),
+    }
+
+
+def get_file_hash(qasm_path: str) -> str:
+    """Returns the SHA-256 hash of the contents of a file."""
+    with open(qasm_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_ideal(
+    qasm_path: str,
+    uncompiled_circuit: qiskit.QuantumCircuit,
+    circuit_name: str,
+    cache_path: str | None = None,
+) -> dict:
+    """Returns the ideal values of a circuit, as from ``simulate_ideal``,
+    from the cache if the circuit file is unchanged since they were cached.
+
+    Args:
+        qasm_path: The file path to the QASM file.
+        uncompiled_circuit: The circuit in the QASM file.
+        circuit_name: The name of the quantum circuit in string format.
+        cache_path: The JSON file caching ideal values. Defaults to no
+            cache.
+
+    Returns:
+        The ideal values of the circuit.
+    """
+    if cache_path is None:
+        return simulate_ideal(uncompiled_circuit, circuit_name)
+
+    # Entries are keyed by file name and observable, and only used if the
+    # hash of the file still matches
+    file_name = os.path.basename(qasm_path)
+    file_hash = get_file_hash(qasm_path)
+    _, obs_str = get_observable(circuit_name, uncompiled_circuit.num_qubits)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+    entry = cache.get(file_name, {})
+    if entry.get("hash") == file_hash and obs_str in entry["observables"]:
+        return {"observable": obs_str, **entry["observables"][obs_str]}
+
+    ideal = simulate_ideal(uncompiled_circuit, circuit_name)
+    # Other processes may have cached other circuits meanwhile, so the cache
+    # is read again and replaced at once while holding a lock
+    with open(f"{cache_path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                cache = json.load(f)
+        entry = cache.get(file_name, {})
+        if entry.get("hash") != file_hash:
+            entry = {"hash": file_hash, "observables": {}}
+        entry["observables"][obs_str] = {
+            key: value for key, value in ideal.items() if key != "observable"
+        }
+        cache[file_name] = entry
+        temporary_path = f"{cache_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(temporary_path, cache_path)
+    return ideal
+
+
+def cache_ideal(qasm_path: str, cache_path: str) -> dict:
+    """Simulates and caches the ideal values of the circuit in a QASM file,
+    unless they are already cached.
+
+    Args:
+        qasm_path: The file path to the QASM file.
+        cache_path: The JSON file caching ideal values.
+
+    Returns:
+        The ideal values of the circuit.
+    """
+    with open(qasm_path) as f:
+        uncompiled_circuit = get_native_rep(f.read(), "qiskit")
+    return get_ideal(
+        qasm_path,
+        uncompiled_circuit,
+        get_circuit_name(qasm_path),
+        cache_path,
+    )
+
+
 def simulate_expvals(
     uncompiled_circuit: qiskit.QuantumCircuit,
-    compiled_circuit: qiskit.QuantumCircuit,
+    compiled_circuits: list[qiskit.QuantumCircuit],
     circuit_name: str,
-) -> tuple[float, float]:
-    """Simulates the expectation values of a given observable for
-    both uncompiled and compiled quantum circuits.
+    ideal: dict | None = None,
+    max_parallel_threads: int | None = None,
+) -> tuple[float, list[float], str]:
+    """Simulates the expectation values of a given observable for an
+    uncompiled quantum circuit and its compiled versions, which are simulated
+    together in one noisy job.
 
     Args:
         uncompiled_circuit: The original quantum circuit before compilation.
-        compiled_circuit: The quantum circuit after compilation.
+        compiled_circuits: The quantum circuit after compilation by each
+            compiler.
         circuit_name: The name of the quantum circuit in string format.
+        ideal: The ideal values of the uncompiled circuit, as returned by
+            ``simulate_ideal``. Simulated if not given.
+        max_parallel_threads: The number of threads of the noisy simulation.
+            Defaults to the cores available to this process.
 
     Returns:
-        A tuple containing the expectation values of the observable for the
-        uncompiled and compiled circuits, respectively.
+        A tuple containing the expectation value of the observable for the
+        uncompiled circuit, those for the compiled circuits, and the
+        observable.
     """
+    if ideal is None:
+        ideal = simulate_ideal(uncompiled_circuit, circuit_name)
+
     if circuit_name == "qv":
-        compiled_circuit.measure_all()
-        uncompiled_circuit.measure_all()
-        return (
-            estimate_heavy_output_prob(uncompiled_circuit, noisy=False),
-            estimate_heavy_output_prob(compiled_circuit, noisy=True),
-            "HOP",
+        # Each compiled circuit is scored against its own heavy bitstrings,
+        # as its outputs may be permuted by the layout and routing
+        for compiled_circuit in compiled_circuits:
+            compiled_circuit.measure_all()
+        compiled_evs = estimate_heavy_output_probs(
+            compiled_circuits,
+            [get_heavy_bitstrings(circuit) for circuit in compiled_circuits],
+            noisy=True,
+            max_parallel_threads=max_parallel_threads,
         )
-
     else:
-        density_matrix = simulate_density_matrix(compiled_circuit)
-        if circuit_name == "qaoa_barabasi_albert":
-            # observable is the problem Hamiltonian
-            num_qubits = compiled_circuit.num_qubits
-            observable = generate_qaoa_observable(num_qubits)
-            obs_str = "".join(("H_p = ", str(observable.to_sparse_list())))
-        elif circuit_name == "qcnn":
-            num_qubits = compiled_circuit.num_qubits
-            observable = generate_qcnn_observable(num_qubits)
-            obs_str = str(observable.to_sparse_list())
-        else:
-            obs_str = "Z" * compiled_circuit.num_qubits
-            observable = Operator.from_label(obs_str)
+        density_matrices = simulate_density_matrices(
+            compiled_circuits, max_parallel_threads=max_parallel_threads
+        )
+        compiled_evs = []
+        for compiled_circuit, density_matrix in zip(
+            compiled_circuits, density_matrices
+        ):
+            observable, _ = get_observable(
+                circuit_name, compiled_circuit.num_qubits
+            )
+            compiled_evs.append(
+                np.real(density_matrix.expectation_value(observable))
+            )
 
-        compiled_ev = np.real(density_matrix.expectation_value(observable))
+    return ideal["ideal_expval"], compiled_evs, ideal["observable"]
 
-        ideal_state = Statevector.from_instruction(uncompiled_circuit)
-        ideal_ev = np.real(ideal_state.expectation_value(observable))
 
-        return ideal_ev, compiled_ev, obs_str
+def get_circuit_name(qasm_path: str) -> str:
+    """Returns the name of the benchmark circuit in a QASM file."""
+    return qasm_path.split("/")[-1].split("_N")[0]
 
 
-if __name__ == "__main__":
-    qasm_path, compiler_alias, results_folder, log = parse_arguments()
+def get_expval_results(
+    qasm_path: str,
+    uncompiled_circuit: qiskit.QuantumCircuit,
+    compiled_circuits: dict[str, qiskit.QuantumCircuit],
+    cache_path: str | None = None,
+    max_parallel_threads: int | None = None,
+) -> list[dict]:
+    """Simulates the expectation value of the observable of a circuit, as
+    compiled by each compiler, under noise in one job.
 
-    uncompiled, compiled = fetch_pre_post_compiled_circuits(
-        qasm_path, compiler_alias, log_details=log
-    )
-    circuit_name = qasm_path.split("/")[-1].split("_N")[0]
-    ideal_ev, compiled_ev, obs_str = simulate_expvals(
-        uncompiled, compiled, circuit_name
+    Args:
+        qasm_path: The file path to the QASM file.
+        uncompiled_circuit: The circuit in the QASM file.
+        compiled_circuits: The compiled circuit of each compiler alias.
+        cache_path: The JSON file caching ideal values, shared by all
+            compilers. Defaults to no cache.
+        max_parallel_threads: The number of threads of the noisy simulation.
+            Defaults to the cores available to this process.
+
+    Returns:
+        The results log entry of each compiler.
+    """
+    circuit_name = get_circuit_name(qasm_path)
+    ideal = get_ideal(qasm_path, uncompiled_circuit, circuit_name, cache_path)
+    ideal_ev, compiled_evs, obs_str = simulate_expvals(
+        uncompiled_circuit,
+        list(compiled_circuits.values()),
+        circuit_name,
+        ideal,
+        max_parallel_threads,
     )
 
-    results = [
+    return [
         {
             "compiler": compiler_alias,
             "circuit_name": circuit_name,
@@ -343,8 +588,59 @@ if __name__ == "__main__":
             "relative_error": abs(ideal_ev - compiled_ev) / abs(ideal_ev),
             "ideal_expval": ideal_ev,
         }
+        for compiler_alias, compiled_ev in zip(compiled_circuits, compiled_evs)
     ]
 
+
+def run_expval_benchmark(
+    qasm_path: str,
+    compiler_aliases: list[str],
+    log_details: bool = False,
+    cache_path: str | None = None,
+    max_parallel_threads: int | None = None,
+) -> list[dict]:
+    """Compiles the circuit in a QASM file with each compiler and simulates
+    the expectation values of its observable under noise in one job.
+
+    Args:
+        qasm_path: The file path to the QASM file.
+        compiler_aliases: The compilers to use to compile the circuit.
+        log_details: If True, logs details about the compilation process.
+            Defaults to False.
+        cache_path: The JSON file caching ideal values, shared by all
+            compilers. Defaults to no cache.
+        max_parallel_threads: The number of threads of the noisy simulation.
+            Defaults to the cores available to this process.
+
+    Returns:
+        The results log entry of each compiler.
+    """
+    compiled_circuits = {}
+    for compiler_alias in compiler_aliases:
+        uncompiled, compiled_circuits[compiler_alias] = (
+            fetch_pre_post_compiled_circuits(
+                qasm_path, compiler_alias, log_details=log_details
+            )
+        )
+    return get_expval_results(
+        qasm_path,
+        uncompiled,
+        compiled_circuits,
+        cache_path=cache_path,
+        max_parallel_threads=max_parallel_threads,
+    )
+
+
+if __name__ == "__main__":
+    qasm_path, compiler_aliases, results_folder, log = parse_arguments()
+
+    results = run_expval_benchmark(
+        qasm_path,
+        compiler_aliases.split(","),
+        log,
+        cache_path=os.path.join(results_folder, IDEAL_CACHE_NAME),
+    )
+
     save_results(
         results, benchmark_name="expval", folder=results_folder, append=True
     )
@@ -0,0 +1,81 @@
+# large_device_benchmark.py
+"""Compiles circuits for heavy-hex devices with 500+ qubits, mapping onto a
+region of the device as ``UCCDefault1`` does by default for devices with at
+least ``REGION_MAPPING_MIN_QUBITS`` qubits, and optionally onto the whole
+device for comparison.
+
+Usage:
+    python large_device_benchmark.py <results_folder> <qasm_file> [...]
+        [--distances 15 21 25] [--compare-full]
+"""
+
+import argparse
+from time import perf_counter
+
+from qiskit.transpiler import CouplingMap, Target
+
+from common import count_multi_qubit_gates_qiskit, get_native_rep, save_results
+from generate_layouts import generate_heavy_hex_coupling_list
+from ucc.transpilers.ucc_defaults import UCCDefault1
+
+BASIS_GATES = ["rz", "rx", "ry", "h", "cx"]
+
+parser = argparse.ArgumentParser(
+    description="Benchmark compiling for large heavy-hex devices."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument("qasm_files", nargs="+", help="Paths to the QASM files.")
+parser.add_argument(
+    "--distances",
+    type=int,
+    nargs="+",
+    default=[15, 21, 25],
+    help="Heavy-hex distances of the target devices.",
+)
+parser.add_argument(
+    "--compare-full",
+    action="store_true",
+    help="Also map onto the whole device (slow for large distances).",
+)
+args = parser.parse_args()
+
+results_log = []
+for distance in args.distances:
+    target = Target.from_configuration(
+        BASIS_GATES,
+        coupling_map=CouplingMap(generate_heavy_hex_coupling_list(distance)),
+    )
+    for qasm_file in args.qasm_files:
+        with open(qasm_file, "r") as file:
+            circuit_name = qasm_file.split("/")[-1].split("_N")[0]
+            circuit = get_native_rep(file.read(), "ucc")
+
+        modes = {"region": True}
+        if args.compare_full:
+            modes["full"] = False
+        for mode, region_mapping in modes.items():
+            t1 = perf_counter()
+            compiled = UCCDefault1(
+                target_device=target, region_mapping=region_mapping
+            ).run(circuit)
+            t2 = perf_counter()
+
+            log_entry = {
+                "compiler": "ucc",
+                "circuit_name": circuit_name,
+                "heavy_hex_distance": distance,
+                "device_qubits": target.num_qubits,
+                "circuit_qubits": circuit.num_qubits,
+                "mapping": mode,
+                "compile_time": t2 - t1,
+                "compiled_multiq_gates": count_multi_qubit_gates_qiskit(
+                    compiled
+                ),
+            }
+            [print(f"{key}: {value}") for key, value in log_entry.items()]
+            print("\n")
+            results_log.append(log_entry)
+
+save_results(
+    results_log, benchmark_name="large_device", folder=args.results_folder
+)
@@ -0,0 +1,85 @@
+# multi_target_benchmark.py
+"""Compares compiling a circuit for several devices one ``ucc.compile`` call
+at a time against a single ``ucc.compile_for_targets`` call, which runs the
+target-independent passes only once.
+
+Usage:
+    python multi_target_benchmark.py <results_folder> <qasm_file> [...]
+"""
+
+import argparse
+from time import perf_counter
+
+from qiskit.transpiler import CouplingMap, Target
+
+from common import count_multi_qubit_gates_qiskit, get_native_rep, save_results
+from generate_layouts import (
+    generate_heavy_hex_coupling_list,
+    generate_tilted_square_coupling_list,
+)
+from ucc import compile as ucc_compile, compile_for_targets
+
+BASIS_GATES = ["rz", "rx", "ry", "h", "cx"]
+
+parser = argparse.ArgumentParser(
+    description="Benchmark compiling one circuit for several target devices."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument("qasm_files", nargs="+", help="Paths to the QASM files.")
+args = parser.parse_args()
+
+coupling_lists = {
+    "heavy_hex_3": generate_heavy_hex_coupling_list(3),
+    "heavy_hex_5": generate_heavy_hex_coupling_list(5),
+    "tilted_square_4x4": generate_tilted_square_coupling_list(4, 4),
+    "tilted_square_6x6": generate_tilted_square_coupling_list(6, 6),
+}
+targets = {
+    name: Target.from_configuration(
+        BASIS_GATES, coupling_map=CouplingMap(coupling_list)
+    )
+    for name, coupling_list in coupling_lists.items()
+}
+
+results_log = []
+for qasm_file in args.qasm_files:
+    with open(qasm_file, "r") as file:
+        circuit_name = qasm_file.split("/")[-1].split("_N")[0]
+        circuit = get_native_rep(file.read(), "ucc")
+
+    usable_targets = {
+        name: target
+        for name, target in targets.items()
+        if target.num_qubits >= circuit.num_qubits
+    }
+    print(f"Compiling {circuit_name} for {list(usable_targets)}")
+
+    t1 = perf_counter()
+    separate = {
+        name: ucc_compile(circuit, target_device=target)
+        for name, target in usable_targets.items()
+    }
+    t2 = perf_counter()
+    fan_out = compile_for_targets(circuit, usable_targets)
+    t3 = perf_counter()
+
+    log_entry = {
+        "compiler": "ucc",
+        "circuit_name": circuit_name,
+        "num_targets": len(usable_targets),
+        "separate_compile_time": t2 - t1,
+        "fan_out_compile_time": t3 - t2,
+        "speedup": (t2 - t1) / (t3 - t2),
+        "gate_counts_match": all(
+            count_multi_qubit_gates_qiskit(separate[name])
+            == count_multi_qubit_gates_qiskit(fan_out[name])
+            for name in usable_targets
+        ),
+    }
+    [print(f"{key}: {value}") for key, value in log_entry.items()]
+    print("\n")
+    results_log.append(log_entry)
+
+save_results(
+    results_log, benchmark_name="multi_target", folder=args.results_folder
+)
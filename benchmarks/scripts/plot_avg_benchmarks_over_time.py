@@ -1,60 +1,77 @@
 from common import (
     annotate_and_adjust,
     adjust_axes_to_fit_labels,
-    extract_compiler_versions,
 )
 from pkg_resources import parse_version
-import glob
+from results_store import (
+    DB_NAME,
+    load_aggregates,
+    mark_output_current,
+    output_is_current,
+)
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 
+parser = argparse.ArgumentParser(
+    description="Plot the average gate benchmark results over time."
+)
+parser.add_argument(
+    "--force",
+    action="store_true",
+    help="Redraw the plot even if no results were added since it was drawn.",
+)
+args = parser.parse_args()
 
 ### Load data
 # Get the directory of the current script
 directory_of_this_file = os.path.dirname(os.path.abspath(__file__))
 results_folder = os.path.join(directory_of_this_file, "../results")
-csv_files = glob.glob(os.path.join(results_folder, "gates*.csv"))
-
-dataframes = []
-
-
-print("Loading data files...")
-for file in csv_files:
-    compiler_versions = {}
-    with open(file, "r") as f:
-        header_line = f.readline().strip()
-        compiler_versions = extract_compiler_versions(header_line)
+db_path = os.path.join(results_folder, DB_NAME)
+filename = os.path.join(
+    directory_of_this_file, "../avg_compiler_benchmarks_over_time.png"
+)
+if not args.force and output_is_current(db_path, filename, ["gates"]):
+    print(f"{filename} is up to date")
+    sys.exit()
 
-    date_label = str(file).split("_")[1].split(".")[0]
-    df = pd.read_csv(file, header=1)
 
-    df["date"] = date_label
-    df["compiled_ratio"] = df["compiled_multiq_gates"] / df["raw_multiq_gates"]
-    if "pytket-peep" in df["compiler"].unique():
-        compiler_versions["pytket-peep"] = compiler_versions["pytket"]
-        # Remove pytket from compiler_versions for this datafile
-        compiler_versions.pop("pytket")
-    df["compiler_version"] = df["compiler"].map(compiler_versions)
+def clean(df):
+    """Renames compilers and drops the dates that are not plotted."""
     df["compiler"] = df["compiler"].replace("qiskit", "qiskit-default")
-    # Scrub semver string of any extraneous period at end
-    df["compiler_version"] = df["compiler_version"].str.rstrip(".")
 
-    dataframes.append(df)
+    # Remove older implementation of pytket from the data
+    df = df[df["compiler"] != "pytket"]
+
+    # Remove data from dates between 2025-02-07 through 2025-02-28 while #251 was being fixed
+    df = df[
+        ~((df["date"] >= "2025-02-07") & (df["date"] < "2025-02-28"))
+        & (df["date"] != "2025-03-05")
+    ]
 
-df_dates = pd.concat(dataframes, ignore_index=True)
+    # Ensure 'date' is in datetime format
+    return df.assign(date=pd.to_datetime(df["date"]))
 
-# Remove older implementation of pytket from the data
-df_dates = df_dates[df_dates["compiler"] != "pytket"]
 
-# Remove data from dates between 2025-02-07 through 2025-02-28 while #251 was being fixed
-df_dates = df_dates[
-    ~((df_dates["date"] >= "2025-02-07") & (df_dates["date"] < "2025-02-28"))
-    & (df_dates["date"] != "2025-03-05")
-]
+print("Loading data...")
+# Daily averages for each compiler version
+df_dates = clean(
+    load_aggregates(
+        db_path, "gates", metrics=["compiled_ratio", "compile_time"]
+    )
+)
 
-# Ensure 'date' is in datetime format
-df_dates["date"] = pd.to_datetime(df_dates["date"])
+# Find the average peak memory for each compiler on each date, for the
+# results that include it. Memory is plotted for every date rather than only
+# for new compiler versions.
+avg_peak_memory = clean(
+    load_aggregates(
+        db_path, "gates", metrics=["peak_rss_mb"], by=("compiler",)
+    )
+)
+has_memory = not avg_peak_memory.empty
 
 # Get the earliest date for each compiler version
 new_version_dates = df_dates.groupby(["compiler", "compiler_version"])[
@@ -119,7 +136,10 @@ color_map = {
     compiler: colormap(i) for i, compiler in enumerate(unique_compilers)
 }
 
-fig, ax = plt.subplots(2, 1, figsize=(8, 8), sharex=False, dpi=150)
+num_plots = 3 if has_memory else 2
+fig, ax = plt.subplots(
+    num_plots, 1, figsize=(8, 4 * num_plots), sharex=False, dpi=150
+)
 # Rotate x labels on axes 0
 plt.setp(ax[0].xaxis.get_majorticklabels(), rotation=45)
 
@@ -242,10 +262,29 @@ ax[1].set_yscale("log")
 ax[1].legend(title="Compiler", loc="upper center")
 adjust_axes_to_fit_labels(ax[1], y_scale=[1.0, 1.9], y_log=True)
 
+#### Plot peak memory
+if has_memory:
+    print("Plotting peak memory...")
+    for compiler in unique_compilers:
+        compiler_data = avg_peak_memory[
+            avg_peak_memory["compiler"] == compiler
+        ]
+        ax[2].plot(
+            compiler_data["date"],
+            compiler_data["peak_rss_mb"],
+            label=compiler,
+            marker="o",
+            linestyle="-",
+            color=color_map[compiler],
+        )
+    ax[2].set_title("Average Peak Memory (RSS) over Time")
+    ax[2].set_ylabel("Peak RSS (MiB)")
+    ax[2].set_xlabel("Date")
+    ax[2].legend(title="Compiler", loc="upper center")
+    plt.setp(ax[2].xaxis.get_majorticklabels(), rotation=45)
+
 plt.xticks(rotation=45)
 plt.tight_layout()
-filename = os.path.join(
-    directory_of_this_file, "../avg_compiler_benchmarks_over_time.png"
-)
 print(f"\nSaving plot to {filename}")
 fig.savefig(filename)
+mark_output_current(db_path, filename, ["gates"])
@@ -1,79 +1,52 @@
+import argparse
 import os
-import glob
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
-from common import annotate_and_adjust, extract_compiler_versions
+from common import annotate_and_adjust
+from results_store import (
+    DB_NAME,
+    load_aggregates,
+    load_first_seen,
+    mark_output_current,
+    output_is_current,
+)
+
+parser = argparse.ArgumentParser(
+    description="Plot the average expected value error over time."
+)
+parser.add_argument(
+    "--force",
+    action="store_true",
+    help="Redraw the plot even if no results were added since it was drawn.",
+)
+args = parser.parse_args()
 
 # Get the directory of the current script
 directory_of_this_file = os.path.dirname(os.path.abspath(__file__))
 
 # Construct the correct path to the results folder
 results_folder = os.path.join(directory_of_this_file, "../results")
+db_path = os.path.join(results_folder, DB_NAME)
+filename = os.path.join(
+    directory_of_this_file, "../average_relative_error_over_time.png"
+)
+if not args.force and output_is_current(db_path, filename, ["expval"]):
+    print(f"{filename} is up to date")
+    sys.exit()
 
-# Use glob to find all CSV files in the results folder
-csv_files = glob.glob(os.path.join(results_folder, "expval_*.csv"))
-
-# Iterate through all CSV files and load them into dataframes with date column
-dfs = []  # List to store dataframes
-for file in csv_files:
-    # Extract the version from the file header
-    with open(file, "r") as f:
-        header_line = f.readline().strip()
-        compiler_versions = extract_compiler_versions(header_line)
-    # Extract the date from the filename (assuming the date is after 'expval_' and before '.csv')
-    date_label = str(file).split("_")[1].split(".")[0]
-
-    # Load the CSV file into a DataFrame
-    df = pd.read_csv(file, comment="#")
-
-    # Add the extracted date as a new column in the dataframe
-    df["date"] = date_label
-    if "pytket-peep" in df["compiler"].unique():
-        compiler_versions["pytket-peep"] = compiler_versions["pytket"]
-        # Remove pytket from compiler_versions for this datafile
-        compiler_versions.pop("pytket")
-    df["compiler_version"] = df["compiler"].map(compiler_versions)
-
-    # Append the dataframe to the list
-    dfs.append(df)
-
-# Concatenate all dataframes into one large dataframe
-df_all = pd.concat(dfs, ignore_index=True)
-
-# Convert the 'date' column to datetime
-df_all["date"] = pd.to_datetime(df_all["date"])
-
-# Get the earliest date for each compiler version
-new_version_dates = df_all.groupby(["compiler", "compiler_version"])[
-    "date"
-].min()
-
-# Get all unique first occurrence dates
-unique_dates = new_version_dates.unique()
+# Load the daily average relative error of each compiler version, where the
+# relative error is normalized to avoid division by zero
+summary = load_aggregates(
+    db_path, "expval", metrics=["normalized_relative_error"]
+).rename(columns={"normalized_relative_error": "avg_relative_error"})
 
 # Filter on first occurrence of each compiler version based on the date
-df_all = df_all[df_all["date"].isin(unique_dates)]
+unique_dates = load_first_seen(db_path, "expval")["date"].unique()
+summary = summary[summary["date"].isin(unique_dates)]
 
-
-def normalize_relative_error(row):
-    """Calculate the relative error and normalize it to avoid division by zero."""
-    epsilon = 1e-8
-    relative_error = abs(row["ideal_expval"] - row["expval"]) / (
-        abs(row["ideal_expval"]) + epsilon
-    )
-    return relative_error
-
-
-# Group by date and compiler, and calculate the average relative error
-df_all["normalized_relative_error"] = df_all.apply(
-    normalize_relative_error, axis=1
-)
-
-summary = (
-    df_all.groupby(["date", "compiler", "compiler_version"])
-    .agg(avg_relative_error=("normalized_relative_error", "mean"))
-    .reset_index()
-)
+# Convert the 'date' column to datetime
+summary["date"] = pd.to_datetime(summary["date"])
 
 # Set up the figure
 fig, ax = plt.subplots(figsize=(12, 6))
@@ -140,8 +113,6 @@ ax.legend(title="Compiler")
 
 # Adjust layout and save the figure
 plt.tight_layout()
-filename = os.path.join(
-    directory_of_this_file, "../average_relative_error_over_time.png"
-)
 print(f"\n Saving plot to {filename}")
 fig.savefig(filename)
+mark_output_current(db_path, filename, ["expval"])
@@ -1,7 +1,24 @@
+import argparse
 import os
-import glob
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
+from results_store import (
+    DB_NAME,
+    latest_date,
+    load_results,
+    mark_output_current,
+    output_is_current,
+)
+
+parser = argparse.ArgumentParser(
+    description="Plot the latest gate benchmark results by circuit."
+)
+parser.add_argument(
+    "--force",
+    action="store_true",
+    help="Redraw the plot even if no results were added since it was drawn.",
+)
+args = parser.parse_args()
 
 # Step 1: Get the directory of the current script
 directory_of_this_file = os.path.dirname(os.path.abspath(__file__))
@@ -9,33 +26,22 @@ directory_of_this_file = os.path.dirname(os.path.abspath(__file__))
 # Step 2: Construct the correct path to the results folder
 results_folder = os.path.join(directory_of_this_file, "../results")
 
-# Step 3: Use glob to find all CSV files in the results folder
-csv_files = glob.glob(os.path.join(results_folder, "gates*.csv"))
-
-# Step 4: Iterate through all CSV files and load them into dataframes with date column
-dfs = []  # List to store dataframes
-for file in csv_files:
-    # Extract the date from the filename (assuming the date is after 'gates_' and before '.csv')
-    date_label = str(file).split("_")[1].split(".")[0]
-
-    # Load the CSV file into a DataFrame
-    df = pd.read_csv(file, header=1)
-
-    # Add the extracted date as a new column in the dataframe
-    df["date"] = date_label
-
-    # Append the dataframe to the list
-    dfs.append(df)
-
-# Step 5: Concatenate all dataframes into one large dataframe
-df_all = pd.concat(dfs, ignore_index=True)
-
-# Find the most recent date in the 'date' column
-latest_date = df_all["date"].max()
-print("latest date is", latest_date)
-
-# Filter the dataframe to only include rows from the most recent date
-df_latest = df_all[df_all["date"] == latest_date]
+# Step 3: Load the results of the most recent day from the results store
+db_path = os.path.join(results_folder, DB_NAME)
+filename = os.path.join(
+    directory_of_this_file, "../latest_compiler_benchmarks_by_circuit.png"
+)
+if not args.force and output_is_current(db_path, filename, ["gates"]):
+    print(f"{filename} is up to date")
+    sys.exit()
+latest_day = latest_date(db_path, "gates")[:10]
+print("latest date is", latest_day)
+df_latest = load_results(
+    db_path,
+    "gates",
+    metrics=["compile_time", "compiled_multiq_gates", "raw_multiq_gates"],
+    since=latest_day,
+)
 
 # Step 3: Define the bar width and create x-axis positions for the circuits
 bar_width = 0.2
@@ -87,14 +93,14 @@ for i, (key, grp) in enumerate(df_latest.groupby("compiler")):
     )
 
 # Step 6: Customize plots
-ax[0].set_title(f"Compiler Performance on Circuits (Date: {latest_date})")
+ax[0].set_title(f"Compiler Performance on Circuits (Date: {latest_day})")
 ax[0].set_xlabel("Circuit Name")
 ax[0].set_ylabel("Compile Time (s)")
 ax[0].set_xticks(x_positions)
 ax[0].set_xticklabels(circuit_names, rotation=75)
 ax[0].set_yscale("log")
 
-ax[1].set_title(f"Gate Counts on Circuits (Date: {latest_date})")
+ax[1].set_title(f"Gate Counts on Circuits (Date: {latest_day})")
 ax[1].set_xlabel("Circuit Name")
 ax[1].set_ylabel("Compiled Gate Count")
 ax[1].set_xticks(x_positions)
@@ -107,8 +113,6 @@ ax[1].legend(title="Compiler")
 
 # Adjust layout and save the figure
 plt.tight_layout()
-filename = os.path.join(
-    directory_of_this_file, "../latest_compiler_benchmarks_by_circuit.png"
-)
 print(f"\n Saving plot to {filename}")
 fig.savefig(filename)
+mark_output_current(db_path, filename, ["gates"])
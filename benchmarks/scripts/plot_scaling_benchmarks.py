@@ -0,0 +1,92 @@
+import glob
+import math
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from common import fit_scaling_exponents
+
+directory_of_this_file = os.path.dirname(os.path.abspath(__file__))
+
+# The results folder can be passed as the first argument
+results_folder = (
+    sys.argv[1]
+    if len(sys.argv) > 1
+    else os.path.join(directory_of_this_file, "../results")
+)
+
+# Load the most recent scaling results
+csv_files = sorted(
+    file
+    for file in glob.glob(os.path.join(results_folder, "scaling_*.csv"))
+    if not os.path.basename(file).startswith("scaling_fits")
+)
+if not csv_files:
+    sys.exit(f"No scaling results found in {results_folder}")
+print(f"Plotting {csv_files[-1]}")
+df = pd.read_csv(csv_files[-1], header=1)
+
+# The fits are recomputed so that plots of edited results stay consistent
+fits = fit_scaling_exponents(df, by=("family", "sweep", "compiler"))
+print(fits.to_string(index=False))
+exponents = {
+    (row.family, row.sweep, row.compiler): row.exponent
+    for row in fits.itertuples()
+}
+
+families = sorted(df["family"].unique())
+num_columns = min(3, len(families))
+num_rows = math.ceil(len(families) / num_columns)
+fig, axes = plt.subplots(
+    num_rows,
+    num_columns,
+    figsize=(5 * num_columns, 4 * num_rows),
+    squeeze=False,
+)
+
+unique_compilers = sorted(df["compiler"].unique())
+colormap = plt.get_cmap("tab10", len(unique_compilers))
+color_map = {
+    compiler: colormap(i) for i, compiler in enumerate(unique_compilers)
+}
+line_styles = {"qubits": "-", "depth": "--"}
+
+for ax, family in zip(axes.flat, families):
+    for (sweep, compiler), grp in df[df["family"] == family].groupby(
+        ["sweep", "compiler"]
+    ):
+        grp = grp.sort_values("num_gates")
+        label = f"{compiler}, {sweep}"
+        exponent = exponents.get((family, sweep, compiler))
+        if exponent is not None:
+            label += f" (k={exponent:.2f})"
+        ax.errorbar(
+            grp["num_gates"],
+            grp["compile_time"],
+            yerr=grp.get("compile_time_iqr", np.zeros(len(grp))) / 2,
+            marker="o",
+            linestyle=line_styles.get(sweep, ":"),
+            color=color_map[compiler],
+            label=label,
+        )
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_title(family)
+    ax.set_xlabel("Number of gates")
+    ax.set_ylabel("Compile time (s)")
+    ax.legend(fontsize=7)
+
+# Hide unused subplots
+for ax in axes.flat[len(families) :]:
+    ax.set_visible(False)
+
+fig.suptitle(
+    "Compile time scaling (k: fitted exponent of compile time ~ gates^k)"
+)
+plt.tight_layout()
+filename = os.path.join(directory_of_this_file, "../compile_time_scaling.png")
+print(f"\n Saving plot to {filename}")
+fig.savefig(filename)
@@ -0,0 +1,83 @@
+# qasm3_loader_benchmark.py
+"""Compares loading OpenQASM 3 files with ``ucc.qasm3.load`` against the
+general importer used through qBraid, recording the load time and the peak
+Python memory of each.
+
+Usage:
+    python qasm3_loader_benchmark.py <results_folder> [<qasm3_file> ...]
+
+Without files, all files in ``benchmarks/qasm_circuits/qasm3`` are loaded.
+"""
+
+import argparse
+import glob
+import os
+import tracemalloc
+from time import perf_counter
+
+from qbraid.transpiler import transpile as translate
+
+from common import save_results
+from ucc import qasm3
+
+
+def _load_ucc(path):
+    with open(path, "r") as file:
+        return qasm3.load(file)
+
+
+def _load_qbraid(path):
+    with open(path, "r") as file:
+        return translate(file.read(), "qiskit")
+
+
+def _measure(function, path):
+    # tracemalloc slows down allocations, so the time comes from a separate
+    # untraced run
+    t1 = perf_counter()
+    circuit = function(path)
+    t2 = perf_counter()
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return circuit, t2 - t1, peak
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark loading OpenQASM 3 files."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument(
+    "qasm_files", nargs="*", help="Paths to the OpenQASM 3 files."
+)
+args = parser.parse_args()
+
+qasm_files = args.qasm_files or sorted(
+    glob.glob(
+        os.path.join(
+            os.path.dirname(__file__), "../qasm_circuits/qasm3/**/*.qasm"
+        ),
+        recursive=True,
+    )
+)
+
+results_log = []
+for qasm_file in qasm_files:
+    circuit_name = os.path.basename(qasm_file).split("_N")[0]
+    for loader, function in (("ucc", _load_ucc), ("qbraid", _load_qbraid)):
+        circuit, load_time, peak = _measure(function, qasm_file)
+        log_entry = {
+            "loader": loader,
+            "circuit_name": circuit_name,
+            "num_gates": len(circuit.data),
+            "load_time": load_time,
+            "peak_memory_mb": peak / 2**20,
+        }
+        [print(f"{key}: {value}") for key, value in log_entry.items()]
+        print("\n")
+        results_log.append(log_entry)
+
+save_results(
+    results_log, benchmark_name="qasm3_loader", folder=args.results_folder
+)
@@ -0,0 +1,90 @@
+# qpy_benchmark.py
+"""Compares shipping compiled circuits as QPY and as OpenQASM 2: for each
+circuit compiled by ucc, records the time to serialize and to load it back,
+and the size of the payload, for both formats.
+
+Usage:
+    python qpy_benchmark.py <results_folder> [<qasm_file> ...] [--repeats 5]
+
+Without files, the 100-qubit circuits in ``benchmarks/qasm_circuits/qasm2``
+are used.
+"""
+
+import argparse
+import glob
+import os
+from time import perf_counter
+
+from qiskit import qasm2
+
+from common import get_native_rep, save_results
+from ucc import compile as ucc_compile
+from ucc.emit import qpy_dumps, qpy_loads
+
+FORMATS = {
+    "qpy": (qpy_dumps, qpy_loads),
+    "qasm2": (
+        qasm2.dumps,
+        lambda program: qasm2.loads(
+            program, custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS
+        ),
+    ),
+}
+
+
+def _best_time(function, argument, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t1 = perf_counter()
+        result = function(argument)
+        best = min(best, perf_counter() - t1)
+    return result, best
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark QPY and OpenQASM 2 round trips."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument("qasm_files", nargs="*", help="Paths to the QASM files.")
+parser.add_argument(
+    "--repeats",
+    type=int,
+    default=5,
+    help="Number of timed runs; the fastest is recorded.",
+)
+args = parser.parse_args()
+
+qasm_files = args.qasm_files or sorted(
+    glob.glob(
+        os.path.join(
+            os.path.dirname(__file__), "../qasm_circuits/qasm2/**/*_N100_*"
+        ),
+        recursive=True,
+    )
+)
+
+results_log = []
+for qasm_file in qasm_files:
+    with open(qasm_file, "r") as file:
+        circuit_name = os.path.basename(qasm_file).split("_N")[0]
+        compiled = ucc_compile(get_native_rep(file.read(), "ucc"))
+
+    for format_name, (dumps, loads) in FORMATS.items():
+        payload, dump_time = _best_time(dumps, compiled, args.repeats)
+        _, load_time = _best_time(loads, payload, args.repeats)
+        log_entry = {
+            "format": format_name,
+            "circuit_name": circuit_name,
+            "num_gates": len(compiled.data),
+            "dump_time": dump_time,
+            "load_time": load_time,
+            "round_trip_time": dump_time + load_time,
+            "size_bytes": len(payload),
+        }
+        [print(f"{key}: {value}") for key, value in log_entry.items()]
+        print("\n")
+        results_log.append(log_entry)
+
+save_results(
+    results_log, benchmark_name="qpy_round_trip", folder=args.results_folder
+)
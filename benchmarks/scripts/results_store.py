@@ -0,0 +1,684 @@
+# results_store.py
+"""SQLite store of benchmark results.
+
+Every call to ``save_results`` appends a run to ``results.db`` in the
+results folder, next to the CSV file. Each value of each results row is
+stored as one row of the ``results`` table, with typed columns for the
+benchmark, date, compiler, compiler version, circuit and metric, so new
+metrics need no schema change and scripts can query only the metrics,
+compilers, circuits and dates they plot. The machine the run was on and
+the versions of all compilers are stored once per run in ``runs``.
+
+Daily averages of each numeric metric for each compiler and compiler
+version, and the day each compiler version was first seen, are kept up to
+date as runs are appended, so that plots over the whole history read a few
+hundred aggregate rows instead of every result. The fingerprint of the runs
+a plot was made from is written next to it, in ``<plot>.fingerprint``, so
+plots are only redrawn when new results arrive. As the fingerprint is a
+hash of the aggregates, it still matches when the store is rebuilt from
+the CSV files.
+
+The CSV files written before the store existed can be imported with:
+
+    python results_store.py import [<results_folder>] [--db <path>]
+
+Importing is idempotent: files already in the store are skipped. The
+aggregates of a store written before they existed can be rebuilt with:
+
+    python results_store.py aggregate [<results_folder>] [--db <path>]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+DB_NAME = "results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    benchmark TEXT NOT NULL,
+    date TEXT NOT NULL,
+    source TEXT,
+    os TEXT,
+    os_version TEXT,
+    architecture TEXT,
+    cpu_count INTEGER,
+    versions TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_source ON runs (source);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    benchmark TEXT NOT NULL,
+    date TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    compiler TEXT,
+    compiler_version TEXT,
+    circuit_name TEXT,
+    metric TEXT NOT NULL,
+    value REAL,
+    text_value TEXT
+);
+CREATE INDEX IF NOT EXISTS results_benchmark_date
+    ON results (benchmark, date);
+CREATE INDEX IF NOT EXISTS results_circuit_date
+    ON results (circuit_name, date);
+CREATE INDEX IF NOT EXISTS results_benchmark_metric
+    ON results (benchmark, metric);
+CREATE TABLE IF NOT EXISTS aggregates (
+    benchmark TEXT NOT NULL,
+    day TEXT NOT NULL,
+    compiler TEXT NOT NULL,
+    compiler_version TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (benchmark, day, compiler, compiler_version, metric)
+);
+CREATE TABLE IF NOT EXISTS first_seen (
+    benchmark TEXT NOT NULL,
+    compiler TEXT NOT NULL,
+    compiler_version TEXT NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (benchmark, compiler, compiler_version)
+);
+"""
+
+# Columns identifying a results row rather than measuring something
+KEY_COLUMNS = ("compiler", "circuit_name")
+
+# Package whose version applies to each compiler alias
+COMPILER_PACKAGES = {"pytket-peep": "pytket"}
+
+# Columns the aggregates can be grouped by, besides the day
+AGGREGATE_KEYS = ("compiler", "compiler_version")
+
+
+def _compiled_ratio(record):
+    return record["compiled_multiq_gates"] / record["raw_multiq_gates"]
+
+
+def _normalized_relative_error(record):
+    # Relative error, normalized to avoid division by zero
+    epsilon = 1e-8
+    return abs(record["ideal_expval"] - record["expval"]) / (
+        abs(record["ideal_expval"]) + epsilon
+    )
+
+
+# Metrics computed from each results row before aggregating, so that their
+# averages are over rows rather than a ratio of averages
+DERIVED_METRICS = {
+    "gates": {"compiled_ratio": _compiled_ratio},
+    "expval": {"normalized_relative_error": _normalized_relative_error},
+}
+
+VERSION_PATTERN = re.compile(r"(\w+)=([\d\.]+)")
+MACHINE_PATTERN = re.compile(
+    r"OS: (?P<os>\S+) (?P<os_version>.*), Architecture: "
+    r"(?P<architecture>\w+), CPU Cores: (?P<cpu_count>\d+)"
+)
+
+
+def connect(path):
+    """Opens the store at ``path``, creating it if needed.
+
+    Args:
+        path (str): Path of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _metric_value(value):
+    # Returns the (value, text_value) pair to store, or None for missing
+    # values
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return None, value
+    try:
+        return float(value), None
+    except (TypeError, ValueError):
+        return None, str(value)
+
+
+def _update_aggregates(connection, benchmark_name, date, records):
+    # Adds the numeric metrics of results records, each with its compiler
+    # and compiler version, to the daily aggregates and first seen dates
+    day = date[:10]
+    sums = {}
+    versions = set()
+    for record in records:
+        compiler = record.get("compiler") or ""
+        compiler_version = record.get("compiler_version") or ""
+        versions.add((compiler, compiler_version))
+        values = dict(record)
+        for metric, function in DERIVED_METRICS.get(
+            benchmark_name, {}
+        ).items():
+            try:
+                values[metric] = function(record)
+            except (KeyError, TypeError, ZeroDivisionError):
+                pass
+        for metric, value in values.items():
+            if metric in KEY_COLUMNS or metric in AGGREGATE_KEYS:
+                continue
+            stored = _metric_value(value)
+            if stored is None or stored[0] is None:
+                continue
+            key = (compiler, compiler_version, metric)
+            count, total = sums.get(key, (0, 0.0))
+            sums[key] = (count + 1, total + stored[0])
+
+    connection.executemany(
+        "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET count = count + excluded.count, "
+        "total = total + excluded.total",
+        [
+            (benchmark_name, day, *key, count, total)
+            for key, (count, total) in sums.items()
+        ],
+    )
+    connection.executemany(
+        "INSERT INTO first_seen VALUES (?, ?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET day = MIN(day, excluded.day)",
+        [(benchmark_name, *version, day) for version in versions],
+    )
+
+
+def append_results(
+    path,
+    results_log,
+    benchmark_name,
+    date=None,
+    versions=None,
+    machine=None,
+    source=None,
+):
+    """Appends a run of results to the store.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        results_log: Benchmark results. Type can be any accepted by
+            ``pd.DataFrame``.
+        benchmark_name (str): Name of the benchmark, e.g. "gates".
+        date (datetime): (optional) Date of the run. Default is now.
+        versions (dict[str, str]): (optional) Version of each compiler
+            package, e.g. ``{"qiskit": "1.4.2"}``.
+        machine (dict): (optional) The ``os``, ``os_version``,
+            ``architecture`` and ``cpu_count`` of the machine.
+        source (str): (optional) Name of the CSV file with the same
+            results.
+
+    Returns:
+        int: The id of the run.
+    """
+    df = pd.DataFrame(results_log)
+    date = (date or datetime.now()).isoformat(sep=" ", timespec="seconds")
+    versions = versions or {}
+    machine = machine or {}
+
+    with connect(path) as connection:
+        run_id = connection.execute(
+            "INSERT INTO runs (benchmark, date, source, os, os_version, "
+            "architecture, cpu_count, versions) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                benchmark_name,
+                date,
+                source,
+                machine.get("os"),
+                machine.get("os_version"),
+                machine.get("architecture"),
+                machine.get("cpu_count"),
+                json.dumps(versions),
+            ),
+        ).lastrowid
+
+        rows = []
+        records = []
+        for row, record in enumerate(df.to_dict("records")):
+            compiler = record.get("compiler")
+            compiler_version = versions.get(
+                COMPILER_PACKAGES.get(compiler, compiler)
+            )
+            records.append({**record, "compiler_version": compiler_version})
+            circuit_name = record.get("circuit_name")
+            for metric, value in record.items():
+                if metric in KEY_COLUMNS:
+                    continue
+                stored = _metric_value(value)
+                if stored is None:
+                    continue
+                rows.append(
+                    (
+                        run_id,
+                        benchmark_name,
+                        date,
+                        row,
+                        compiler,
+                        compiler_version,
+                        circuit_name,
+                        metric,
+                        *stored,
+                    )
+                )
+        connection.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        _update_aggregates(connection, benchmark_name, date, records)
+    connection.close()
+    return run_id
+
+
+def load_results(
+    path,
+    benchmark_name,
+    metrics=None,
+    compilers=None,
+    circuits=None,
+    since=None,
+):
+    """Loads results from the store, with one column per metric.
+
+    Only the requested metrics, compilers, circuits and dates are read.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        benchmark_name (str): Name of the benchmark, e.g. "gates".
+        metrics (list[str]): (optional) Metrics to load. Default is all.
+        compilers (list[str]): (optional) Compilers to load. Default is all.
+        circuits (list[str]): (optional) Circuits to load. Default is all.
+        since (str): (optional) Earliest date to load, e.g. "2025-01-01".
+
+    Returns:
+        pd.DataFrame: One row per results row, with the ``run_id``,
+        ``date``, ``compiler``, ``compiler_version``, ``circuit_name`` and
+        machine ``os``, ``architecture`` and ``cpu_count`` columns, and a
+        column per metric.
+    """
+    query = (
+        "SELECT results.run_id, row, results.date, compiler, "
+        "compiler_version, circuit_name, os, architecture, cpu_count, "
+        "metric, value, text_value FROM results JOIN runs USING (run_id) "
+        "WHERE results.benchmark = ?"
+    )
+    parameters = [benchmark_name]
+    for column, values in (
+        ("metric", metrics),
+        ("compiler", compilers),
+        ("circuit_name", circuits),
+    ):
+        if values is not None:
+            query += f" AND {column} IN ({', '.join('?' * len(values))})"
+            parameters.extend(values)
+    if since is not None:
+        query += " AND results.date >= ?"
+        parameters.append(since)
+
+    with connect(path) as connection:
+        long_df = pd.read_sql_query(query, connection, params=parameters)
+    connection.close()
+
+    columns = [
+        "run_id",
+        "date",
+        "compiler",
+        "compiler_version",
+        "circuit_name",
+        "os",
+        "architecture",
+        "cpu_count",
+    ]
+    if long_df.empty:
+        return pd.DataFrame(columns=columns + list(metrics or []))
+    # Text metrics (e.g. observables) go in the same columns as numbers
+    text_metrics = set(long_df.loc[long_df["text_value"].notna(), "metric"])
+    long_df["value"] = long_df["value"].astype(object)
+    has_text = long_df["text_value"].notna()
+    long_df.loc[has_text, "value"] = long_df.loc[has_text, "text_value"]
+
+    wide = long_df.pivot(
+        index=["run_id", "row"], columns="metric", values="value"
+    )
+    wide.columns.name = None
+    for metric in wide.columns:
+        if metric not in text_metrics:
+            wide[metric] = wide[metric].astype(float)
+    keys = long_df.drop_duplicates(["run_id", "row"]).set_index(
+        ["run_id", "row"]
+    )[columns[1:]]
+    return (
+        keys.join(wide)
+        .reset_index()
+        .drop(columns="row")
+        .sort_values(["date", "run_id"], kind="stable", ignore_index=True)
+    )
+
+
+def latest_date(path, benchmark_name):
+    """Returns the date of the latest run of a benchmark.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        benchmark_name (str): Name of the benchmark, e.g. "gates".
+
+    Returns:
+        str: The date, as "%Y-%m-%d %H:%M:%S", or None if there are no runs.
+    """
+    with connect(path) as connection:
+        (date,) = connection.execute(
+            "SELECT MAX(date) FROM runs WHERE benchmark = ?",
+            (benchmark_name,),
+        ).fetchone()
+    connection.close()
+    return date
+
+
+def load_aggregates(
+    path,
+    benchmark_name,
+    metrics=None,
+    by=AGGREGATE_KEYS,
+    since=None,
+):
+    """Loads the daily averages of metrics, with one column per metric.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        benchmark_name (str): Name of the benchmark, e.g. "gates".
+        metrics (list[str]): (optional) Metrics to load, including those in
+            ``DERIVED_METRICS``. Default is all.
+        by (tuple[str]): (optional) Columns of ``AGGREGATE_KEYS`` to average
+            over each day for. Default is each compiler and version.
+        since (str): (optional) Earliest day to load, e.g. "2025-01-01".
+
+    Returns:
+        pd.DataFrame: One row per day and group, with the ``date`` as
+        "%Y-%m-%d", the ``by`` columns, and the average of each metric over
+        the results rows that have it.
+    """
+    if not set(by) <= set(AGGREGATE_KEYS):
+        raise ValueError(f"Aggregates can only be grouped by {AGGREGATE_KEYS}")
+    groups = ", ".join(["day", *by, "metric"])
+    query = (
+        f"SELECT {groups}, SUM(total) / SUM(count) AS value "
+        "FROM aggregates WHERE benchmark = ?"
+    )
+    parameters = [benchmark_name]
+    if metrics is not None:
+        query += f" AND metric IN ({', '.join('?' * len(metrics))})"
+        parameters.extend(metrics)
+    if since is not None:
+        query += " AND day >= ?"
+        parameters.append(since)
+    query += f" GROUP BY {groups}"
+
+    with connect(path) as connection:
+        long_df = pd.read_sql_query(query, connection, params=parameters)
+    connection.close()
+
+    columns = ["date", *by]
+    if long_df.empty:
+        return pd.DataFrame(columns=columns + list(metrics or []))
+    wide = long_df.pivot(
+        index=["day", *by], columns="metric", values="value"
+    ).reset_index()
+    wide.columns.name = None
+    return (
+        wide.rename(columns={"day": "date"})
+        .replace({column: {"": None} for column in by})
+        .sort_values(columns, ignore_index=True)
+    )
+
+
+def load_first_seen(path, benchmark_name):
+    """Loads the day each compiler version was first seen in a benchmark.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        benchmark_name (str): Name of the benchmark, e.g. "gates".
+
+    Returns:
+        pd.DataFrame: The ``compiler``, ``compiler_version`` and ``date`` as
+        "%Y-%m-%d" of each compiler version.
+    """
+    with connect(path) as connection:
+        df = pd.read_sql_query(
+            "SELECT compiler, compiler_version, day AS date FROM first_seen "
+            "WHERE benchmark = ? ORDER BY day, compiler",
+            connection,
+            params=[benchmark_name],
+        )
+    connection.close()
+    return df.replace({"compiler": {"": None}, "compiler_version": {"": None}})
+
+
+def rebuild_aggregates(path):
+    """Recomputes the aggregates from all the results in the store.
+
+    Args:
+        path (str): Path of the SQLite database file.
+    """
+    with connect(path) as connection:
+        benchmarks = [
+            benchmark
+            for (benchmark,) in connection.execute(
+                "SELECT DISTINCT benchmark FROM runs"
+            )
+        ]
+    connection.close()
+
+    aggregated = {}
+    for benchmark_name in benchmarks:
+        df = load_results(path, benchmark_name).drop(
+            columns=["run_id", "os", "architecture", "cpu_count"]
+        )
+        aggregated[benchmark_name] = [
+            (date, group.drop(columns="date").to_dict("records"))
+            for date, group in df.groupby("date")
+        ]
+
+    with connect(path) as connection:
+        connection.execute("DELETE FROM aggregates")
+        connection.execute("DELETE FROM first_seen")
+        for benchmark_name, runs in aggregated.items():
+            for date, records in runs:
+                _update_aggregates(connection, benchmark_name, date, records)
+    connection.close()
+
+
+def _fingerprint(path, benchmark_names):
+    # Hash of the aggregates of each benchmark, which change whenever new
+    # results arrive. They are the same whether the runs were appended as
+    # they ran or imported from their CSV files, unlike the run ids and
+    # dates, up to the rounding of the totals.
+    with connect(path) as connection:
+        aggregates = {
+            benchmark_name: [
+                [*key, count, f"{total:.9g}"]
+                for *key, count, total in connection.execute(
+                    "SELECT day, compiler, compiler_version, metric, count, "
+                    "total FROM aggregates WHERE benchmark = ? ORDER BY day, "
+                    "compiler, compiler_version, metric",
+                    (benchmark_name,),
+                )
+            ]
+            for benchmark_name in sorted(benchmark_names)
+        }
+    connection.close()
+    return hashlib.sha256(json.dumps(aggregates).encode()).hexdigest()
+
+
+def _fingerprint_file(output_file):
+    return f"{output_file}.fingerprint"
+
+
+def output_is_current(path, output_file, benchmark_names):
+    """Checks whether an output, e.g. a plot, was made from the current
+    results of the benchmarks it shows.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        output_file (str): Path of the output file.
+        benchmark_names (list[str]): Names of the benchmarks it shows.
+
+    Returns:
+        bool: Whether the file exists and no results were added since
+        ``mark_output_current`` was last called for it.
+    """
+    fingerprint_file = _fingerprint_file(output_file)
+    if not (os.path.exists(output_file) and os.path.exists(fingerprint_file)):
+        return False
+    with open(fingerprint_file, "r") as file:
+        stored = file.read().strip()
+    return stored == _fingerprint(path, benchmark_names)
+
+
+def mark_output_current(path, output_file, benchmark_names):
+    """Records that an output was made from the current results of the
+    benchmarks it shows, in ``<output_file>.fingerprint``.
+
+    The fingerprint file is committed with the output, so that the check
+    also works where the store is rebuilt from the CSV files, as in CI.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        output_file (str): Path of the output file.
+        benchmark_names (list[str]): Names of the benchmarks it shows.
+    """
+    with open(_fingerprint_file(output_file), "w") as file:
+        file.write(_fingerprint(path, benchmark_names) + "\n")
+
+
+def _parse_csv_name(file_name):
+    # File names are the benchmark name, which may contain underscores, then
+    # the date as %Y-%m-%d, %Y-%m-%d_%H or %Y-%m-%d_%H-%M-%S
+    stem = os.path.splitext(file_name)[0]
+    date = re.search(
+        r"(\d{4}-\d{2}-\d{2})(?:_(\d{2})(?:-(\d{2})-(\d{2}))?)?$", stem
+    )
+    day, hour, minute, second = date.groups(default="00")
+    benchmark_name = stem[: date.start()].rstrip("_")
+    return benchmark_name, datetime.fromisoformat(
+        f"{day} {hour}:{minute}:{second}"
+    )
+
+
+def import_csv(path, csv_file):
+    """Imports a results CSV file written by ``save_results``.
+
+    Args:
+        path (str): Path of the SQLite database file.
+        csv_file (str): The CSV file, named ``<benchmark>_<date>.csv``.
+
+    Returns:
+        int: The id of the new run, or None if the file was already
+        imported.
+    """
+    file_name = os.path.basename(csv_file)
+    benchmark_name, date = _parse_csv_name(file_name)
+    with connect(path) as connection:
+        imported = connection.execute(
+            "SELECT 1 FROM runs WHERE source = ?", (file_name,)
+        ).fetchone()
+    connection.close()
+    if imported:
+        return None
+
+    with open(csv_file, "r") as file:
+        header = file.readline()
+    machine = MACHINE_PATTERN.search(header)
+    machine = machine.groupdict() if machine else {}
+    if "cpu_count" in machine:
+        machine["cpu_count"] = int(machine["cpu_count"])
+
+    return append_results(
+        path,
+        pd.read_csv(csv_file, header=1),
+        benchmark_name=benchmark_name,
+        date=date,
+        # Development versions are cut at the first letter, so scrub the
+        # period left at the end
+        versions={
+            package: version.rstrip(".")
+            for package, version in VERSION_PATTERN.findall(
+                header.split(" # ")[0]
+            )
+        },
+        machine=machine,
+        source=file_name,
+    )
+
+
+def import_csv_folder(folder, path=None):
+    """Imports all the results CSV files of a folder.
+
+    Args:
+        folder (str): The results folder.
+        path (str): (optional) Path of the SQLite database file. Default is
+            ``results.db`` in ``folder``.
+
+    Returns:
+        list[str]: The names of the files imported.
+    """
+    path = path or os.path.join(folder, DB_NAME)
+    imported = []
+    for csv_file in sorted(glob.glob(os.path.join(folder, "*_*.csv"))):
+        if import_csv(path, csv_file) is not None:
+            imported.append(os.path.basename(csv_file))
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark results store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser(
+        "import", help="Import the results CSV files of a folder."
+    )
+    import_parser.add_argument(
+        "results_folder",
+        nargs="?",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "../results"
+        ),
+        help="Folder with the CSV files.",
+    )
+    import_parser.add_argument(
+        "--db", help=f"Database file (default: {DB_NAME} in the folder)."
+    )
+    aggregate_parser = subparsers.add_parser(
+        "aggregate", help="Rebuild the aggregates from all the results."
+    )
+    aggregate_parser.add_argument(
+        "results_folder",
+        nargs="?",
+        default=import_parser.get_default("results_folder"),
+        help="Folder with the store.",
+    )
+    aggregate_parser.add_argument(
+        "--db", help=f"Database file (default: {DB_NAME} in the folder)."
+    )
+    args = parser.parse_args()
+
+    if args.command == "import":
+        imported = import_csv_folder(args.results_folder, args.db)
+        print(f"Imported {len(imported)} files")
+    else:
+        rebuild_aggregates(
+            args.db or os.path.join(args.results_folder, DB_NAME)
+        )
+        print("Rebuilt aggregates")
@@ -0,0 +1,304 @@
+# run_benchmarks.py
+"""Runs the compiler and expectation value benchmarks in one process pool.
+
+The QASM corpus is read once, and each (QASM file, compiler) pair is run by
+a pool of ``--parallel`` long-lived worker processes, so the interpreter
+startup and imports are paid once per worker rather than once per
+measurement. Each worker is pinned to its own core where the platform
+allows it, limited to one thread, and compiles a small circuit with every
+compiler before its first measurement, so that the recorded compile times
+do not include one-off initialization or contention between jobs.
+
+The compile time benchmarks all run before the expectation value ones, and
+the results of each are saved in one pass. For the expectation values, the
+workers only compile the circuits, and the noisy simulations of the
+compiled versions of each circuit run together in one multi-threaded job.
+
+Usage:
+    python run_benchmarks.py [<results_folder>] [--parallel 4] [--no-pin]
+"""
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from common import (
+    get_compile_function,
+    get_native_rep,
+    log_performance,
+    measure_memory,
+    save_results,
+)
+from expval_benchmark import (
+    IDEAL_CACHE_NAME,
+    cache_ideal,
+    fetch_pre_post_compiled_circuits,
+    get_expval_results,
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+QASM_FOLDER = os.path.join(SCRIPT_DIR, "../qasm_circuits/qasm2/")
+
+QASM_FILES = [
+    "benchpress/qaoa_barabasi_albert_N100_3reps_basis_rz_rx_ry_cx.qasm",
+    "benchpress/qv_N100_12345_basis_rz_rx_ry_cx.qasm",
+    "benchpress/qft_N100_basis_rz_rx_ry_cx.qasm",
+    "benchpress/square_heisenberg_N100_basis_rz_rx_ry_cx.qasm",
+    "ucc/prep_select_N25_ghz_basis_rz_rx_ry_h_cx.qasm",
+    "ucc/qcnn_N100_7layers_basis_rz_rx_ry_h_cx.qasm",
+]
+
+QASM_EXPVAL_FILES = [
+    "benchpress/qaoa_barabasi_albert_N10_3reps_basis_rz_rx_ry_cx.qasm",
+    "benchpress/qv_N010_12345_basis_rz_rx_ry_cx.qasm",
+    "benchpress/qft_N010_basis_rz_rx_ry_cx.qasm",
+    "benchpress/square_heisenberg_N9_basis_rz_rx_ry_cx.qasm",
+    "ucc/prep_select_N10_ghz_basis_rz_rx_ry_h_cx.qasm",
+    "ucc/qcnn_N10_4layers_basis_rz_rx_ry_h_cx.qasm",
+]
+
+COMPILERS = ["ucc", "qiskit", "pytket-peep", "cirq"]
+
+# Limits on the threads of the numerical libraries in the workers, unless
+# already set. They are read when the libraries are imported, which happens
+# before the worker initializer runs.
+WORKER_ENVIRONMENT = {"OMP_NUM_THREADS": "1", "RAYON_NUM_THREADS": "1"}
+
+WARM_UP_QASM = """OPENQASM 2.0;
+include "qelib1.inc";
+qreg q[2];
+h q[0];
+cx q[0],q[1];
+rz(0.5) q[1];
+"""
+
+
+def _init_worker(compilers, cores, worker_count):
+    if cores:
+        with worker_count.get_lock():
+            index = worker_count.value
+            worker_count.value += 1
+        os.sched_setaffinity(0, {cores[index % len(cores)]})
+
+    for compiler_alias in compilers:
+        get_compile_function(compiler_alias)(
+            get_native_rep(WARM_UP_QASM, compiler_alias)
+        )
+
+
+@contextlib.contextmanager
+def _worker_environment():
+    # Sets the variables of WORKER_ENVIRONMENT that aren't set yet, and
+    # removes them again on exit
+    added = [name for name in WORKER_ENVIRONMENT if name not in os.environ]
+    os.environ.update({name: WORKER_ENVIRONMENT[name] for name in added})
+    try:
+        yield
+    finally:
+        for name in added:
+            os.environ.pop(name, None)
+
+
+def _run_compile_benchmark(
+    qasm_string, circuit_name, compiler_alias, repeats, memory
+):
+    native_circuit = get_native_rep(qasm_string, compiler_alias)
+    compile_function = get_compile_function(compiler_alias)
+    # Measured first, in a forked child, so that the timed compilations of
+    # this circuit leave nothing behind in it
+    memory_entry = (
+        measure_memory(compile_function, native_circuit) if memory else {}
+    )
+    log_entry = log_performance(
+        compile_function,
+        native_circuit,
+        compiler_alias,
+        circuit_name,
+        repeats=repeats,
+    )
+    log_entry.update(memory_entry)
+    return log_entry
+
+
+def _circuit_name(qasm_file):
+    return os.path.basename(qasm_file).split("_N")[0]
+
+
+def run_benchmarks(
+    results_folder,
+    parallel=4,
+    pin=True,
+    compilers=COMPILERS,
+    qasm_files=None,
+    expval_files=None,
+    repeats=5,
+    memory=True,
+):
+    """Runs the benchmarks and saves their results.
+
+    Args:
+        results_folder (str): Folder to save the results to.
+        parallel (int): Number of worker processes.
+        pin (bool): Whether to pin each worker to a core (Linux only).
+        compilers (list[str]): Compiler aliases to benchmark.
+        qasm_files (list[str]): QASM files for the compile time benchmarks
+            (``QASM_FILES`` by default).
+        expval_files (list[str]): QASM files for the expectation value
+            benchmarks (``QASM_EXPVAL_FILES`` by default).
+        repeats (int): Number of timed compilations of each circuit after
+            the first (cold) one.
+        memory (bool): Whether to also measure the peak memory of each
+            compilation, in a child forked from its worker (see
+            ``common.measure_memory``).
+
+    Returns:
+        tuple[list[dict], list[dict]]: The compile time and expectation value
+        results.
+    """
+    if qasm_files is None:
+        qasm_files = [QASM_FOLDER + qasm_file for qasm_file in QASM_FILES]
+    if expval_files is None:
+        expval_files = [
+            QASM_FOLDER + qasm_file for qasm_file in QASM_EXPVAL_FILES
+        ]
+
+    corpus = {}
+    for qasm_file in qasm_files:
+        with open(qasm_file, "r") as file:
+            corpus[qasm_file] = file.read()
+
+    cores = []
+    if pin and hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=parallel,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(compilers, cores, context.Value("i", 0)),
+    ) as executor:
+        # Workers are started fresh, and inherit the thread limits, only as
+        # they are needed, so start them all before restoring the
+        # environment of this process, whose simulations use all the cores
+        with _worker_environment():
+            started = [executor.submit(os.getpid) for _ in range(parallel)]
+            for future in started:
+                future.result()
+        compile_futures = [
+            executor.submit(
+                _run_compile_benchmark,
+                qasm_string,
+                _circuit_name(qasm_file),
+                compiler_alias,
+                repeats,
+                memory,
+            )
+            for qasm_file, qasm_string in corpus.items()
+            for compiler_alias in compilers
+        ]
+        # Wait for the timing benchmarks before starting the expectation
+        # value ones, which would otherwise compete for the cores
+        compile_results = [future.result() for future in compile_futures]
+        save_results(
+            compile_results,
+            benchmark_name="gates",
+            folder=results_folder,
+            append=True,
+        )
+
+        # Simulate the ideal values of each circuit once, for all
+        # compilers, and compile it with each compiler in the workers
+        cache_path = os.path.join(results_folder, IDEAL_CACHE_NAME)
+        ideal_futures = {
+            qasm_file: executor.submit(cache_ideal, qasm_file, cache_path)
+            for qasm_file in expval_files
+        }
+        circuit_futures = {
+            (qasm_file, compiler_alias): executor.submit(
+                fetch_pre_post_compiled_circuits, qasm_file, compiler_alias
+            )
+            for qasm_file in expval_files
+            for compiler_alias in compilers
+        }
+
+        # The noisy simulations of the compiled versions of a circuit run
+        # in this process, which isn't pinned, in one job that uses all
+        # the cores while the workers compile the next circuits
+        expval_results = []
+        for qasm_file in expval_files:
+            ideal_futures[qasm_file].result()
+            compiled_circuits = {}
+            for compiler_alias in compilers:
+                uncompiled, compiled_circuits[compiler_alias] = (
+                    circuit_futures[(qasm_file, compiler_alias)].result()
+                )
+            expval_results.extend(
+                get_expval_results(
+                    qasm_file,
+                    uncompiled,
+                    compiled_circuits,
+                    cache_path=cache_path,
+                )
+            )
+        save_results(
+            expval_results,
+            benchmark_name="expval",
+            folder=results_folder,
+            append=True,
+        )
+
+    return compile_results, expval_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the compiler benchmarks in a pool of processes."
+    )
+    parser.add_argument(
+        "results_folder",
+        type=str,
+        nargs="?",
+        default=os.path.join(SCRIPT_DIR, "../results"),
+        help="Folder to save results.",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=4,
+        help="Number of worker processes.",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Number of timed runs after the first (cold) one.",
+    )
+    parser.add_argument(
+        "--skip-memory",
+        action="store_true",
+        help="Do not measure the peak memory of the compilations.",
+    )
+    parser.add_argument(
+        "--no-pin",
+        action="store_true",
+        help="Do not pin each worker process to a core.",
+    )
+    parser.add_argument(
+        "--compilers",
+        nargs="+",
+        default=COMPILERS,
+        help="Compiler aliases to benchmark.",
+    )
+    args = parser.parse_args()
+
+    run_benchmarks(
+        args.results_folder,
+        parallel=args.parallel,
+        pin=not args.no_pin,
+        compilers=args.compilers,
+        repeats=args.repeats,
+        memory=not args.skip_memory,
+    )
@@ -0,0 +1,186 @@
+# scaling_benchmark.py
+"""Measures how compile time grows with the size of the circuits.
+
+Circuits of each family in ``qiskit_circuits`` and ``cirq_circuits`` are
+generated for a range of qubit counts (at a fixed number of layers) and,
+for the families with layers, for a range of layer counts (at a fixed
+number of qubits). They are decomposed into the benchmark basis and
+compiled by each compiler, as in ``benchmark_script.py``. Each compiler
+stops growing a sweep once one of its compilations takes longer than
+``--max-time`` seconds.
+
+The empirical complexity exponent ``k`` of ``compile_time ~ num_gates**k``
+is fitted for each family, sweep and compiler, and saved alongside the
+results. Plot them with ``plot_scaling_benchmarks.py``.
+
+Usage:
+    python scaling_benchmark.py <results_folder> [--families qcnn qft ...]
+        [--compilers ucc qiskit ...] [--qubits 4 8 16 32 64]
+        [--depths 2 4 8 16 32] [--repeats 3] [--max-time 60]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from qbraid.transpiler import transpile as translate
+from qiskit import qasm2
+from qiskit import transpile as qiskit_transpile
+
+from common import (
+    fit_scaling_exponents,
+    get_compile_function,
+    get_native_rep,
+    log_performance,
+    save_results,
+)
+from cirq_circuits.circuits import cirq_prep_select, cirq_QFT, cirq_QV
+from qiskit_circuits.circuits import (
+    dtc_unitary,
+    qaoa_ising_ansatz,
+    qcnn_circuit,
+    VQE_ansatz,
+)
+
+BASIS_GATES = ["rz", "rx", "ry", "h", "cx"]
+
+# Generators taking the number of qubits and of layers. Families whose size
+# only depends on the number of qubits ignore the second argument.
+FAMILIES = {
+    "qcnn": lambda num_qubits, layers: qcnn_circuit(num_qubits),
+    "qv": lambda num_qubits, layers: cirq_QV(num_qubits, layers, seed=12345),
+    "qft": lambda num_qubits, layers: cirq_QFT(num_qubits),
+    "qaoa_ising": qaoa_ising_ansatz,
+    "vqe": VQE_ansatz,
+    "prep_select": lambda num_qubits, layers: cirq_prep_select(
+        num_qubits, "1" * num_qubits
+    ),
+    "dtc": lambda num_qubits, layers: dtc_unitary(num_qubits).repeat(layers),
+}
+LAYERED_FAMILIES = {"qv", "qaoa_ising", "vqe", "dtc"}
+
+
+def generate_qasm(family, num_qubits, layers, seed=12345):
+    """Generates a circuit of ``family`` as OpenQASM 2 in the benchmark
+    basis, with any parameters bound to random angles.
+
+    Returns:
+        A tuple of the QASM string and the number of gates of the circuit.
+    """
+    circuit = translate(FAMILIES[family](num_qubits, layers), "qiskit")
+    if circuit.parameters:
+        rng = np.random.default_rng(seed)
+        circuit = circuit.assign_parameters(
+            rng.uniform(0, 2 * np.pi, circuit.num_parameters)
+        )
+    circuit = qiskit_transpile(
+        circuit, basis_gates=BASIS_GATES, optimization_level=0
+    )
+    return qasm2.dumps(circuit), circuit.size()
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark how compile time scales with circuit size."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument(
+    "--families",
+    nargs="+",
+    choices=list(FAMILIES),
+    default=list(FAMILIES),
+    help="Circuit families to sweep.",
+)
+parser.add_argument(
+    "--compilers",
+    nargs="+",
+    default=["ucc", "qiskit", "pytket-peep", "cirq"],
+    help="Compiler aliases to benchmark.",
+)
+parser.add_argument(
+    "--qubits",
+    type=int,
+    nargs="+",
+    default=[4, 8, 16, 32, 64],
+    help="Qubit counts of the width sweep.",
+)
+parser.add_argument(
+    "--layers",
+    type=int,
+    default=8,
+    help="Number of layers in the width sweep.",
+)
+parser.add_argument(
+    "--depths",
+    type=int,
+    nargs="+",
+    default=[2, 4, 8, 16, 32],
+    help="Layer counts of the depth sweep.",
+)
+parser.add_argument(
+    "--depth-qubits",
+    type=int,
+    default=16,
+    help="Number of qubits in the depth sweep.",
+)
+parser.add_argument(
+    "--repeats",
+    type=int,
+    default=3,
+    help="Number of timed runs after the first (cold) one.",
+)
+parser.add_argument(
+    "--max-time",
+    type=float,
+    default=60,
+    help="Skip larger circuits for a compiler once a compilation takes "
+    "longer than this many seconds.",
+)
+args = parser.parse_args()
+
+sweeps = []
+for family in args.families:
+    sweeps.append((family, "qubits", [(n, args.layers) for n in args.qubits]))
+    if family in LAYERED_FAMILIES:
+        sweeps.append(
+            (family, "depth", [(args.depth_qubits, d) for d in args.depths])
+        )
+
+results_log = []
+for family, sweep, sizes in sweeps:
+    too_slow = set()
+    for num_qubits, layers in sizes:
+        qasm_string, num_gates = generate_qasm(family, num_qubits, layers)
+        for compiler_alias in args.compilers:
+            if compiler_alias in too_slow:
+                continue
+            print(
+                f"Compiling {family} ({num_qubits} qubits, {layers} layers, "
+                f"{num_gates} gates) using {compiler_alias}"
+            )
+            log_entry = {
+                "family": family,
+                "sweep": sweep,
+                "num_qubits": num_qubits,
+                "layers": layers if family in LAYERED_FAMILIES else None,
+                "num_gates": num_gates,
+            }
+            log_entry.update(
+                log_performance(
+                    get_compile_function(compiler_alias),
+                    get_native_rep(qasm_string, compiler_alias),
+                    compiler_alias,
+                    family,
+                    repeats=args.repeats,
+                )
+            )
+            results_log.append(log_entry)
+            if log_entry["compile_time_cold"] > args.max_time:
+                too_slow.add(compiler_alias)
+
+fits = fit_scaling_exponents(
+    pd.DataFrame(results_log), by=("family", "sweep", "compiler")
+)
+print(fits.to_string(index=False))
+
+save_results(results_log, benchmark_name="scaling", folder=args.results_folder)
+save_results(fits, benchmark_name="scaling_fits", folder=args.results_folder)
@@ -0,0 +1,138 @@
+# streaming_benchmark.py
+"""Measures the compile time and peak Python memory of streaming compilation
+(``ucc.streaming.compile_qasm_stream``) on increasingly deep circuits, made
+by repeating the gates of a QASM file. With ``--compare-full`` the whole
+circuit is also compiled at once with ``ucc.compile`` for comparison.
+
+Usage:
+    python streaming_benchmark.py <results_folder> <qasm_file> [...]
+        [--repeats 10 100 1000] [--window-size 5000] [--compare-full]
+"""
+
+import argparse
+import os
+import tracemalloc
+from time import perf_counter
+
+from qiskit import qasm2
+
+from common import save_results
+from ucc import compile as ucc_compile
+from ucc.streaming import compile_qasm_stream
+
+
+_HEADER = ("OPENQASM", "include", "qreg", "creg")
+
+
+class _CountingSink:
+    """Discards the output, counting the gate statements written."""
+
+    def __init__(self):
+        self.gates = 0
+
+    def write(self, text):
+        self.gates += sum(
+            1
+            for line in text.splitlines()
+            if line.strip() and not line.startswith(_HEADER)
+        )
+
+
+def _repeated_program(lines, repeats):
+    # The header once, then the gate lines ``repeats`` times, without
+    # building the whole program
+    body_start = next(
+        i
+        for i, line in enumerate(lines)
+        if line.strip() and not line.startswith(_HEADER)
+    )
+    yield from lines[:body_start]
+    for _ in range(repeats):
+        yield from lines[body_start:]
+
+
+def _measure(function):
+    # tracemalloc slows down allocations, so the time comes from a separate
+    # untraced run
+    t1 = perf_counter()
+    result = function()
+    t2 = perf_counter()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, t2 - t1, peak
+
+
+parser = argparse.ArgumentParser(
+    description="Benchmark streaming compilation of deep circuits."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument("qasm_files", nargs="+", help="Paths to the QASM files.")
+parser.add_argument(
+    "--repeats",
+    type=int,
+    nargs="+",
+    default=[10, 100, 1000],
+    help="Number of times the gates of each file are repeated.",
+)
+parser.add_argument(
+    "--window-size",
+    type=int,
+    default=5000,
+    help="Number of gates optimized per window.",
+)
+parser.add_argument(
+    "--compare-full",
+    action="store_true",
+    help="Also compile each whole circuit at once.",
+)
+args = parser.parse_args()
+
+results_log = []
+for qasm_file in args.qasm_files:
+    with open(qasm_file, "r") as file:
+        circuit_name = os.path.basename(qasm_file).split("_N")[0]
+        lines = file.read().splitlines(keepends=True)
+
+    for repeats in args.repeats:
+        modes = ["stream", "full"] if args.compare_full else ["stream"]
+        for mode in modes:
+            if mode == "stream":
+
+                def compile_stream():
+                    sink = _CountingSink()
+                    compile_qasm_stream(
+                        _repeated_program(lines, repeats),
+                        sink,
+                        window_size=args.window_size,
+                    )
+                    return sink.gates
+
+                output_gates, compile_time, peak = _measure(compile_stream)
+            else:
+                circuit = qasm2.loads(
+                    "".join(_repeated_program(lines, repeats)),
+                    custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS,
+                )
+                compiled, compile_time, peak = _measure(
+                    lambda: ucc_compile(circuit)
+                )
+                output_gates = len(compiled.data)
+
+            log_entry = {
+                "compiler": "ucc",
+                "circuit_name": circuit_name,
+                "repeats": repeats,
+                "mode": mode,
+                "compile_time": compile_time,
+                "peak_memory_mb": peak / 2**20,
+                "compiled_gates": output_gates,
+            }
+            [print(f"{key}: {value}") for key, value in log_entry.items()]
+            print("\n")
+            results_log.append(log_entry)
+
+save_results(
+    results_log, benchmark_name="streaming", folder=args.results_folder
+)
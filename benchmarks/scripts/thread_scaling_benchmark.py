@@ -0,0 +1,84 @@
+# thread_scaling_benchmark.py
+"""Measures how ucc compile throughput scales with the number of threads.
+
+Each QASM file is compiled ``--copies`` times by a thread pool of increasing
+size. On a free-threaded (no-GIL) CPython build, e.g. ``python3.13t``, the
+compilations run in parallel; on a regular build the numbers show how much
+the GIL limits threaded compilation.
+
+Usage:
+    python thread_scaling_benchmark.py <results_folder> <qasm_file> [...]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from common import save_results, get_native_rep
+from ucc import compile as ucc_compile
+
+parser = argparse.ArgumentParser(
+    description="Thread scaling benchmark for ucc.compile."
+)
+parser.add_argument("results_folder", type=str, help="Folder to save results.")
+parser.add_argument("qasm_files", nargs="+", help="Paths to the QASM files.")
+parser.add_argument(
+    "--threads",
+    type=int,
+    nargs="+",
+    default=[1, 2, 4, 8],
+    help="Thread counts to measure.",
+)
+parser.add_argument(
+    "--copies",
+    type=int,
+    default=8,
+    help="Number of times each circuit is compiled per thread count.",
+)
+
+args = parser.parse_args()
+
+# sys._is_gil_enabled only exists on Python 3.13+
+gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+print(f"GIL enabled: {gil_enabled}, CPU cores: {os.cpu_count()}")
+
+circuits = []
+for qasm_file in args.qasm_files:
+    with open(qasm_file, "r") as file:
+        circuit_name = qasm_file.split("/")[-1].split("_N")[0]
+        circuits.append((circuit_name, get_native_rep(file.read(), "ucc")))
+
+# Warm up caches shared by all threads so they don't count towards the first
+# measurement
+for _, circuit in circuits:
+    ucc_compile(circuit)
+
+results_log = []
+for circuit_name, circuit in circuits:
+    baseline = None
+    for num_threads in args.threads:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            t1 = perf_counter()
+            list(executor.map(ucc_compile, [circuit] * args.copies))
+            t2 = perf_counter()
+
+        wall_time = t2 - t1
+        if baseline is None:
+            baseline = wall_time
+        log_entry = {
+            "compiler": "ucc",
+            "circuit_name": circuit_name,
+            "num_threads": num_threads,
+            "num_compiles": args.copies,
+            "wall_time": wall_time,
+            "compiles_per_second": args.copies / wall_time,
+            "speedup": baseline / wall_time,
+            "gil_enabled": gil_enabled,
+        }
+        [print(f"{key}: {value}") for key, value in log_entry.items()]
+        print("\n")
+        results_log.append(log_entry)
+
+save_results(results_log, benchmark_name="threads", folder=args.results_folder)
@@ -2,6 +2,7 @@ import os
 
 from qbraid.transpiler import transpile as translate
 from qiskit import transpile as qiskit_transpile
+from ucc.emit import write_circuit
 
 
 def write_qasm(
@@ -19,9 +20,6 @@ def write_qasm(
     else:
         decomp_circuit = qiskit_circuit
 
-    # Generate QASM string
-    qasm_string = translate(decomp_circuit, "qasm" + version)
-
     # Get the absolute path of the current script
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -37,5 +35,6 @@ def write_qasm(
 
     os.makedirs(os.path.dirname(filename), exist_ok=True)
 
+    # Write the QASM program without building it as one string
     with open(filename + ".qasm", "w") as file:
-        file.write(qasm_string)
+        write_circuit(decomp_circuit, file, "qasm" + version)
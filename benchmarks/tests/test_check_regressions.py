@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.scripts.check_regressions import (
+    format_report,
+    get_verdict,
+    robust_z_score,
+    sign_test_p_value,
+)
+
+
+def make_results(new_times, new_gates, circuits=10, runs=8, seed=0):
+    """Results of previous runs with noisy compile times, followed by a run
+    with the compile times and gate counts of each circuit scaled."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for run_id in range(runs + 1):
+        new = run_id == runs
+        for circuit in range(circuits):
+            rows.append(
+                {
+                    "run_id": run_id,
+                    "date": f"2025-01-{run_id + 1:02d} 00:00:00",
+                    "compiler": "ucc",
+                    "compiler_version": "0.4.4",
+                    "circuit_name": f"circuit_{circuit}",
+                    "os": "Linux",
+                    "architecture": "64bit",
+                    "cpu_count": 8,
+                    "compile_time": (new_times[circuit] if new else 1.0)
+                    * rng.normal(1, 0.01),
+                    "compiled_multiq_gates": 100
+                    + (new_gates[circuit] if new else 0),
+                }
+            )
+    # A run on another machine isn't part of the history
+    rows.append({**rows[0], "run_id": runs + 1, "cpu_count": 2})
+    return pd.DataFrame(rows)
+
+
+def test_robust_z_score_and_sign_test():
+    assert robust_z_score(1.0, [1.0, 1.0]) == 0
+    assert robust_z_score(2.0, [1.0, 1.0]) == np.inf
+    assert robust_z_score(3.0, [0.0, 1.0, 2.0]) == pytest.approx(1.349)
+    assert sign_test_p_value(10, 10) == 1 / 1024
+    assert sign_test_p_value(0, 10) == 1
+
+
+def test_get_verdict():
+    df = make_results([1.0] * 10, [0] * 10)
+    verdict = get_verdict(df, run_id=8)
+    assert verdict["status"] == "pass"
+    assert {check["status"] for check in verdict["checks"]} == {"ok"}
+    assert verdict["checks"][0]["history"] == 8
+
+    df = make_results([1.5] + [1.0] * 9, [0, 1] + [0] * 8)
+    verdict = get_verdict(df, run_id=8)
+    assert verdict["status"] == "fail"
+    regressions = [
+        (check["circuit_name"], check["metric"])
+        for check in verdict["checks"]
+        if check["status"] == "regression"
+    ]
+    assert regressions == [
+        ("circuit_0", "compile_time"),
+        ("circuit_1", "compiled_multiq_gates"),
+    ]
+    report = format_report(json.loads(json.dumps(verdict)))
+    assert "ucc on circuit_0, compile_time" in report
+
+
+def test_get_verdict_compares_compile_times_measured_the_same_way():
+    # The first runs timed a single cold compilation, which took longer
+    df = make_results([1.0] * 10, [0] * 10)
+    df["repeats"] = np.where(df["run_id"] < 4, np.nan, 5)
+    df.loc[df["run_id"] < 4, "compile_time"] *= 3
+    verdict = get_verdict(df, run_id=8)
+    assert verdict["status"] == "pass"
+    histories = {
+        check["metric"]: check["history"] for check in verdict["checks"]
+    }
+    assert histories == {"compile_time": 4, "compiled_multiq_gates": 8}
+
+    # A run timed the old way is compared to the old runs only
+    verdict = get_verdict(df[df["run_id"] != 8], run_id=3, min_history=3)
+    assert all(
+        check["status"] == "ok"
+        for check in verdict["checks"]
+        if check["metric"] == "compile_time"
+    )
+
+
+def test_get_verdict_detects_small_consistent_slowdowns():
+    df = make_results([1.15] * 10, [0] * 10)
+    verdict = get_verdict(df, run_id=8, min_history=3)
+    assert all(check["status"] != "regression" for check in verdict["checks"])
+    (summary,) = [
+        summary
+        for summary in verdict["summaries"]
+        if summary["metric"] == "compile_time"
+    ]
+    assert summary["worse"] == 10
+    assert summary["status"] == "regression"
+    assert verdict["status"] == "fail"
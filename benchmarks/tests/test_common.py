@@ -1,6 +1,22 @@
+import gc
+import json
+import sys
+
 import cirq
-from benchmarks.scripts.common import BenchmarkTargetGateset
-from benchmarks.scripts import random_clifford_circuit
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+from benchmarks.scripts.common import (
+    BenchmarkTargetGateset,
+    annotate_and_adjust,
+    fit_scaling_exponents,
+    log_performance,
+    measure_memory,
+    summarize_times,
+    time_function,
+)
+from benchmarks.scripts import common, random_clifford_circuit
 from qbraid.transpiler import transpile
 
 
@@ -53,3 +69,118 @@ def test_benchmark_target_gateset_random_clifford():
     assert expected_gates.validate(c_new), (
         "Cirq compilation had unsupported gatges"
     )
+
+
+def test_time_function():
+    calls = []
+
+    def function(argument):
+        calls.append(gc.isenabled())
+        return argument + 1
+
+    gc_enabled = gc.isenabled()
+    result, timings = time_function(function, 1, repeats=4)
+    assert result == 2
+    assert calls == [False] * 5
+    assert gc.isenabled() == gc_enabled
+    assert len(timings["wall"]) == len(timings["cpu"]) == 4
+    assert timings["cold"] >= 0
+
+    calls.clear()
+    time_function(function, 1, repeats=2, disable_gc=False)
+    assert calls == [gc_enabled] * 3
+
+    assert summarize_times([4, 1, 3, 2, 5]) == {
+        "median": 3,
+        "iqr": 2,
+        "min": 1,
+    }
+
+    with pytest.raises(ValueError, match="repeats"):
+        time_function(function, 1, repeats=0)
+    with pytest.raises(ValueError, match="empty"):
+        summarize_times([])
+
+
+def test_log_performance_records_distribution():
+    circuit = random_clifford_circuit(4, 1)
+    log_entry = log_performance(
+        lambda circuit: circuit, circuit, "qiskit", "clifford", repeats=3
+    )
+    compile_times = json.loads(log_entry["compile_times"])
+    assert len(compile_times) == len(json.loads(log_entry["cpu_times"])) == 3
+    assert log_entry["compile_time_min"] == min(compile_times)
+    assert log_entry["compile_time_min"] <= log_entry["compile_time"]
+    assert log_entry["repeats"] == 3
+    assert log_entry["compiled_multiq_gates"] == log_entry["raw_multiq_gates"]
+
+
+def test_measure_memory():
+    def allocate(size):
+        return len(bytearray(size * 2**20))
+
+    memory = measure_memory(allocate, 64)
+    assert memory["tracemalloc_peak_mb"] >= 64
+    assert memory["peak_rss_mb"] >= 64
+    # The peak is reset before each measurement where the platform allows it
+    if sys.platform == "linux":
+        assert measure_memory(allocate, 1)["compile_rss_mb"] < 32
+
+    with pytest.raises(ValueError):
+        measure_memory(allocate, -1)
+
+
+def test_measure_memory_without_peak_reset(monkeypatch):
+    monkeypatch.setattr(common, "_reset_peak_rss", lambda: False)
+    memory = measure_memory(len, "circuit")
+    # Not the peak of the process so far
+    assert memory["peak_rss_mb"] is None
+    assert memory["compile_rss_mb"] is None
+    assert memory["tracemalloc_peak_mb"] >= 0
+
+
+def test_fit_scaling_exponents():
+    sizes = [10, 100, 1000]
+    df = pd.DataFrame(
+        [
+            {"compiler": "linear", "num_gates": n, "compile_time": 2e-3 * n}
+            for n in sizes
+        ]
+        + [
+            {"compiler": "quadratic", "num_gates": n, "compile_time": n**2}
+            for n in sizes
+        ]
+        + [{"compiler": "single", "num_gates": 10, "compile_time": 1.0}]
+    )
+    fits = fit_scaling_exponents(df).set_index("compiler")
+    assert list(fits.index) == ["linear", "quadratic"]
+    assert fits.loc["linear", "exponent"] == pytest.approx(1)
+    assert fits.loc["linear", "coefficient"] == pytest.approx(2e-3)
+    assert fits.loc["quadratic", "exponent"] == pytest.approx(2)
+    assert fits.loc["quadratic", "points"] == 3
+
+
+def test_annotate_and_adjust_boxes_match_drawn_annotations():
+    matplotlib.use("Agg")
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [1, 100])
+    ax.set_yscale("log")
+    previous_bboxes = []
+    for text, xy in [("0.1.0", (0.2, 2)), ("0.2.0", (0.2, 2.5))]:
+        annotate_and_adjust(
+            ax, text, xy, "red", previous_bboxes, max_attempts=3
+        )
+    first, second = ax.texts
+    assert first.xyann == (0, 15)
+    # The second label overlaps the first, so it is moved up
+    assert second.xyann == (0, 30)
+
+    # The boxes found without drawing are those of the drawn annotations
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    for annotation, bbox in zip(ax.texts, previous_bboxes):
+        drawn = annotation.get_tightbbox(renderer).transformed(
+            ax.transData.inverted()
+        )
+        assert drawn.extents == pytest.approx(bbox.extents, rel=1e-4)
+    plt.close(fig)
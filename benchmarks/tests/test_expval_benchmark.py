@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import qiskit
+from benchmarks.scripts import expval_benchmark
+from benchmarks.scripts.common import get_native_rep
+from benchmarks.scripts.expval_benchmark import (
+    cache_ideal,
+    compile_for_simulation,
+    simulate_density_matrices,
+    simulate_expvals,
+)
+
+HEADER = """OPENQASM 2.0;
+include "qelib1.inc";
+qreg q[2];
+"""
+QASM = HEADER + "h q[0];\ncx q[0],q[1];\n"
+
+
+def test_cache_ideal(tmp_path, monkeypatch):
+    qasm_path = tmp_path / "prep_select_N2_test.qasm"
+    qasm_path.write_text(QASM)
+    cache_path = str(tmp_path / "ideal_expvals.json")
+
+    ideal = cache_ideal(str(qasm_path), cache_path)
+    assert ideal["observable"] == "ZZ"
+    assert ideal["ideal_expval"] == pytest.approx(1)
+    with open(cache_path) as f:
+        cache = json.load(f)
+    assert list(cache["prep_select_N2_test.qasm"]["observables"]) == ["ZZ"]
+
+    # Cached values are reused while the file is unchanged
+    def fail(*args):
+        raise AssertionError("Ideal values simulated again")
+
+    monkeypatch.setattr(expval_benchmark, "simulate_ideal", fail)
+    assert cache_ideal(str(qasm_path), cache_path) == ideal
+
+    # and simulated again once it changes
+    monkeypatch.undo()
+    qasm_path.write_text(QASM + "x q[0];\n")
+    ideal = cache_ideal(str(qasm_path), cache_path)
+    assert ideal["ideal_expval"] == pytest.approx(-1)
+
+
+def test_simulate_density_matrices():
+    circuits = [
+        compile_for_simulation(get_native_rep(qasm, compiler), compiler)
+        for qasm, compiler in (
+            (QASM, "qiskit"),
+            (HEADER + "x q[1];\ncz q[1],q[0];\n", "cirq"),
+        )
+    ]
+
+    # Sharing the noise model across circuits doesn't change their results
+    batched = simulate_density_matrices(circuits, max_parallel_threads=2)
+    for circuit, density_matrix in zip(circuits, batched):
+        (expected,) = simulate_density_matrices([circuit])
+        assert density_matrix == expected
+
+
+def test_simulate_expvals_of_permuted_qv_circuit():
+    uncompiled = qiskit.transpile(
+        qiskit.circuit.library.QuantumVolume(4, seed=3),
+        basis_gates=["rz", "sx", "x", "cx"],
+        seed_transpiler=0,
+    )
+    # A compiled circuit whose outputs are in a different qubit order
+    permuted = uncompiled.copy()
+    permuted.swap(0, 3)
+    permuted.swap(1, 2)
+
+    ideal, (compiled_ev,), _ = simulate_expvals(
+        uncompiled, [permuted], "qv", max_parallel_threads=1
+    )
+    assert ideal > 0.7
+    assert compiled_ev == pytest.approx(ideal, abs=0.15)
@@ -0,0 +1,183 @@
+from datetime import datetime
+
+import pandas as pd
+from benchmarks.scripts.common import save_results
+from benchmarks.scripts.results_store import (
+    append_results,
+    import_csv_folder,
+    latest_date,
+    load_aggregates,
+    load_first_seen,
+    load_results,
+    mark_output_current,
+    output_is_current,
+    rebuild_aggregates,
+)
+
+
+def test_append_and_load_results(tmp_path):
+    path = str(tmp_path / "results.db")
+    versions = {"qiskit": "1.4.2", "pytket": "2.0.1"}
+    for day, compile_time in (("2025-01-01", 1.0), ("2025-01-02", 2.0)):
+        append_results(
+            path,
+            [
+                {
+                    "compiler": "qiskit",
+                    "circuit_name": "qft",
+                    "compile_time": compile_time,
+                    "observable": "ZZ",
+                },
+                {
+                    "compiler": "pytket-peep",
+                    "circuit_name": "qv",
+                    "compile_time": 3.0,
+                    "observable": "ZZ",
+                },
+            ],
+            "gates",
+            date=datetime.fromisoformat(day),
+            versions=versions,
+            machine={"os": "Linux", "cpu_count": 4},
+        )
+
+    assert latest_date(path, "gates") == "2025-01-02 00:00:00"
+    assert latest_date(path, "expval") is None
+
+    df = load_results(path, "gates")
+    assert len(df) == 4
+    assert list(df["compile_time"]) == [1.0, 3.0, 2.0, 3.0]
+    assert set(df["observable"]) == {"ZZ"}
+    assert set(df["compiler_version"]) == {"1.4.2", "2.0.1"}
+    assert set(df["cpu_count"]) == {4}
+
+    df = load_results(
+        path,
+        "gates",
+        metrics=["compile_time"],
+        compilers=["qiskit"],
+        since="2025-01-02",
+    )
+    assert list(df["compile_time"]) == [2.0]
+    assert "observable" not in df
+
+
+def test_import_csv_folder(tmp_path):
+    (tmp_path / "gates_2025-03-31_15.csv").write_text(
+        "# Compiler versions: ucc=0.4.0, qiskit=1.4.2 # OS: Linux 6.1, "
+        "Architecture: x86_64, CPU Cores: 8\n"
+        "compiler,circuit_name,compile_time\n"
+        "ucc,qft,0.5\n"
+    )
+    path = str(tmp_path / "results.db")
+
+    assert import_csv_folder(str(tmp_path)) == ["gates_2025-03-31_15.csv"]
+    assert import_csv_folder(str(tmp_path)) == []
+
+    df = load_results(path, "gates")
+    assert df.loc[0, "date"] == "2025-03-31 15:00:00"
+    assert df.loc[0, "compiler_version"] == "0.4.0"
+    assert df.loc[0, "os"] == "Linux"
+    assert df.loc[0, "compile_time"] == 0.5
+
+
+def test_import_csv_with_multi_word_benchmark_name(tmp_path):
+    (tmp_path / "scaling_fits_2026-10-19_10.csv").write_text(
+        "# Compiler versions: ucc=0.4.0\ncompiler,exponent\nucc,1.1\n"
+    )
+    path = str(tmp_path / "results.db")
+    import_csv_folder(str(tmp_path))
+
+    df = load_results(path, "scaling_fits")
+    assert df.loc[0, "date"] == "2026-10-19 10:00:00"
+    assert df.loc[0, "exponent"] == 1.1
+    assert load_results(path, "scaling").empty
+
+
+def test_aggregates(tmp_path):
+    path = str(tmp_path / "results.db")
+    for date, version, compile_times in (
+        ("2025-01-01 10:00:00", "0.1", (1.0, 3.0)),
+        ("2025-01-01 18:00:00", "0.1", (5.0,)),
+        ("2025-01-02 10:00:00", "0.2", (4.0,)),
+    ):
+        append_results(
+            path,
+            [
+                {
+                    "compiler": "ucc",
+                    "circuit_name": "qft",
+                    "compile_time": compile_time,
+                    "raw_multiq_gates": 10,
+                    "compiled_multiq_gates": 5,
+                }
+                for compile_time in compile_times
+            ],
+            "gates",
+            date=datetime.fromisoformat(date),
+            versions={"ucc": version},
+        )
+
+    df = load_aggregates(path, "gates", metrics=["compile_time"])
+    assert list(df["date"]) == ["2025-01-01", "2025-01-02"]
+    assert list(df["compiler_version"]) == ["0.1", "0.2"]
+    assert list(df["compile_time"]) == [3.0, 4.0]
+    assert set(load_aggregates(path, "gates")["compiled_ratio"]) == {0.5}
+
+    first_seen = load_first_seen(path, "gates")
+    assert list(first_seen["date"]) == ["2025-01-01", "2025-01-02"]
+
+    before = load_aggregates(path, "gates")
+    rebuild_aggregates(path)
+    pd.testing.assert_frame_equal(load_aggregates(path, "gates"), before)
+
+
+def test_output_is_current(tmp_path):
+    path = str(tmp_path / "results.db")
+    output_file = tmp_path / "plot.png"
+    append_results(path, [{"compiler": "ucc", "compile_time": 1.0}], "gates")
+
+    assert not output_is_current(path, str(output_file), ["gates"])
+    output_file.write_bytes(b"")
+    mark_output_current(path, str(output_file), ["gates"])
+    assert output_is_current(path, str(output_file), ["gates"])
+
+    append_results(path, [{"compiler": "ucc", "compile_time": 1.0}], "expval")
+    assert output_is_current(path, str(output_file), ["gates"])
+    append_results(path, [{"compiler": "ucc", "compile_time": 1.0}], "gates")
+    assert not output_is_current(path, str(output_file), ["gates"])
+
+
+def test_output_is_current_after_rebuilding_store(tmp_path):
+    results_folder = tmp_path / "results"
+    results_folder.mkdir()
+    for compile_time in (0.1, 0.3):
+        save_results(
+            [
+                {
+                    "compiler": "ucc",
+                    "circuit_name": "qft",
+                    "compile_time": 0.2,
+                },
+                {
+                    "compiler": "qiskit",
+                    "circuit_name": "qft",
+                    "compile_time": compile_time,
+                },
+            ],
+            benchmark_name="gates",
+            folder=str(results_folder),
+            append=True,
+        )
+    output_file = tmp_path / "plot.png"
+    output_file.write_bytes(b"")
+    mark_output_current(
+        str(results_folder / "results.db"), str(output_file), ["gates"]
+    )
+    assert (tmp_path / "plot.png.fingerprint").exists()
+
+    # The fingerprint is kept with the plot, and still matches a store
+    # rebuilt from the CSV files
+    path = str(tmp_path / "rebuilt.db")
+    import_csv_folder(str(results_folder), path)
+    assert output_is_current(path, str(output_file), ["gates"])
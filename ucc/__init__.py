@@ -2,6 +2,15 @@ from .compile import (
     compile as compile,
     supported_circuit_formats as supported_circuit_formats,
 )
+from .async_compile import (
+    compile_async as compile_async,
+    compile_as_completed as compile_as_completed,
+    compile_batch_async as compile_batch_async,
+)
+from .multi_target import compile_for_targets as compile_for_targets
+from .incremental import CompileSession as CompileSession
+from .result import CompileResult as CompileResult
 
 from .transpilers.ucc_defaults import UCCDefault1 as UCCDefault1
+from .transpilers.stage_cache import StageCache as StageCache
 from ucc._version import __version__ as __version__
@@ -0,0 +1,69 @@
+"""Command line interface for compiling OpenQASM programs.
+
+Usage:
+    ucc <input.qasm> [-o <output>] [-f qasm2|qasm3|qpy] [--stream]
+"""
+
+import argparse
+import contextlib
+import sys
+
+from qbraid.programs.alias_manager import get_program_type_alias
+
+from .compile import compile
+from .emit import OUTPUT_FORMATS
+from .streaming import compile_qasm_stream
+
+
+def _open_output(path, binary):
+    if path is None:
+        return contextlib.nullcontext(
+            sys.stdout.buffer if binary else sys.stdout
+        )
+    return open(path, "wb" if binary else "w")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="ucc", description="Compile an OpenQASM 2 or 3 program."
+    )
+    parser.add_argument(
+        "input", help="The OpenQASM file, or - for standard input."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="File to write the compiled circuit to (standard output by "
+        "default).",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(OUTPUT_FORMATS),
+        help="Output format (the format of the input by default).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Compile an OpenQASM 2 program window by window without "
+        "loading it whole (see ucc.streaming).",
+    )
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    with source:
+        if args.stream:
+            if args.format not in (None, "qasm2"):
+                parser.error("--stream only writes OpenQASM 2")
+            with _open_output(args.output, binary=False) as sink:
+                compile_qasm_stream(source, sink)
+            return
+        program = source.read()
+
+    output_format = args.format or get_program_type_alias(program)
+    with _open_output(args.output, OUTPUT_FORMATS[output_format]) as sink:
+        compile(program, return_format=output_format, output=sink)
+
+
+if __name__ == "__main__":
+    main()
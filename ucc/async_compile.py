@@ -0,0 +1,183 @@
+"""asyncio front-end for :func:`ucc.compile`.
+
+Compilation is CPU bound, so each call is sent to an executor and awaited,
+keeping the event loop free. When a thread executor is used (the default),
+cancelling the awaiting task stops the compilation at the next pass boundary.
+Process executors can only drop compilations that have not started yet.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from qiskit import QuantumCircuit
+
+from .cancellation import cancellation_callback
+from .compile import compile
+from .emit import qpy_dumps, qpy_loads
+
+
+def _default_concurrency(executor):
+    return getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+
+
+async def _aiter(circuits):
+    if hasattr(circuits, "__aiter__"):
+        async for circuit in circuits:
+            yield circuit
+    else:
+        for circuit in circuits:
+            yield circuit
+
+
+async def compile_async(
+    circuit,
+    return_format="original",
+    target_device=None,
+    custom_passes=None,
+    executor=None,
+):
+    """Awaitable version of :func:`ucc.compile`.
+
+    Args:
+        circuit (object): The quantum circuit to be compiled.
+        return_format (str): The format in which your circuit will be returned.
+            Defaults to the format of the input circuit.
+        target_device (qiskit.transpiler.Target): (optional) The target device
+            to compile the circuit for.
+        custom_passes (list[qiskit.transpiler.TransformationPass]): (optional)
+            A list of custom passes to apply after the default set.
+        executor (concurrent.futures.Executor): (optional) Executor to run the
+            compilation in. Defaults to the event loop's default executor.
+
+    Returns:
+        object: The compiled circuit in the specified format.
+    """
+    loop = asyncio.get_running_loop()
+    decode_qpy = False
+    if isinstance(executor, ProcessPoolExecutor):
+        # Qiskit circuits cross the process boundary as QPY, which is
+        # smaller than a pickled QuantumCircuit
+        if isinstance(circuit, QuantumCircuit):
+            if return_format == "original":
+                return_format = "qiskit"
+            circuit = qpy_dumps(circuit)
+        if return_format == "qiskit":
+            return_format, decode_qpy = "qpy", True
+    compile_function = partial(
+        compile,
+        circuit,
+        return_format=return_format,
+        target_device=target_device,
+        custom_passes=custom_passes,
+    )
+    cancel_event = threading.Event()
+    if not isinstance(executor, ProcessPoolExecutor):
+        compile_function = partial(
+            compile_function, callback=cancellation_callback(cancel_event)
+        )
+
+    try:
+        compiled = await loop.run_in_executor(executor, compile_function)
+    except asyncio.CancelledError:
+        cancel_event.set()
+        raise
+    return qpy_loads(compiled) if decode_qpy else compiled
+
+
+async def compile_as_completed(
+    circuits,
+    return_format="original",
+    target_device=None,
+    custom_passes=None,
+    executor=None,
+    max_concurrency=None,
+):
+    """Compiles ``circuits`` concurrently, yielding each result as soon as it
+    is ready.
+
+    Circuits are pulled from ``circuits`` only as slots free up, so at most
+    ``max_concurrency`` compilations are in flight at any time. Closing the
+    iterator early cancels the compilations still in flight.
+
+    Args:
+        circuits (Iterable | AsyncIterable): The circuits to compile.
+        return_format (str): The format in which circuits will be returned.
+        target_device (qiskit.transpiler.Target): (optional) The target device
+            to compile the circuits for.
+        custom_passes (list[qiskit.transpiler.TransformationPass]): (optional)
+            A list of custom passes to apply after the default set.
+        executor (concurrent.futures.Executor): (optional) Executor to run the
+            compilations in. Defaults to the event loop's default executor.
+        max_concurrency (int): (optional) Maximum number of compilations in
+            flight. Defaults to the executor's worker count.
+
+    Yields:
+        tuple[int, object]: The position of the circuit in ``circuits`` and
+        its compiled version.
+    """
+    limit = max_concurrency or _default_concurrency(executor)
+    circuit_iterator = _aiter(circuits)
+    pending = {}
+    next_index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    circuit = await anext(circuit_iterator)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(
+                    compile_async(
+                        circuit,
+                        return_format=return_format,
+                        target_device=target_device,
+                        custom_passes=custom_passes,
+                        executor=executor,
+                    )
+                )
+                pending[task] = next_index
+                next_index += 1
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def compile_batch_async(
+    circuits,
+    return_format="original",
+    target_device=None,
+    custom_passes=None,
+    executor=None,
+    max_concurrency=None,
+):
+    """Compiles ``circuits`` concurrently and returns the results in input
+    order. See :func:`compile_as_completed` for the arguments.
+
+    Returns:
+        list: The compiled circuits, in the same order as ``circuits``.
+    """
+    results = {}
+    async for index, compiled in compile_as_completed(
+        circuits,
+        return_format=return_format,
+        target_device=target_device,
+        custom_passes=custom_passes,
+        executor=executor,
+        max_concurrency=max_concurrency,
+    ):
+        results[index] = compiled
+    return [results[index] for index in range(len(results))]
@@ -0,0 +1,34 @@
+"""Cooperative cancellation of running compilations.
+
+A pass manager cannot be interrupted in the middle of a pass, but its
+``callback`` runs after every pass. :func:`cancellation_callback` builds a
+callback that aborts the compilation at that point once an event is set.
+"""
+
+
+class CompilationCancelled(Exception):
+    """Raised inside a worker when its compilation has been cancelled."""
+
+
+def cancellation_callback(cancel_event, callback=None):
+    """Builds a pass manager callback that raises
+    :class:`CompilationCancelled` after the current pass once
+    ``cancel_event`` is set.
+
+    Args:
+        cancel_event (threading.Event): Event signalling cancellation.
+        callback (callable): (optional) Callback to run before the check.
+
+    Returns:
+        callable: Callback for ``PassManager.run``.
+    """
+
+    def check_cancelled(**kwargs):
+        if callback is not None:
+            callback(**kwargs)
+        if cancel_event.is_set():
+            raise CompilationCancelled(
+                f"Compilation cancelled after {kwargs['pass_'].name()}"
+            )
+
+    return check_cancelled
@@ -1,7 +1,11 @@
 from qbraid.programs.alias_manager import get_program_type_alias
 from qbraid.transpiler import ConversionGraph
-from qbraid.transpiler import transpile
-from .transpilers.ucc_defaults import UCCDefault1
+from . import qasm3
+from .emit import OUTPUT_FORMATS, is_qpy, qpy_dumps, qpy_loads, write_circuit
+from .portfolio import compile_portfolio
+from .result import CompileResult
+from .translation import translate
+from .transpilers.ucc_defaults import UCCDefault1, validate_trial_options
 
 
 import sys
@@ -26,35 +30,142 @@ supported_circuit_formats = ConversionGraph().nodes()
 
 
 def compile(
-    circuit, return_format="original", target_device=None, custom_passes=None
+    circuit,
+    return_format="original",
+    target_device=None,
+    custom_passes=None,
+    callback=None,
+    strategy="default",
+    strategy_options=None,
+    report=None,
+    stage_cache=None,
+    layout_trials=None,
+    swap_trials=None,
+    num_threads=None,
+    output=None,
 ):
     """Compiles the provided quantum `circuit` by translating it to a Qiskit
     circuit, transpiling it, and returning the optimized circuit in the
     specified `return_format`.
 
     Args:
-        circuit (object): The quantum circuit to be compiled.
+        circuit (object): The quantum circuit to be compiled, in any
+            supported format or as QPY ``bytes``.
         return_format (str): The format in which your circuit will be returned.
             e.g., "TKET", "OpenQASM2". Check ``ucc.supported_circuit_formats()``.
+            "qpy" returns the circuit serialized to QPY ``bytes``, and
+            "lazy" a ``ucc.CompileResult`` that converts the circuit to
+            other formats on demand.
             Defaults to the format of the input circuit.
         target_device (qiskit.transpiler.Target): (optional) The target device to compile the circuit for. None if no device to target
         custom_passes (list[qiskit.transpiler.TransformationPass]): (optional) A list of custom passes to apply after the default set
+        callback (callable): (optional) Called after each pass with the same
+            keyword arguments as the ``callback`` of ``PassManager.run``.
+        strategy (str): "default" to compile with ``UCCDefault1``, or
+            "portfolio" to race several variants of it and keep the best
+            result (see ``ucc.portfolio.compile_portfolio``).
+        strategy_options (dict): (optional) Keyword arguments for the
+            strategy, e.g. ``variants``, ``metric`` or ``deadline`` for
+            "portfolio".
+        report (dict): (optional) Filled in with details about the
+            compilation, e.g. which portfolio variant won, and the time of
+            each format conversion hop as ``conversion_times``.
+        stage_cache (ucc.StageCache): (optional) Cache of the outputs of the
+            compilation stages. Compiling a circuit again resumes after the
+            deepest stage whose inputs and settings are unchanged.
+        layout_trials (int | str): (optional) Number of Sabre layout trials
+            when mapping to ``target_device``, or "auto" to choose it from
+            the size and multi-qubit gate density of the circuit.
+        swap_trials (int | str): (optional) Number of Sabre routing trials,
+            or "auto".
+        num_threads (int): (optional) Sizing hint for the Sabre trial
+            counts: the number of threads the trials are expected to run on.
+            Defaults to the number of CPUs. It doesn't limit the threads
+            used, which is set by the ``RAYON_NUM_THREADS`` environment
+            variable.
+        output: (optional) A file-like object to write the compiled circuit
+            to as it is generated, instead of returning it. The
+            ``return_format`` must then be "qasm2", "qasm3" or "qpy" (for
+            which ``output`` is opened in binary mode).
 
     Returns:
-        object: The compiled circuit in the specified format.
+        object: The compiled circuit in the specified format, or None if
+        ``output`` is given.
     """
+    validate_trial_options(layout_trials, swap_trials, num_threads)
+    source_format = (
+        "qpy" if is_qpy(circuit) else get_program_type_alias(circuit)
+    )
     if return_format == "original":
-        return_format = get_program_type_alias(circuit)
+        return_format = source_format
+    if output is not None and return_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Cannot write circuits as {return_format!r}; use one of "
+            f"{', '.join(OUTPUT_FORMATS)}"
+        )
+
+    # (source, target, seconds) for each format conversion hop
+    conversion_times = []
+    if report is not None:
+        report["conversion_times"] = conversion_times
 
     # Translate to Qiskit Circuit object
-    qiskit_circuit = transpile(circuit, "qiskit")
-    ucc_default1 = UCCDefault1(target_device=target_device)
-    if custom_passes is not None:
-        ucc_default1.pass_manager.append(custom_passes)
-    compiled_circuit = ucc_default1.run(
-        qiskit_circuit,
-    )
+    qiskit_circuit = None
+    if is_qpy(circuit):
+        qiskit_circuit = qpy_loads(circuit)
+    elif source_format == "qasm3":
+        try:
+            qiskit_circuit = qasm3.loads(circuit)
+        except qasm3.QASM3UnsupportedError:
+            # Fall back to the general OpenQASM 3 importer
+            pass
+    if qiskit_circuit is None:
+        qiskit_circuit = translate(circuit, "qiskit", conversion_times)
+    compiler_options = {
+        name: value
+        for name, value in (
+            ("layout_trials", layout_trials),
+            ("swap_trials", swap_trials),
+            ("num_threads", num_threads),
+        )
+        if value is not None
+    }
+    if strategy == "portfolio":
+        compiled_circuit = compile_portfolio(
+            qiskit_circuit,
+            target_device=target_device,
+            custom_passes=custom_passes,
+            callback=callback,
+            report=report,
+            stage_cache=stage_cache,
+            compiler_options=compiler_options,
+            **(strategy_options or {}),
+        )
+    elif strategy == "default":
+        ucc_default1 = UCCDefault1(
+            target_device=target_device, **compiler_options
+        )
+        if custom_passes is not None:
+            ucc_default1.pass_manager.append(custom_passes)
+        compiled_circuit = ucc_default1.run(
+            qiskit_circuit, callback=callback, stage_cache=stage_cache
+        )
+        if report is not None:
+            report["strategy"] = "default"
+            if stage_cache is not None:
+                report["resumed_from"] = ucc_default1.resumed_from
+    else:
+        raise ValueError(f"Unknown compilation strategy: {strategy}")
+
+    if output is not None:
+        write_circuit(compiled_circuit, output, return_format)
+        return None
+
+    if return_format == "qpy":
+        return qpy_dumps(compiled_circuit)
+    if return_format == "lazy":
+        return CompileResult(compiled_circuit, source_format)
 
     # Translate the compiled circuit to the desired format
-    final_result = transpile(compiled_circuit, return_format)
+    final_result = translate(compiled_circuit, return_format, conversion_times)
     return final_result
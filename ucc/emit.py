@@ -0,0 +1,148 @@
+"""Writing compiled circuits to file-like sinks, and QPY serialization.
+
+``transpile(circuit, "qasm2")`` builds the whole OpenQASM program as one
+string, which for circuits with hundreds of thousands of gates doubles the
+peak memory of writing it out. :func:`write_circuit` instead writes the
+program to a sink as it is generated: OpenQASM 2 in batches of statements,
+OpenQASM 3 through the exporter's stream printer, and QPY directly.
+"""
+
+import io
+import itertools
+
+from qiskit import qasm2, qasm3, qpy
+
+BATCH_SIZE = 10_000
+
+# Formats write_circuit can produce, and whether they are binary
+OUTPUT_FORMATS = {"qasm2": False, "qasm3": False, "qpy": True}
+
+
+class _Qasm2Writer:
+    """Writes the statements of an OpenQASM 2 program in batches.
+
+    The gates must all be defined in ``qelib1.inc``, so that each batch,
+    exported as a program of its own, only differs from the empty program
+    by its gate statements.
+
+    Args:
+        sink: A text file-like object.
+        circuit (qiskit.QuantumCircuit): A circuit with the registers of the
+            program. Its gates are ignored.
+        batch_size (int): Number of instructions exported at a time.
+    """
+
+    def __init__(self, sink, circuit, batch_size=BATCH_SIZE):
+        self.sink = sink
+        self.batch_size = batch_size
+        self._template = circuit.copy_empty_like()
+        self._template.global_phase = 0
+        self._empty_program = qasm2.dumps(self._template)
+        sink.write(self._empty_program)
+
+    def write(self, instructions):
+        """Writes the statements of ``instructions``.
+
+        Args:
+            instructions (Iterable[CircuitInstruction]): The instructions, on
+                the bits of the circuit given to the constructor.
+        """
+        instructions = iter(instructions)
+        while True:
+            batch = self._template.copy_empty_like()
+            for instruction in itertools.islice(instructions, self.batch_size):
+                batch._append(instruction)
+            if not batch.data:
+                break
+            self.sink.write(qasm2.dumps(batch)[len(self._empty_program) :])
+
+    def close(self):
+        self.sink.write("\n")
+
+
+def _needs_definitions(circuit):
+    # Exports one instruction of each kind to see if any needs a gate
+    # definition in the program header
+    probe = circuit.copy_empty_like()
+    seen = set()
+    for instruction in circuit.data:
+        operation = instruction.operation
+        key = (type(operation), operation.name, operation.num_qubits)
+        if key not in seen:
+            seen.add(key)
+            probe._append(instruction)
+    empty_program = qasm2.dumps(circuit.copy_empty_like())
+    return not qasm2.dumps(probe).startswith(empty_program)
+
+
+def qpy_dumps(circuit):
+    """Serializes a circuit to QPY.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The circuit.
+
+    Returns:
+        bytes: The QPY payload.
+    """
+    buffer = io.BytesIO()
+    qpy.dump(circuit, buffer)
+    return buffer.getvalue()
+
+
+def qpy_loads(data):
+    """Loads the circuit in a QPY payload.
+
+    Args:
+        data (bytes): The QPY payload, holding a single circuit.
+
+    Returns:
+        qiskit.QuantumCircuit: The circuit.
+    """
+    circuits = qpy.load(io.BytesIO(data))
+    if len(circuits) != 1:
+        raise ValueError(
+            f"Expected a QPY payload with one circuit, got {len(circuits)}"
+        )
+    return circuits[0]
+
+
+def is_qpy(data):
+    """Returns whether ``data`` is a QPY payload.
+
+    Args:
+        data (object): Any circuit accepted by ``ucc.compile``.
+
+    Returns:
+        bool: True for bytes starting with the QPY file header.
+    """
+    return isinstance(data, (bytes, bytearray)) and data[:6] == b"QISKIT"
+
+
+def write_circuit(circuit, sink, output_format="qasm2"):
+    """Writes ``circuit`` to ``sink`` without building the whole program as
+    a string first.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The circuit to write.
+        sink: A file-like object, opened in binary mode for "qpy" and in
+            text mode otherwise.
+        output_format (str): "qasm2", "qasm3" or "qpy".
+    """
+    if output_format == "qasm2":
+        if _needs_definitions(circuit):
+            # Gate definitions must come before the registers, so the
+            # program cannot be written in independent batches
+            sink.write(qasm2.dumps(circuit) + "\n")
+            return
+        writer = _Qasm2Writer(sink, circuit)
+        writer.write(circuit.data)
+        writer.close()
+    elif output_format == "qasm3":
+        qasm3.dump(circuit, sink)
+    elif output_format == "qpy":
+        qpy.dump(circuit, sink)
+    else:
+        raise ValueError(
+            f"Cannot write circuits as {output_format!r}; use one of "
+            f"{', '.join(OUTPUT_FORMATS)}"
+        )
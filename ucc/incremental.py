@@ -0,0 +1,224 @@
+"""Incremental recompilation of circuits that are built up or edited.
+
+A :class:`CompileSession` splits the source circuit into chunks of at most
+``chunk_size`` gates and compiles each chunk separately with
+``UCCDefault1``. The compiled result is the concatenation of the compiled
+chunks, where the last and first ``stitch_size`` gates on either side of
+each boundary are optimized once more together, so gates that cancel
+across a boundary are not missed. An edit only recompiles the chunks it
+touches and the seams next to them, so its cost depends on the size of the
+edit, not of the circuit.
+"""
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import CircuitInstruction
+
+from .transpilers.ucc_defaults import UCCDefault1
+
+
+class _Chunk:
+    """Source gates of a chunk and their compiled circuit."""
+
+    __slots__ = ("source", "compiled")
+
+    def __init__(self, source, compiled):
+        self.source = source
+        self.compiled = compiled
+
+
+class CompileSession:
+    """Keeps a compiled circuit up to date as its source is edited.
+
+    Appending gates recompiles only the last chunk (and any new ones), and
+    :meth:`replace` recompiles the chunks overlapping the edited range.
+    Compiling is done without a target device.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The initial circuit. Its qubits and
+            classical bits are used for all later edits.
+        chunk_size (int): Maximum number of source gates compiled together.
+        stitch_size (int): Number of compiled gates on each side of a chunk
+            boundary that are optimized together.
+    """
+
+    def __init__(self, circuit, chunk_size=500, stitch_size=20):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.chunk_size = chunk_size
+        self.stitch_size = stitch_size
+        self._template = circuit.copy_empty_like()
+        self._template.global_phase = 0
+        self._global_phase = 0
+        self._chunks = []
+        # (id(left), id(right)) -> (left, right, compiled seam)
+        self._seams = {}
+        # Number of gates passed to the compiler so far
+        self.compiled_gate_count = 0
+        self.append(circuit)
+
+    @property
+    def num_gates(self):
+        """int: Number of gates in the source circuit."""
+        return sum(len(chunk.source) for chunk in self._chunks)
+
+    @property
+    def source(self):
+        """qiskit.QuantumCircuit: The current source circuit."""
+        circuit = self._template.copy_empty_like()
+        for chunk in self._chunks:
+            for instruction in chunk.source:
+                circuit._append(instruction)
+        circuit.global_phase = self._global_phase
+        return circuit
+
+    def append(self, other):
+        """Appends gates to the source circuit and returns the updated
+        compiled circuit.
+
+        Args:
+            other (qiskit.QuantumCircuit | Iterable[CircuitInstruction]): A
+                circuit on the same number of qubits and classical bits
+                (matched by index), or instructions on the bits of the
+                session's circuit.
+
+        Returns:
+            qiskit.QuantumCircuit: The compiled circuit.
+        """
+        instructions = self._instructions(other)
+        # The last chunk is recompiled with the new gates unless it is full
+        if self._chunks and len(self._chunks[-1].source) < self.chunk_size:
+            instructions = self._chunks.pop().source + instructions
+        self._chunks.extend(self._compile_chunks(instructions))
+        return self.result()
+
+    def replace(self, start, stop, other=()):
+        """Replaces the source gates ``start`` to ``stop`` (exclusive) and
+        returns the updated compiled circuit.
+
+        With ``start == stop`` the gates are inserted, and with no ``other``
+        the range is deleted.
+
+        Args:
+            start (int): Index of the first source gate to replace.
+            stop (int): Index after the last source gate to replace.
+            other (qiskit.QuantumCircuit | Iterable[CircuitInstruction]): The
+                new gates, as for :meth:`append`.
+
+        Returns:
+            qiskit.QuantumCircuit: The compiled circuit.
+        """
+        if not 0 <= start <= stop <= self.num_gates:
+            raise IndexError(
+                f"Gate range [{start}, {stop}) is outside the circuit"
+            )
+        instructions = self._instructions(other)
+
+        # Find the chunks overlapping the range; an insertion at a chunk
+        # boundary goes into the chunk before it
+        first = last = None
+        offset = chunk_start = 0
+        for i, chunk in enumerate(self._chunks):
+            chunk_end = offset + len(chunk.source)
+            if first is None and (
+                start < chunk_end or (start == chunk_end and start == stop)
+            ):
+                first, chunk_start = i, offset
+            if first is not None and stop <= chunk_end:
+                last = i
+                break
+            offset = chunk_end
+        if first is None:
+            # Inserting into an empty session
+            return self.append(instructions)
+
+        source = [
+            instruction
+            for chunk in self._chunks[first : last + 1]
+            for instruction in chunk.source
+        ]
+        source[start - chunk_start : stop - chunk_start] = instructions
+        self._chunks[first : last + 1] = self._compile_chunks(source)
+        return self.result()
+
+    def result(self):
+        """Returns the compiled circuit for the current source.
+
+        Returns:
+            qiskit.QuantumCircuit: The compiled circuit.
+        """
+        circuit = self._template.copy_empty_like()
+        global_phase = self._global_phase
+        seams = {}
+        head = 0
+        for i, chunk in enumerate(self._chunks):
+            compiled = chunk.compiled
+            global_phase += compiled.global_phase
+            tail = len(compiled.data)
+            if i + 1 < len(self._chunks):
+                right = self._chunks[i + 1].compiled
+                tail -= self._stitch_width(compiled)
+                seam = self._seam(compiled, right, seams)
+            for instruction in compiled.data[head:tail]:
+                circuit._append(instruction)
+            if i + 1 < len(self._chunks):
+                global_phase += seam.global_phase
+                for instruction in seam.data:
+                    circuit._append(instruction)
+                head = self._stitch_width(right)
+        # Seams that are no longer used are dropped
+        self._seams = seams
+        circuit.global_phase = global_phase
+        return circuit
+
+    def _instructions(self, other):
+        if not isinstance(other, QuantumCircuit):
+            return list(other)
+        if (
+            other.num_qubits != self._template.num_qubits
+            or other.num_clbits != self._template.num_clbits
+        ):
+            raise ValueError(
+                "Appended circuits must have the same number of qubits and "
+                "classical bits as the session's circuit"
+            )
+        self._global_phase += other.global_phase
+        qubits = dict(zip(other.qubits, self._template.qubits))
+        clbits = dict(zip(other.clbits, self._template.clbits))
+        return [
+            CircuitInstruction(
+                instruction.operation,
+                tuple(qubits[q] for q in instruction.qubits),
+                tuple(clbits[c] for c in instruction.clbits),
+            )
+            for instruction in other.data
+        ]
+
+    def _compile(self, instructions):
+        circuit = self._template.copy_empty_like()
+        for instruction in instructions:
+            circuit._append(instruction)
+        self.compiled_gate_count += len(instructions)
+        return UCCDefault1().run(circuit)
+
+    def _compile_chunks(self, instructions):
+        return [
+            _Chunk(source, self._compile(source))
+            for source in (
+                instructions[i : i + self.chunk_size]
+                for i in range(0, len(instructions), self.chunk_size)
+            )
+        ]
+
+    def _stitch_width(self, compiled):
+        # At most half of a chunk goes into each of its two seams
+        return min(self.stitch_size, len(compiled.data) // 2)
+
+    def _seam(self, left, right, seams):
+        key = (id(left), id(right))
+        cached = self._seams.get(key)
+        if cached is None or cached[0] is not left or cached[1] is not right:
+            window = left.data[len(left.data) - self._stitch_width(left) :]
+            window += right.data[: self._stitch_width(right)]
+            cached = (left, right, self._compile(window))
+        seams[key] = cached
+        return cached[2]
@@ -0,0 +1,14 @@
+"""Metrics of compiled circuits shared by the compilation strategies and
+results."""
+
+
+def count_multi_qubit_gates(circuit):
+    """Counts the gates of a circuit that act on more than one qubit.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The circuit.
+
+    Returns:
+        int: The number of multi-qubit gates.
+    """
+    return sum(1 for instr in circuit.data if instr.operation.num_qubits > 1)
@@ -0,0 +1,80 @@
+"""Compile one circuit for many target devices.
+
+The local optimization passes that ``UCCDefault1`` runs before mapping do
+not depend on the target device. :func:`compile_for_targets` runs them once
+and then only the mapping and post-mapping stages for each target, in
+parallel threads.
+"""
+
+import copy
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+from qbraid.programs.alias_manager import get_program_type_alias
+
+from .translation import translate
+from .transpilers.ucc_defaults import UCCDefault1
+
+
+def _map_to_target(circuit, target_device, custom_passes, return_format):
+    # With no local iterations, UCCDefault1 only adds the mapping stage
+    # (including its post-mapping local passes) and the final translation
+    compiler = UCCDefault1(local_iterations=0, target_device=target_device)
+    if custom_passes is not None:
+        compiler.pass_manager.append(copy.deepcopy(custom_passes))
+    return translate(compiler.run(circuit), return_format)
+
+
+def compile_for_targets(
+    circuit,
+    target_devices,
+    return_format="original",
+    custom_passes=None,
+    max_workers=None,
+):
+    """Compiles ``circuit`` for each of ``target_devices``, running the
+    target-independent passes only once.
+
+    Each result goes through the same passes as
+    ``ucc.compile(circuit, target_device=target)``.
+
+    Args:
+        circuit (object): The quantum circuit to be compiled.
+        target_devices (Iterable[qiskit.transpiler.Target] | Mapping): The
+            target devices. If a mapping is given, its values are the targets
+            and its keys are used as keys of the result.
+        return_format (str): The format in which circuits will be returned.
+            Defaults to the format of the input circuit.
+        custom_passes (list[qiskit.transpiler.TransformationPass]): (optional)
+            A list of custom passes to apply after the default set.
+        max_workers (int): (optional) Number of targets mapped in parallel.
+            Defaults to one thread per target.
+
+    Returns:
+        dict: The compiled circuit for each target, keyed by target (or by
+        the keys of ``target_devices`` if it is a mapping).
+    """
+    if return_format == "original":
+        return_format = get_program_type_alias(circuit)
+    if not isinstance(target_devices, Mapping):
+        target_devices = {target: target for target in target_devices}
+    if not target_devices:
+        return {}
+
+    qiskit_circuit = translate(circuit, "qiskit")
+    optimized_circuit = UCCDefault1().run(qiskit_circuit)
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or len(target_devices)
+    ) as executor:
+        futures = {
+            key: executor.submit(
+                _map_to_target,
+                optimized_circuit,
+                target_device,
+                custom_passes,
+                return_format,
+            )
+            for key, target_device in target_devices.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,210 @@
+"""Portfolio compilation: run several ``UCCDefault1`` variants and keep the
+best result.
+
+No single recipe is best for every circuit, so :func:`compile_portfolio`
+compiles the same circuit with a set of pipeline variants in parallel
+threads and keeps the one with the fewest multi-qubit gates (or the lowest
+depth). Unfinished variants are cancelled at their next pass boundary once
+the result can no longer change, i.e. when a finished variant compiled the
+circuit away entirely and all variants before it have finished. Otherwise,
+cutting the losers off early needs a deadline: once the deadline shared by
+all variants has passed and at least one variant has finished, the rest are
+cancelled.
+"""
+
+import copy
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import perf_counter
+
+from .cancellation import CompilationCancelled, cancellation_callback
+from .metrics import count_multi_qubit_gates
+from .transpilers.ucc_defaults import UCCDefault1
+
+# Variant name -> keyword arguments for UCCDefault1
+DEFAULT_VARIANTS = {
+    "default": {},
+    "local_iterations_2": {"local_iterations": 2},
+    "no_clifford_resynthesis": {"clifford_resynthesis": False},
+}
+
+# Additional variants that only differ once the circuit is mapped to a device
+MAPPING_VARIANTS = {
+    "sabre_seed_7": {"seed": 7},
+    "sabre_seed_42": {"seed": 42},
+}
+
+METRICS = ("2q", "depth")
+
+# No variant can do better than a circuit without gates, under either metric
+LOWER_BOUND = (0, 0)
+
+
+def _cost(summary, metric):
+    if metric == "2q":
+        return summary["multiq_gates"], summary["depth"]
+    return summary["depth"], summary["multiq_gates"]
+
+
+def _is_unbeatable(variants, futures, pending, summaries, metric):
+    # Equally good variants are ranked by variant order, so a variant at the
+    # lower bound only wins for sure once all variants before it finished
+    unfinished = {futures[future] for future in pending}
+    for name in variants:
+        if name in unfinished:
+            return False
+        summary = summaries[name]
+        if summary["status"] == "completed":
+            if _cost(summary, metric) == LOWER_BOUND:
+                return True
+    return False
+
+
+def _run_variant(
+    circuit,
+    target_device,
+    custom_passes,
+    options,
+    cancel_event,
+    callback,
+    stage_cache,
+):
+    compiler = UCCDefault1(target_device=target_device, **options)
+    if custom_passes is not None:
+        # Pass instances hold state, so each variant needs its own copies
+        compiler.pass_manager.append(copy.deepcopy(custom_passes))
+    t1 = perf_counter()
+    compiled = compiler.run(
+        circuit,
+        callback=cancellation_callback(cancel_event, callback),
+        stage_cache=stage_cache,
+    )
+    return compiled, perf_counter() - t1
+
+
+def compile_portfolio(
+    circuit,
+    target_device=None,
+    custom_passes=None,
+    variants=None,
+    metric="2q",
+    deadline=None,
+    max_workers=None,
+    callback=None,
+    report=None,
+    stage_cache=None,
+    compiler_options=None,
+):
+    """Compiles a Qiskit circuit with several pipeline variants in parallel
+    and returns the best result.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The circuit to compile.
+        target_device (qiskit.transpiler.Target): (optional) The target
+            device to compile the circuit for.
+        custom_passes (list[qiskit.transpiler.TransformationPass]): (optional)
+            Custom passes to apply after the default set of every variant.
+        variants (dict[str, dict]): (optional) Variant name mapped to keyword
+            arguments for ``UCCDefault1``. Defaults to ``DEFAULT_VARIANTS``,
+            plus ``MAPPING_VARIANTS`` when a ``target_device`` is given.
+        metric (str): "2q" to minimize the multi-qubit gate count, or "depth"
+            to minimize depth. The other metric breaks ties.
+        deadline (float): (optional) Seconds after which unfinished variants
+            are cancelled, as long as at least one variant has finished.
+            Without a deadline, all variants run to completion unless one
+            reaches ``LOWER_BOUND``.
+        max_workers (int): (optional) Number of worker threads. Defaults to
+            one per variant.
+        callback (callable): (optional) Called after each pass of every
+            variant, as in ``PassManager.run``.
+        report (dict): (optional) Filled in with the winning variant and the
+            status, compile time and metrics of every variant.
+        stage_cache (ucc.StageCache): (optional) Cache of stage outputs,
+            shared by all variants. Variants that only differ in later
+            stages reuse each other's earlier stages.
+        compiler_options (dict): (optional) Keyword arguments for
+            ``UCCDefault1`` shared by all variants, e.g. ``swap_trials``.
+            The options of a variant take precedence.
+
+    Returns:
+        qiskit.QuantumCircuit: The compiled circuit of the winning variant.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown portfolio metric: {metric}")
+    if variants is None:
+        variants = dict(DEFAULT_VARIANTS)
+        if target_device is not None:
+            variants.update(MAPPING_VARIANTS)
+
+    cancel_event = threading.Event()
+    summaries = {name: {"status": "cancelled"} for name in variants}
+    compiled_circuits = {}
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(variants)) as pool:
+        futures = {
+            pool.submit(
+                _run_variant,
+                circuit,
+                target_device,
+                custom_passes,
+                {**(compiler_options or {}), **options},
+                cancel_event,
+                callback,
+                stage_cache,
+            ): name
+            for name, options in variants.items()
+        }
+        pending = set(futures)
+        while pending:
+            # Wake up at the deadline, or after it for the first finisher
+            timeout = None
+            if deadline is not None and not cancel_event.is_set():
+                remaining = start + deadline - perf_counter()
+                if remaining > 0:
+                    timeout = remaining
+            done, pending = wait(
+                pending, timeout=timeout, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                name = futures[future]
+                try:
+                    compiled, compile_time = future.result()
+                except CompilationCancelled:
+                    continue
+                except Exception as e:
+                    summaries[name] = {"status": "failed", "error": repr(e)}
+                    continue
+                compiled_circuits[name] = compiled
+                summaries[name] = {
+                    "status": "completed",
+                    "compile_time": compile_time,
+                    "multiq_gates": count_multi_qubit_gates(compiled),
+                    "depth": compiled.depth(),
+                }
+            deadline_passed = (
+                deadline is not None and perf_counter() >= start + deadline
+            )
+            if deadline_passed and compiled_circuits:
+                cancel_event.set()
+            elif _is_unbeatable(variants, futures, pending, summaries, metric):
+                cancel_event.set()
+
+    if not compiled_circuits:
+        errors = {name: s.get("error") for name, s in summaries.items()}
+        raise RuntimeError(f"All portfolio variants failed: {errors}")
+
+    # min() keeps the first of equally good variants, in variant order
+    winner = min(
+        (name for name in variants if name in compiled_circuits),
+        key=lambda name: _cost(summaries[name], metric),
+    )
+    if report is not None:
+        report.update(
+            {
+                "strategy": "portfolio",
+                "metric": metric,
+                "winner": winner,
+                "variants": summaries,
+            }
+        )
+    return compiled_circuits[winner]
@@ -0,0 +1,390 @@
+"""A fast loader for the subset of OpenQASM 3 used by the benchmark circuits.
+
+The general OpenQASM 3 importer builds a full abstract syntax tree in pure
+Python before creating the circuit, which takes tens of seconds for circuits
+with tens of thousands of gates. This loader reads the program statement by
+statement and appends each gate to the circuit directly. It supports:
+
+- ``include "stdgates.inc"`` and the gates it defines, and ``U``;
+- ``input float`` (or ``angle``) declarations, which become ``Parameter``
+  objects, and parameter expressions built from them;
+- ``qubit``/``bit`` declarations and the older ``qreg``/``creg`` forms;
+- ``measure``, ``reset`` and ``barrier``;
+- ``for`` loops over ranges or sets of integers.
+
+Anything else raises :class:`QASM3UnsupportedError`, so that callers can
+fall back to the general importer.
+"""
+
+import ast
+import io
+import math
+import operator
+import re
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import (
+    Barrier,
+    CircuitInstruction,
+    ClassicalRegister,
+    Parameter,
+    ParameterExpression,
+    QuantumRegister,
+)
+from qiskit.circuit.library import get_standard_gate_name_mapping
+
+from .streaming import _statements
+
+_STANDARD_GATES = get_standard_gate_name_mapping()
+# Gates of stdgates.inc by their OpenQASM 3 names
+_GATES = {
+    name: type(_STANDARD_GATES[name])
+    for name in (
+        "p", "x", "y", "z", "h", "s", "sdg", "t", "tdg", "sx", "rx", "ry",
+        "rz", "cx", "cy", "cz", "cp", "crx", "cry", "crz", "ch", "swap",
+        "ccx", "cswap", "cu", "id", "u1", "u2", "u3",
+    )
+}  # fmt: skip
+_GATES.update(
+    {
+        "CX": _GATES["cx"],
+        "phase": _GATES["p"],
+        "cphase": _GATES["cp"],
+        "U": type(_STANDARD_GATES["u"]),
+    }
+)
+
+_CONSTANTS = {
+    "pi": math.pi,
+    "π": math.pi,
+    "tau": math.tau,
+    "τ": math.tau,
+    "euler": math.e,
+    "ℇ": math.e,
+}
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+# OpenQASM 3 function -> (ParameterExpression method, float function)
+_FUNCTIONS = {
+    "sin": ("sin", math.sin),
+    "cos": ("cos", math.cos),
+    "tan": ("tan", math.tan),
+    "arcsin": ("arcsin", math.asin),
+    "arccos": ("arccos", math.acos),
+    "arctan": ("arctan", math.atan),
+    "exp": ("exp", math.exp),
+    "ln": ("log", math.log),
+}
+
+_KEYWORD = re.compile(r"\w+")
+_GATE_CALL = re.compile(r"(\w+)\s*(?:\((.*)\))?\s*(.*)", re.S)
+_OPERAND = re.compile(r"(\w+)\s*(?:\[(.+)\])?", re.S)
+_FOR_LOOP = re.compile(
+    r"for\s+(?:\w+(?:\[\d+\])?\s+)?(\w+)\s+in\s+(\[.*?\]|\{.*?\})\s*\{(.*)\}",
+    re.S,
+)
+_DECLARATION = re.compile(r"(\w+)\s*(?:\[\s*(\d+)\s*\])?\s+(\w+)")
+_OLD_DECLARATION = re.compile(r"(qreg|creg)\s+(\w+)\s*\[\s*(\d+)\s*\]")
+
+
+class QASM3UnsupportedError(ValueError):
+    """Raised for OpenQASM 3 programs outside the supported subset."""
+
+
+class _Loader:
+    def __init__(self):
+        self.circuit = QuantumCircuit()
+        self.registers = {}
+        self.parameters = {}
+        # Values of expressions and operands outside of loops, by their text
+        self.values = {}
+        self.operands = {}
+        self.expressions = {}
+
+    def run(self, statement, scope=None):
+        match = _KEYWORD.match(statement)
+        keyword = match.group() if match else None
+        if keyword == "OPENQASM":
+            if not statement.split()[1].startswith("3"):
+                raise QASM3UnsupportedError(f"Not OpenQASM 3: {statement}")
+        elif keyword == "include":
+            if '"stdgates.inc"' not in statement:
+                raise QASM3UnsupportedError(f"Unknown include: {statement}")
+        elif keyword == "input":
+            self._input(statement)
+        elif keyword in ("qubit", "bit", "qreg", "creg"):
+            self._register(statement)
+        elif keyword == "for":
+            self._for_loop(statement, scope)
+        elif keyword == "measure" or "= measure" in statement:
+            self._measure(statement, scope)
+        elif keyword in _GATES or keyword in ("reset", "barrier"):
+            self._gate(statement, scope)
+        else:
+            raise QASM3UnsupportedError(
+                f"Unsupported OpenQASM 3 statement: {statement}"
+            )
+
+    def _input(self, statement):
+        match = _DECLARATION.fullmatch(statement[len("input") : -1].strip())
+        if match is None or match.group(1) not in ("float", "angle"):
+            raise QASM3UnsupportedError(
+                f"Unsupported input declaration: {statement}"
+            )
+        name = match.group(3)
+        self.parameters[name] = Parameter(name)
+
+    def _register(self, statement):
+        match = _OLD_DECLARATION.fullmatch(statement[:-1].strip())
+        if match is not None:
+            kind, name, size = match.groups()
+        else:
+            match = _DECLARATION.fullmatch(statement[:-1].strip())
+            if match is None:
+                raise QASM3UnsupportedError(
+                    f"Unsupported declaration: {statement}"
+                )
+            kind, size, name = match.groups()
+        register_class = (
+            QuantumRegister if kind in ("qubit", "qreg") else ClassicalRegister
+        )
+        register = register_class(int(size or 1), name)
+        self.circuit.add_register(register)
+        # Single qubits and bits are used without an index
+        self.registers[name] = register if size else register[0]
+
+    def _for_loop(self, statement, scope):
+        match = _FOR_LOOP.fullmatch(statement)
+        if match is None:
+            raise QASM3UnsupportedError(f"Unsupported loop: {statement}")
+        variable, values, body = match.groups()
+        if values.startswith("["):
+            bounds = [
+                self._evaluate(value, scope)
+                for value in values[1:-1].split(":")
+            ]
+            start, step, stop = (
+                (bounds[0], 1, bounds[1]) if len(bounds) == 2 else bounds
+            )
+            # OpenQASM 3 ranges include their end
+            values = range(start, stop + (1 if step > 0 else -1), step)
+        else:
+            values = [
+                self._evaluate(value, scope)
+                for value in values[1:-1].split(",")
+            ]
+        statements = list(_statements(io.StringIO(body)))
+        for value in values:
+            inner_scope = {**(scope or {}), variable: value}
+            for inner_statement in statements:
+                self.run(inner_statement, inner_scope)
+
+    def _measure(self, statement, scope):
+        if statement.startswith("measure"):
+            qubits, _, clbits = statement[len("measure") : -1].partition("->")
+        else:
+            clbits, _, qubits = statement[:-1].partition("= measure")
+        operation = _STANDARD_GATES["measure"]
+        qubits = self._operand(qubits.strip(), scope)
+        clbits = self._operand(clbits.strip(), scope)
+        if len(qubits) != len(clbits):
+            raise QASM3UnsupportedError(
+                f"Measured registers differ in size: {statement}"
+            )
+        for qubit, clbit in zip(qubits, clbits):
+            self.circuit._append(
+                CircuitInstruction(operation, (qubit,), (clbit,))
+            )
+
+    def _gate(self, statement, scope):
+        name, parameters, operands = _GATE_CALL.fullmatch(
+            statement[:-1].strip()
+        ).groups()
+        if name == "barrier":
+            qubits = [
+                [
+                    qubit
+                    for operand in operands.split(",")
+                    for qubit in self._operand(operand.strip(), scope)
+                ]
+                if operands.strip()
+                else self.circuit.qubits
+            ]
+            operation = Barrier(len(qubits[0]))
+        else:
+            qubits = self._broadcast(operands, scope, statement)
+            if name == "reset":
+                operation = _STANDARD_GATES["reset"]
+            else:
+                values = (
+                    [
+                        self._evaluate(p, scope)
+                        for p in _split_arguments(parameters)
+                    ]
+                    if parameters
+                    else []
+                )
+                try:
+                    operation = _GATES[name](*values)
+                except TypeError as error:
+                    raise QASM3UnsupportedError(
+                        f"Wrong number of parameters: {statement}"
+                    ) from error
+        for operand in qubits:
+            self.circuit._append(
+                CircuitInstruction(operation, tuple(operand), ())
+            )
+
+    def _broadcast(self, operands, scope, statement):
+        key = None if scope else operands
+        if key in self.operands:
+            return self.operands[key]
+        bits = [
+            self._operand(operand.strip(), scope)
+            for operand in operands.split(",")
+        ]
+        size = max(len(operand) for operand in bits)
+        if any(len(operand) not in (1, size) for operand in bits):
+            raise QASM3UnsupportedError(
+                f"Registers of different sizes: {statement}"
+            )
+        result = [
+            [operand[i if len(operand) > 1 else 0] for operand in bits]
+            for i in range(size)
+        ]
+        if key is not None:
+            self.operands[key] = result
+        return result
+
+    def _operand(self, operand, scope):
+        # Returns the list of bits an operand refers to
+        match = _OPERAND.fullmatch(operand)
+        if match is None or match.group(1) not in self.registers:
+            raise QASM3UnsupportedError(f"Unknown operand: {operand}")
+        register = self.registers[match.group(1)]
+        index = match.group(2)
+        if not hasattr(register, "size"):
+            # A single qubit or bit
+            if index is not None:
+                raise QASM3UnsupportedError(f"Not a register: {operand}")
+            return [register]
+        if index is None:
+            return list(register)
+        index = int(index) if index.isdigit() else self._evaluate(index, scope)
+        if not isinstance(index, int) or not (
+            -register.size <= index < register.size
+        ):
+            raise QASM3UnsupportedError(f"Index out of range: {operand}")
+        return [register[index]]
+
+    def _evaluate(self, expression, scope):
+        if not scope and expression in self.values:
+            return self.values[expression]
+        tree = self.expressions.get(expression)
+        if tree is None:
+            try:
+                tree = ast.parse(expression.strip(), mode="eval").body
+            except SyntaxError as error:
+                raise QASM3UnsupportedError(
+                    f"Unsupported expression: {expression}"
+                ) from error
+            self.expressions[expression] = tree
+        value = self._value(tree, scope or {})
+        if not scope:
+            self.values[expression] = value
+        return value
+
+    def _value(self, node, scope):
+        if isinstance(node, ast.Constant) and isinstance(
+            node.value, (int, float)
+        ):
+            return node.value
+        if isinstance(node, ast.Name):
+            for names in (scope, self.parameters, _CONSTANTS):
+                if node.id in names:
+                    return names[node.id]
+        elif isinstance(node, ast.BinOp) and type(node.op) in (
+            _BINARY_OPERATORS
+        ):
+            return _BINARY_OPERATORS[type(node.op)](
+                self._value(node.left, scope), self._value(node.right, scope)
+            )
+        elif isinstance(node, ast.UnaryOp) and isinstance(
+            node.op, (ast.USub, ast.UAdd)
+        ):
+            value = self._value(node.operand, scope)
+            return -value if isinstance(node.op, ast.USub) else value
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in (*_FUNCTIONS, "sqrt")
+            and len(node.args) == 1
+        ):
+            value = self._value(node.args[0], scope)
+            if node.func.id == "sqrt":
+                return value**0.5
+            method, function = _FUNCTIONS[node.func.id]
+            if isinstance(value, ParameterExpression):
+                return getattr(value, method)()
+            return function(value)
+        raise QASM3UnsupportedError(
+            f"Unsupported expression: {ast.unparse(node)}"
+        )
+
+
+def _split_arguments(text):
+    # Splits on commas outside of parentheses
+    arguments, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            arguments.append(text[start:i])
+            start = i + 1
+    arguments.append(text[start:])
+    return arguments
+
+
+def load(source):
+    """Loads an OpenQASM 3 program from an iterable of lines, e.g. an open
+    file, without building a syntax tree of the whole program.
+
+    Args:
+        source (Iterable[str]): The program.
+
+    Returns:
+        qiskit.QuantumCircuit: The circuit. ``input`` declarations become
+        parameters of the circuit.
+
+    Raises:
+        QASM3UnsupportedError: If the program uses features outside the
+            supported subset.
+    """
+    loader = _Loader()
+    try:
+        for statement in _statements(source):
+            loader.run(statement)
+    except ValueError as error:
+        if isinstance(error, QASM3UnsupportedError):
+            raise
+        raise QASM3UnsupportedError(str(error)) from error
+    return loader.circuit
+
+
+def loads(program):
+    """Loads an OpenQASM 3 program from a string. See :func:`load`.
+
+    Args:
+        program (str): The program.
+
+    Returns:
+        qiskit.QuantumCircuit: The circuit.
+    """
+    return load(io.StringIO(program))
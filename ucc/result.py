@@ -0,0 +1,91 @@
+"""Lazily converted compilation results.
+
+``compile(circuit, return_format="lazy")`` returns a :class:`CompileResult`
+holding the compiled Qiskit circuit. Other formats are converted on first
+access and kept, and the metrics are only computed when read, so formats
+and metrics that are never used cost nothing.
+"""
+
+import threading
+from functools import cached_property
+
+from .emit import qpy_dumps
+from .metrics import count_multi_qubit_gates
+from .translation import translate
+
+
+class CompileResult:
+    """A compiled circuit that converts itself to other formats on demand.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The compiled circuit.
+        source_format (str): (optional) The format of the circuit that was
+            compiled, used by :attr:`original`.
+
+    Attributes:
+        circuit (qiskit.QuantumCircuit): The compiled circuit.
+        source_format (str): The format of the circuit that was compiled.
+    """
+
+    def __init__(self, circuit, source_format="qiskit"):
+        self.circuit = circuit
+        self.source_format = source_format
+        self._conversions = {"qiskit": circuit}
+        self._lock = threading.Lock()
+
+    def to(self, return_format):
+        """Returns the circuit in ``return_format``, converting it on the
+        first request only.
+
+        Args:
+            return_format (str): Any format of
+                ``ucc.supported_circuit_formats()``, or "qpy" for QPY bytes.
+
+        Returns:
+            object: The compiled circuit in ``return_format``.
+        """
+        with self._lock:
+            if return_format not in self._conversions:
+                if return_format == "qpy":
+                    converted = qpy_dumps(self.circuit)
+                else:
+                    converted = translate(self.circuit, return_format)
+                self._conversions[return_format] = converted
+            return self._conversions[return_format]
+
+    @property
+    def original(self):
+        """object: The circuit in the format of the input circuit."""
+        return self.to(self.source_format)
+
+    @property
+    def converted_formats(self):
+        """list[str]: The formats converted so far, including "qiskit"."""
+        return list(self._conversions)
+
+    @cached_property
+    def gate_counts(self):
+        """dict[str, int]: Number of operations of each name."""
+        return dict(self.circuit.count_ops())
+
+    @cached_property
+    def num_gates(self):
+        """int: Total number of operations."""
+        return self.circuit.size()
+
+    @cached_property
+    def num_multi_qubit_gates(self):
+        """int: Number of operations on more than one qubit."""
+        return count_multi_qubit_gates(self.circuit)
+
+    @cached_property
+    def depth(self):
+        """int: Depth of the circuit."""
+        return self.circuit.depth()
+
+    def __repr__(self):
+        return (
+            f"CompileResult(num_qubits={self.circuit.num_qubits}, "
+            f"source_format={self.source_format!r}, "
+            f"converted_formats={self.converted_formats})"
+        )
@@ -0,0 +1,200 @@
+"""Streaming compilation of very deep circuits.
+
+Loading a circuit with millions of gates into a single ``DAGCircuit`` needs
+memory proportional to its length. :class:`StreamCompiler` instead reads
+gates from an iterator and optimizes them in windows of ``window_size``
+gates with the local passes of ``UCCDefault1`` (no target device). The last
+``overlap`` optimized gates of each window are carried into the next one,
+so gates cancelling across a window boundary are still optimized, and the
+others are emitted right away. Memory therefore depends on the window size,
+not on the length of the circuit.
+
+:func:`compile_qasm_stream` applies this to OpenQASM 2 text read from one
+file-like object and written to another.
+"""
+
+import itertools
+import re
+
+from qiskit import qasm2
+from qiskit.circuit import CircuitInstruction
+
+from .emit import _Qasm2Writer
+from .transpilers.ucc_defaults import UCCDefault1
+
+WINDOW_SIZE = 5000
+OVERLAP = 200
+
+# Statements that declare things rather than apply operations
+_DECLARATIONS = ("OPENQASM", "include", "qreg", "creg", "gate", "opaque")
+
+
+class StreamCompiler:
+    """Compiles a stream of instructions in overlapping windows.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): A circuit with the qubits and
+            classical bits that the instructions act on. Its gates are
+            ignored.
+        window_size (int): Number of new gates optimized per window.
+        overlap (int): Number of optimized gates at the end of each window
+            that are optimized again with the next one.
+
+    Attributes:
+        global_phase (float): Global phase of the gates emitted so far.
+    """
+
+    def __init__(self, circuit, window_size=WINDOW_SIZE, overlap=OVERLAP):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        self.window_size = window_size
+        self.overlap = overlap
+        self._template = circuit.copy_empty_like()
+        self._template.global_phase = 0
+        self.global_phase = 0
+
+    def compile(self, instructions):
+        """Optimizes ``instructions`` window by window.
+
+        Args:
+            instructions (Iterable[CircuitInstruction]): The gates, on the
+                bits of the circuit given to the constructor.
+
+        Yields:
+            CircuitInstruction: The optimized gates, in order.
+        """
+        instructions = iter(instructions)
+        carried = []
+        while True:
+            window = list(itertools.islice(instructions, self.window_size))
+            if not window:
+                break
+            circuit = self._template.copy_empty_like()
+            for instruction in carried + window:
+                circuit._append(instruction)
+            compiled = UCCDefault1().run(circuit)
+            self.global_phase += compiled.global_phase
+
+            keep = max(len(compiled.data) - self.overlap, 0)
+            yield from compiled.data[:keep]
+            carried = list(compiled.data[keep:])
+        yield from carried
+
+
+def _statements(lines):
+    # Splits OpenQASM text into statements, keeping blocks such as gate
+    # definitions and loop bodies (which contain semicolons) whole. Braces
+    # after "in" enclose a set of loop values, not a block.
+    buffer = ""
+    # For each open brace, whether it opened a block
+    braces = []
+    for line in lines:
+        line = line.split("//", 1)[0]
+        if not braces and "{" not in line:
+            *statements, buffer = (buffer + line).split(";")
+            for statement in statements:
+                yield statement.strip() + ";"
+            continue
+        for char in line:
+            if char == "{":
+                braces.append(re.search(r"\bin\s*$", buffer) is None)
+            buffer += char
+            if char == "}":
+                if braces.pop() and not braces:
+                    yield buffer.strip()
+                    buffer = ""
+            elif char == ";" and not braces:
+                yield buffer.strip()
+                buffer = ""
+    if buffer.strip():
+        raise ValueError(f"Incomplete OpenQASM statement: {buffer.strip()}")
+
+
+def _is_declaration(statement):
+    return statement.split(None, 1)[0].split("(", 1)[0] in _DECLARATIONS
+
+
+def _load(program):
+    return qasm2.loads(
+        program, custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS
+    )
+
+
+def _read_qasm(statements, header, template, batch_size):
+    # Parses the gate statements in batches with the program header, so the
+    # Rust parser does the work but never sees the whole circuit
+    def parse(batch):
+        circuit = _load("\n".join(header + batch))
+        qubits = dict(zip(circuit.qubits, template.qubits))
+        clbits = dict(zip(circuit.clbits, template.clbits))
+        for instruction in circuit.data:
+            yield CircuitInstruction(
+                instruction.operation,
+                tuple(qubits[q] for q in instruction.qubits),
+                tuple(clbits[c] for c in instruction.clbits),
+            )
+
+    batch = []
+    for statement in statements:
+        if _is_declaration(statement):
+            if not statement.startswith(("gate", "opaque")):
+                raise ValueError(
+                    "Registers must be declared before the first gate in a "
+                    f"streamed OpenQASM program: {statement}"
+                )
+            yield from parse(batch)
+            batch = []
+            header.append(statement)
+            continue
+        batch.append(statement)
+        if len(batch) >= batch_size:
+            yield from parse(batch)
+            batch = []
+    yield from parse(batch)
+
+
+def compile_qasm_stream(
+    source, sink, window_size=WINDOW_SIZE, overlap=OVERLAP
+):
+    """Compiles an OpenQASM 2 program read from ``source`` and writes the
+    compiled program to ``sink``, without holding the whole circuit in
+    memory.
+
+    Registers must be declared before the first gate.
+
+    Args:
+        source (Iterable[str]): The program, e.g. an open text file.
+        sink: A file-like object with a ``write`` method.
+        window_size (int): Number of gates optimized per window.
+        overlap (int): Number of optimized gates carried into the next
+            window.
+
+    Returns:
+        float: The global phase of the compiled circuit, which OpenQASM 2
+        cannot express.
+    """
+    statements = _statements(source)
+    header = []
+    first_gate = []
+    for statement in statements:
+        if not _is_declaration(statement):
+            first_gate.append(statement)
+            break
+        header.append(statement)
+    template = _load("\n".join(header))
+
+    compiler = StreamCompiler(template, window_size, overlap)
+    instructions = compiler.compile(
+        _read_qasm(
+            itertools.chain(first_gate, statements),
+            header,
+            template,
+            window_size,
+        )
+    )
+    # The compiled gates are all in qelib1.inc, so they can be written in
+    # batches
+    writer = _Qasm2Writer(sink, template, window_size)
+    writer.write(instructions)
+    writer.close()
+    return compiler.global_phase
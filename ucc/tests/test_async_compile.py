@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+from benchmarks.scripts import qcnn_circuit
+from ucc import compile_async, compile_as_completed, compile_batch_async
+from ucc import async_compile
+
+
+def test_compile_async():
+    circuit = qcnn_circuit(6)
+    compiled = asyncio.run(compile_async(circuit))
+    assert isinstance(compiled, QuantumCircuit)
+    assert Statevector(circuit).equiv(Statevector(compiled))
+
+
+def test_compile_batch_async_preserves_order():
+    circuits = [qcnn_circuit(n) for n in range(4, 9)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        compiled = asyncio.run(
+            compile_batch_async(circuits, executor=executor, max_concurrency=2)
+        )
+    assert [c.num_qubits for c in compiled] == list(range(4, 9))
+
+
+def test_compile_batch_async_in_processes():
+    circuits = [qcnn_circuit(n) for n in (4, 6)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        compiled = asyncio.run(
+            compile_batch_async(circuits, executor=executor)
+        )
+    for circuit, result in zip(circuits, compiled):
+        assert isinstance(result, QuantumCircuit)
+        assert Statevector(circuit).equiv(Statevector(result))
+
+
+def test_compile_as_completed_limits_concurrency(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+    original = async_compile.compile_async
+
+    async def counting_compile_async(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(async_compile, "compile_async", counting_compile_async)
+
+    async def circuits():
+        for n in range(4, 10):
+            yield qcnn_circuit(n)
+
+    async def run():
+        return [
+            (index, compiled.num_qubits)
+            async for index, compiled in compile_as_completed(
+                circuits(), max_concurrency=2
+            )
+        ]
+
+    results = asyncio.run(run())
+    assert sorted(results) == [(n - 4, n) for n in range(4, 10)]
+    assert max_in_flight <= 2
+
+
+def test_cancel_stops_between_passes(monkeypatch):
+    passes_run = []
+    first_pass_done = threading.Event()
+    resume = threading.Event()
+    cancel_callback = async_compile.cancellation_callback
+
+    def recording_cancel_callback(cancel_event):
+        check = cancel_callback(cancel_event)
+
+        def callback(**kwargs):
+            passes_run.append(kwargs["pass_"].name())
+            first_pass_done.set()
+            resume.wait()
+            check(**kwargs)
+
+        return callback
+
+    monkeypatch.setattr(
+        async_compile, "cancellation_callback", recording_cancel_callback
+    )
+
+    async def run(executor):
+        task = asyncio.ensure_future(
+            compile_async(qcnn_circuit(8), executor=executor)
+        )
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, first_pass_done.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        asyncio.run(run(executor))
+        resume.set()
+
+    assert passes_run == [passes_run[0]]
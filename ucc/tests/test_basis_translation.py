@@ -0,0 +1,103 @@
+import copy
+
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate
+from qiskit.circuit.equivalence import EquivalenceLibrary
+from qiskit.circuit.equivalence_library import SessionEquivalenceLibrary as sel
+from qiskit.circuit.library import get_standard_gate_name_mapping
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.quantum_info import Operator
+from ucc.transpilers import basis_translation
+from ucc.transpilers.basis_translation import (
+    CachedBasisTranslator,
+    clear_translation_cache,
+    get_translation_library,
+    load_translation_cache,
+    save_translation_cache,
+)
+
+TARGET_BASIS = ["rz", "rx", "ry", "h", "cx"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_translation_cache()
+    yield
+    clear_translation_cache()
+
+
+def test_translation_library_is_cached():
+    library = get_translation_library(TARGET_BASIS)
+    assert get_translation_library(TARGET_BASIS) is library
+    assert get_translation_library(list(reversed(TARGET_BASIS))) is library
+    assert get_translation_library(["u", "cx"]) is not library
+
+
+@pytest.mark.parametrize(
+    "gate_name", ["swap", "cz", "ccx", "u", "rxx", "sdg", "cu3"]
+)
+def test_cached_translation_is_equivalent(gate_name):
+    gate = get_standard_gate_name_mapping()[gate_name]
+    if gate.params:
+        gate = type(gate)(*[0.1 * (i + 1) for i in range(len(gate.params))])
+    circuit = QuantumCircuit(gate.num_qubits)
+    circuit.append(gate, range(gate.num_qubits))
+
+    translated = dag_to_circuit(
+        CachedBasisTranslator(sel, TARGET_BASIS).run(circuit_to_dag(circuit))
+    )
+    assert set(translated.count_ops()) <= set(TARGET_BASIS)
+    assert Operator(translated).equiv(Operator(circuit))
+
+
+def test_uncovered_gate_falls_back_to_full_library():
+    my_gate = Gate("my_gate", 1, [])
+    definition = QuantumCircuit(1)
+    definition.h(0)
+    library = EquivalenceLibrary(base=sel)
+    library.add_equivalence(my_gate, definition)
+
+    circuit = QuantumCircuit(2)
+    circuit.append(my_gate, [0])
+    circuit.cz(0, 1)
+    translated = dag_to_circuit(
+        CachedBasisTranslator(library, TARGET_BASIS).run(
+            circuit_to_dag(circuit)
+        )
+    )
+    assert set(translated.count_ops()) <= set(TARGET_BASIS)
+
+
+def test_translation_cache_round_trip(tmp_path):
+    path = tmp_path / "translation_cache.pkl"
+    library = get_translation_library(TARGET_BASIS)
+    save_translation_cache(path)
+    clear_translation_cache()
+
+    assert load_translation_cache(path)
+    loaded = get_translation_library(TARGET_BASIS)
+    assert set(loaded.keys()) == set(library.keys())
+
+
+def test_translation_cache_env_var(tmp_path, monkeypatch):
+    path = tmp_path / "translation_cache.pkl"
+    monkeypatch.setenv(basis_translation.CACHE_ENV_VAR, str(path))
+    monkeypatch.setattr(basis_translation, "_loaded_env_cache", False)
+
+    get_translation_library(TARGET_BASIS)
+    assert path.exists()
+
+
+def test_translation_library_follows_library_changes():
+    library = copy.deepcopy(sel)
+    rules = get_translation_library(TARGET_BASIS, library)
+    assert get_translation_library(TARGET_BASIS, library) is rules
+
+    # A new rule for a gate that already has rules changes the rule set
+    swap = QuantumCircuit(2)
+    swap.cx(0, 1)
+    swap.cx(1, 0)
+    swap.cx(0, 1)
+    library.add_equivalence(get_standard_gate_name_mapping()["swap"], swap)
+    assert get_translation_library(TARGET_BASIS, library) is not rules
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from cirq import Circuit as CirqCircuit
 from cirq import CNOT, H, X, LineQubit, NamedQubit
@@ -8,12 +10,14 @@ from qiskit.converters import circuit_to_dag
 from qiskit.quantum_info import Statevector
 from qiskit.transpiler.passes import GatesInBasis
 from qiskit.transpiler.passes.utils import CheckMap
-from qiskit.transpiler import Target
+from qiskit.transpiler import CouplingMap, Target
 from qiskit.transpiler.basepasses import TransformationPass
 from qiskit.circuit.library import CXGate, HGate, XGate
 from benchmarks.scripts import qcnn_circuit, random_clifford_circuit
-from ucc import compile
-from ucc.transpilers.ucc_defaults import UCCDefault1
+from ucc import CompileResult, compile
+from ucc import result as result_module
+from ucc.emit import qpy_dumps, qpy_loads
+from ucc.transpilers.ucc_defaults import UCCDefault1, auto_trial_count
 
 
 def test_qiskit_compile():
@@ -39,6 +43,47 @@ def test_tket_compile():
     assert isinstance(result_circuit, TketCircuit)
 
 
+def test_qpy_compile():
+    circuit = qcnn_circuit(6)
+    expected = compile(circuit)
+    result = compile(circuit, return_format="qpy")
+    assert isinstance(result, bytes)
+    assert qpy_loads(result) == expected
+
+    # QPY input is returned as QPY unless another format is asked for
+    assert qpy_loads(compile(qpy_dumps(circuit))) == expected
+    assert compile(qpy_dumps(circuit), return_format="qiskit") == expected
+
+
+def test_lazy_compile(monkeypatch):
+    conversions = []
+    original_translate = result_module.translate
+
+    def counting_translate(circuit, return_format):
+        conversions.append(return_format)
+        return original_translate(circuit, return_format)
+
+    monkeypatch.setattr(result_module, "translate", counting_translate)
+    circuit = TketCircuit(3)
+    circuit.H(0)
+    circuit.CX(0, 1)
+    circuit.CX(1, 2)
+    result = compile(circuit, return_format="lazy")
+    assert isinstance(result, CompileResult)
+    assert result.converted_formats == ["qiskit"]
+    assert conversions == []
+
+    cirq_circuit = result.to("cirq")
+    assert isinstance(cirq_circuit, CirqCircuit)
+    assert result.to("cirq") is cirq_circuit
+    assert isinstance(result.original, TketCircuit)
+    assert conversions == ["cirq", "pytket"]
+
+    assert result.num_multi_qubit_gates == 2
+    assert result.num_gates == sum(result.gate_counts.values())
+    assert result.depth == result.circuit.depth()
+
+
 def test_compile_with_target_device():
     circuit = QiskitCircuit(3)
     circuit.cx(0, 1)
@@ -60,6 +105,78 @@ def test_compile_with_target_device():
     assert analysis_pass.property_set["check_map"]
 
 
+def test_compile_with_target_device_larger_than_circuit():
+    circuit = QiskitCircuit(3)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.cx(1, 2)
+
+    t = Target(description="Fake line device", num_qubits=5)
+    t.add_instruction(
+        CXGate(), {(i, i + 1): None for i in range(t.num_qubits - 1)}
+    )
+    result_circuit = compile(circuit, target_device=t)
+
+    analysis_pass = CheckMap(
+        t.build_coupling_map(), property_set_field="check_map"
+    )
+    analysis_pass.run(circuit_to_dag(result_circuit))
+    assert analysis_pass.property_set["check_map"]
+
+
+def test_compile_with_sabre_trials():
+    circuit = qcnn_circuit(8)
+    t = Target.from_configuration(
+        ["rz", "rx", "ry", "h", "cx"], coupling_map=CouplingMap.from_line(10)
+    )
+    for options in (
+        {"layout_trials": 2, "swap_trials": 3, "num_threads": 1},
+        {"layout_trials": "auto", "swap_trials": "auto"},
+    ):
+        result_circuit = compile(circuit, target_device=t, **options)
+        analysis_pass = CheckMap(t.build_coupling_map())
+        analysis_pass.run(circuit_to_dag(result_circuit))
+        assert analysis_pass.property_set["is_swap_mapped"]
+
+    compiler = UCCDefault1(
+        target_device=t, layout_trials="auto", swap_trials=3, num_threads=2
+    )
+    compiler.run(circuit)
+    assert compiler._sabre_layout.layout_trials == auto_trial_count(
+        circuit, num_threads=2
+    )
+    assert compiler._sabre_layout.swap_trials == 3
+    assert compiler._sabre_swap.trials == 3
+
+
+def test_auto_trial_count():
+    assert auto_trial_count(QiskitCircuit(4)) == 1
+    assert auto_trial_count(qcnn_circuit(4), num_threads=16) == 4
+    dense = random_clifford_circuit(10, 1)
+    assert auto_trial_count(dense, num_threads=1) == 20
+    assert auto_trial_count(dense, num_threads=8) == 24
+    # More threads than trials don't add trials
+    assert auto_trial_count(dense, num_threads=64) == 20
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"num_threads": 0},
+        {"num_threads": "auto"},
+        {"num_threads": 2.0},
+        {"layout_trials": -1},
+        {"swap_trials": "many"},
+        {"swap_trials": True},
+    ],
+)
+def test_invalid_trial_options(options):
+    with pytest.raises(ValueError, match="must be a positive int"):
+        compile(QiskitCircuit(2), **options)
+    with pytest.raises(ValueError, match="must be a positive int"):
+        UCCDefault1(**options)
+
+
 def test_custom_pass():
     """Verify that a custom pass works with a non-qiskit input circuit"""
 
@@ -109,3 +226,21 @@ def test_compiled_circuits_equivalent(circuit_function, num_qubits, seed):
     sv1 = Statevector(circuit)
     sv2 = Statevector(transpiled)
     assert sv1.equiv(sv2)
+
+
+def test_concurrent_compiles_from_threads():
+    circuits = [
+        circuit_function(num_qubits, seed)
+        for circuit_function in [qcnn_circuit, random_clifford_circuit]
+        for num_qubits in [5, 6, 7, 8]
+        for seed in [1, 326]
+    ]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        compiled = list(
+            executor.map(
+                lambda circuit: compile(circuit, return_format="qiskit"),
+                circuits,
+            )
+        )
+    for circuit, transpiled in zip(circuits, compiled):
+        assert Statevector(circuit).equiv(Statevector(transpiled))
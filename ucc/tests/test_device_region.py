@@ -0,0 +1,104 @@
+from qiskit import QuantumCircuit, transpile
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.quantum_info import Operator
+from qiskit.transpiler import CouplingMap, Target, TranspileLayout
+from qiskit.transpiler.passes.utils import CheckMap
+from benchmarks.scripts import qcnn_circuit, random_clifford_circuit
+from ucc import UCCDefault1
+from ucc.transpilers import ucc_defaults
+from ucc.transpilers.device_region import (
+    DeviceRegion,
+    EmbedDeviceRegion,
+    SelectDeviceRegion,
+    restrict_target,
+    select_region,
+)
+
+BASIS = ["rz", "rx", "ry", "h", "cx"]
+
+
+def _is_connected(coupling_map, qubits):
+    qubits = set(qubits)
+    edges = [e for e in coupling_map.get_edges() if set(e) <= qubits]
+    seen = {min(qubits)}
+    changed = True
+    while changed:
+        changed = False
+        for a, b in edges:
+            if (a in seen) != (b in seen):
+                seen |= {a, b}
+                changed = True
+    return seen == qubits
+
+
+def test_select_region_is_connected():
+    coupling_map = CouplingMap.from_heavy_hex(7)
+    for size in (1, 10, 30, coupling_map.size()):
+        region = select_region(coupling_map, size)
+        assert len(region) == size
+        assert region == sorted(region)
+        assert _is_connected(coupling_map, region)
+
+
+def test_restrict_target():
+    target = Target.from_configuration(
+        BASIS, coupling_map=CouplingMap.from_grid(3, 3)
+    )
+    region = [0, 1, 3, 4]
+    restricted = restrict_target(target, region)
+    assert restricted.num_qubits == 4
+    assert set(restricted.operation_names) == set(target.operation_names)
+    edges = {tuple(sorted(e)) for e in restricted.build_coupling_map()}
+    assert edges == {(0, 1), (0, 2), (1, 3), (2, 3)}
+
+
+def test_embed_device_region_keeps_circuit_equivalent():
+    target = Target.from_configuration(
+        BASIS, coupling_map=CouplingMap.from_grid(3, 3)
+    )
+    for circuit in (qcnn_circuit(4), random_clifford_circuit(5, 3)):
+        analysis_pass = SelectDeviceRegion(target)
+        analysis_pass.run(circuit_to_dag(circuit))
+        region = analysis_pass.property_set["device_region"]
+        assert isinstance(region, DeviceRegion)
+
+        mapped = transpile(circuit, target=region.target, seed_transpiler=3)
+        embed_pass = EmbedDeviceRegion()
+        property_set = embed_pass.property_set
+        property_set["device_region"] = region
+        property_set["layout"] = mapped.layout.initial_layout
+        property_set["original_qubit_indices"] = dict(
+            mapped.layout.input_qubit_mapping
+        )
+        property_set["final_layout"] = mapped.layout.final_layout
+
+        embedded = dag_to_circuit(embed_pass.run(circuit_to_dag(mapped)))
+        embedded._layout = TranspileLayout(
+            initial_layout=property_set["layout"],
+            input_qubit_mapping=property_set["original_qubit_indices"],
+            final_layout=property_set["final_layout"],
+            _input_qubit_count=circuit.num_qubits,
+            _output_qubit_list=embedded.qubits,
+        )
+        padded = QuantumCircuit(target.num_qubits)
+        padded.compose(circuit, range(circuit.num_qubits), inplace=True)
+        assert Operator.from_circuit(embedded).equiv(Operator(padded))
+
+
+def test_region_mapping_on_large_device(monkeypatch):
+    monkeypatch.setattr(ucc_defaults, "REGION_MAPPING_MIN_QUBITS", 100)
+    target = Target.from_configuration(
+        BASIS, coupling_map=CouplingMap.from_heavy_hex(7)
+    )
+    compiler = UCCDefault1(target_device=target)
+    assert compiler._region_mapping
+    compiled = compiler.run(qcnn_circuit(12))
+
+    assert compiled.num_qubits == target.num_qubits
+    analysis_pass = CheckMap(target.build_coupling_map())
+    analysis_pass.run(circuit_to_dag(compiled))
+    assert analysis_pass.property_set["is_swap_mapped"]
+    used = {
+        compiled.find_bit(q).index for i in compiled.data for q in i.qubits
+    }
+    assert _is_connected(target.build_coupling_map(), used)
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from qiskit import QuantumCircuit, qasm2, qpy
+from qiskit.circuit import Gate
+from qiskit.quantum_info import Operator
+from benchmarks.scripts import qcnn_circuit
+from ucc import compile
+from ucc.__main__ import main
+from ucc.emit import write_circuit
+
+
+def test_qasm2_output_matches_dumps():
+    circuit = qcnn_circuit(6)
+    circuit.measure_all()
+    sink = io.StringIO()
+    write_circuit(circuit, sink)
+    assert sink.getvalue() == qasm2.dumps(circuit) + "\n"
+
+    # Gates that need definitions are written in one piece
+    custom = QuantumCircuit(2)
+    definition = QuantumCircuit(2)
+    definition.cx(0, 1)
+    gate = Gate("custom", 2, [])
+    gate.definition = definition
+    custom.append(gate, [0, 1])
+    sink = io.StringIO()
+    write_circuit(custom, sink)
+    assert sink.getvalue() == qasm2.dumps(custom) + "\n"
+
+
+def test_compile_to_sink():
+    circuit = qcnn_circuit(6)
+    expected = compile(circuit)
+
+    sink = io.StringIO()
+    assert compile(qasm2.dumps(circuit), output=sink) is None
+    assert sink.getvalue() == qasm2.dumps(expected) + "\n"
+
+    sink = io.BytesIO()
+    compile(circuit, return_format="qpy", output=sink)
+    sink.seek(0)
+    assert qpy.load(sink)[0] == expected
+
+    with pytest.raises(ValueError):
+        compile(circuit, output=io.StringIO())
+
+
+def test_command_line(tmp_path):
+    circuit = qcnn_circuit(4)
+    source = tmp_path / "circuit.qasm"
+    source.write_text(qasm2.dumps(circuit))
+    for arguments in ([], ["--stream"]):
+        output = tmp_path / "compiled.qasm"
+        main([str(source), "-o", str(output), *arguments])
+        compiled = qasm2.loads(output.read_text())
+        assert Operator(compiled).equiv(Operator(circuit))
@@ -0,0 +1,45 @@
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Operator
+from benchmarks.scripts import random_clifford_circuit
+from ucc import CompileSession
+
+
+def _layers(circuit, size):
+    for start in range(0, len(circuit.data), size):
+        layer = circuit.copy_empty_like()
+        for instruction in circuit.data[start : start + size]:
+            layer.append(instruction)
+        yield layer
+
+
+def test_appending_matches_source():
+    circuit = random_clifford_circuit(4, 80)
+    session = CompileSession(QuantumCircuit(4), chunk_size=40, stitch_size=8)
+    for layer in _layers(circuit, 25):
+        compiled = session.append(layer)
+        assert Operator(compiled).equiv(Operator(session.source))
+    assert session.num_gates == len(circuit.data)
+    assert Operator(compiled).equiv(Operator(circuit))
+
+
+def test_edit_only_recompiles_affected_chunks():
+    circuit = random_clifford_circuit(4, 150)
+    session = CompileSession(circuit, chunk_size=30, stitch_size=5)
+    edit = QuantumCircuit(4)
+    edit.h(1)
+    edit.cx(1, 2)
+
+    for start, stop in ((40, 41), (30, 30), (0, 10)):
+        before = session.compiled_gate_count
+        compiled = session.replace(start, stop, edit)
+        assert Operator(compiled).equiv(Operator(session.source))
+        # The edited chunk (split in two if it grew past chunk_size) plus
+        # the seams next to it
+        assert session.compiled_gate_count - before <= 30 + 2 + 3 * 2 * 5
+
+    compiled = session.replace(5, 20)
+    assert Operator(compiled).equiv(Operator(session.source))
+
+    with pytest.raises(IndexError):
+        session.replace(0, session.num_gates + 1)
@@ -0,0 +1,53 @@
+from cirq import Circuit as CirqCircuit
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap, Target
+from qiskit.transpiler.passes.utils import CheckMap
+from benchmarks.scripts import (
+    generate_heavy_hex_coupling_list,
+    qcnn_circuit,
+    random_clifford_circuit,
+)
+from qbraid.transpiler import transpile
+from ucc import compile, compile_for_targets
+from ucc.metrics import count_multi_qubit_gates
+
+BASIS = ["rz", "rx", "ry", "h", "cx"]
+
+
+def _targets():
+    return [
+        Target.from_configuration(
+            BASIS,
+            coupling_map=CouplingMap(generate_heavy_hex_coupling_list(3)),
+        ),
+        Target.from_configuration(
+            BASIS, coupling_map=CouplingMap.from_line(12)
+        ),
+    ]
+
+
+def test_compile_for_targets_matches_compile():
+    circuit = qcnn_circuit(10)
+    targets = _targets()
+    results = compile_for_targets(circuit, targets)
+
+    assert list(results) == targets
+    for target, compiled in results.items():
+        analysis_pass = CheckMap(target.build_coupling_map())
+        analysis_pass.run(circuit_to_dag(compiled))
+        assert analysis_pass.property_set["is_swap_mapped"]
+
+        expected = compile(circuit, target_device=target)
+        assert count_multi_qubit_gates(compiled) == count_multi_qubit_gates(
+            expected
+        )
+
+
+def test_compile_for_targets_keys_and_format():
+    circuit = transpile(random_clifford_circuit(6, 1), "cirq")
+    heavy_hex, line = _targets()
+    results = compile_for_targets(
+        circuit, {"heavy_hex": heavy_hex, "line": line}, max_workers=1
+    )
+    assert set(results) == {"heavy_hex", "line"}
+    assert all(isinstance(c, CirqCircuit) for c in results.values())
@@ -0,0 +1,101 @@
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import CXGate
+from qiskit.converters import circuit_to_dag
+from qiskit.quantum_info import Statevector
+from qiskit.transpiler import CouplingMap, Target
+from qiskit.transpiler.passes.utils import CheckMap
+from benchmarks.scripts import qcnn_circuit, random_clifford_circuit
+from ucc import compile
+from ucc.portfolio import DEFAULT_VARIANTS, MAPPING_VARIANTS
+
+
+def test_portfolio_picks_best_variant():
+    circuit = random_clifford_circuit(6, 326)
+    report = {}
+    compiled = compile(
+        circuit, return_format="qiskit", strategy="portfolio", report=report
+    )
+
+    assert report["strategy"] == "portfolio"
+    assert set(report["variants"]) == set(DEFAULT_VARIANTS)
+    completed = {
+        name: summary
+        for name, summary in report["variants"].items()
+        if summary["status"] == "completed"
+    }
+    winner = completed[report["winner"]]
+    assert all(
+        winner["multiq_gates"] <= summary["multiq_gates"]
+        for summary in completed.values()
+    )
+    assert Statevector(circuit).equiv(Statevector(compiled))
+
+
+def test_portfolio_with_target_device():
+    circuit = qcnn_circuit(4)
+    t = Target(num_qubits=4)
+    t.add_instruction(
+        CXGate(), {edge: None for edge in CouplingMap.from_line(4).get_edges()}
+    )
+    report = {}
+    compiled = compile(
+        circuit,
+        target_device=t,
+        strategy="portfolio",
+        strategy_options={"metric": "depth"},
+        report=report,
+    )
+
+    assert set(report["variants"]) == set(DEFAULT_VARIANTS) | set(
+        MAPPING_VARIANTS
+    )
+    analysis_pass = CheckMap(t.build_coupling_map())
+    analysis_pass.run(circuit_to_dag(compiled))
+    assert analysis_pass.property_set["is_swap_mapped"]
+
+
+def test_portfolio_deadline_cancels_slow_variants():
+    circuit = qcnn_circuit(8)
+    report = {}
+    compile(
+        circuit,
+        strategy="portfolio",
+        strategy_options={
+            "variants": {
+                "fast": {},
+                "slow": {"local_iterations": 200},
+            },
+            "deadline": 0,
+        },
+        report=report,
+    )
+    assert report["winner"] == "fast"
+    assert report["variants"]["slow"]["status"] == "cancelled"
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown compilation strategy"):
+        compile(QuantumCircuit(1), strategy="fastest")
+
+
+def test_portfolio_cancels_variants_once_result_is_final():
+    circuit = QuantumCircuit(4)
+    for _ in range(10):
+        circuit.h(range(4))
+    report = {}
+    compile(
+        circuit,
+        strategy="portfolio",
+        strategy_options={
+            "variants": {
+                "fast": {},
+                "slow": {"local_iterations": 200},
+            },
+        },
+        report=report,
+    )
+    assert report["winner"] == "fast"
+    assert report["variants"]["fast"]["multiq_gates"] == 0
+    assert report["variants"]["fast"]["depth"] == 0
+    assert report["variants"]["slow"]["status"] == "cancelled"
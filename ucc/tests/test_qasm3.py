@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from qbraid.transpiler import ProgramConversionError
+from qiskit import qasm3 as qiskit_qasm3
+from qiskit.quantum_info import Operator
+from ucc import compile, qasm3
+
+HEADER = """OPENQASM 3.0;
+include "stdgates.inc";
+input float[64] θ;
+qubit[3] q;
+bit[3] c;
+qreg r[1];
+"""
+GATES = """h q[0];
+rz(2*θ + pi/4) q[1];
+for int i in [0:1] {
+    cx q[i], q[i + 1];
+    rx(-θ / (i + 1)) q[i];
+}
+for uint j in {2, 0} { U(0.1, 0.2, θ - 1) q[j]; }
+cphase(pi) q[2], r[0];
+"""
+# The general importer cannot index registers with loop variables
+UNROLLED_GATES = """h q[0];
+rz(2*θ + pi/4) q[1];
+cx q[0], q[1];
+rx(-θ / 1) q[0];
+cx q[1], q[2];
+rx(-θ / 2) q[1];
+U(0.1, 0.2, θ - 1) q[2];
+U(0.1, 0.2, θ - 1) q[0];
+cphase(pi) q[2], r[0];
+"""
+NON_UNITARY = """barrier q;
+reset r;
+c[0] = measure q[0];
+measure q -> c;
+"""
+PROGRAM = HEADER + GATES + NON_UNITARY
+
+
+def test_loads_matches_general_importer():
+    circuit = qasm3.loads(HEADER + GATES)
+    expected = qiskit_qasm3.loads(HEADER + UNROLLED_GATES)
+    assert [p.name for p in circuit.parameters] == ["θ"]
+    assert circuit.count_ops() == expected.count_ops()
+    circuit = circuit.assign_parameters([0.3])
+    expected = expected.assign_parameters([0.3])
+    assert Operator(circuit).equiv(Operator(expected))
+
+    circuit = qasm3.loads(HEADER + "rz(sqrt(2) * sin(pi / 2)) q[0];\n")
+    assert circuit.data[0].operation.params[0] == pytest.approx(2**0.5)
+
+    operations = [i.operation.name for i in qasm3.loads(PROGRAM).data]
+    assert operations[-6:] == ["barrier", "reset"] + ["measure"] * 4
+
+
+def test_load_from_file_object():
+    circuit = qasm3.load(io.StringIO(PROGRAM))
+    assert circuit.num_qubits == 4
+    assert circuit.num_clbits == 3
+
+
+def test_unsupported_programs():
+    for program in (
+        'OPENQASM 3.0;\ninclude "stdgates.inc";\nqubit[2] q;\n'
+        "gate bell a, b { h a; cx a, b; }\nbell q[0], q[1];\n",
+        "OPENQASM 3.0;\nqubit[1] q;\nif (true) { x q[0]; }\n",
+        'OPENQASM 3.0;\ninclude "other.inc";\n',
+        # Indices past the end of a register, or of a single qubit or bit
+        'OPENQASM 3.0;\ninclude "stdgates.inc";\nqubit[2] q;\nh q[5];\n',
+        'OPENQASM 3.0;\ninclude "stdgates.inc";\nqubit q;\nh q[0];\n',
+        'OPENQASM 3.0;\ninclude "stdgates.inc";\nbit c;\nh c[0];\n',
+        "OPENQASM 3.0;\nqubit q;\nbit c;\nc[0] = measure q;\n",
+    ):
+        with pytest.raises(qasm3.QASM3UnsupportedError):
+            qasm3.loads(program)
+
+
+def test_compile_falls_back_to_general_importer():
+    program = (
+        'OPENQASM 3.0;\ninclude "stdgates.inc";\nqubit[2] q;\n'
+        "ctrl @ x q[0], q[1];\nh q[0];\n"
+    )
+    compiled = compile(program, return_format="qiskit")
+    assert Operator(compiled).equiv(Operator(qiskit_qasm3.loads(program)))
+
+    # Invalid programs get the diagnostic of the general importer
+    with pytest.raises(ProgramConversionError):
+        compile(
+            'OPENQASM 3.0;\ninclude "stdgates.inc";\nqubit[2] q;\nh q[5];\n'
+        )
@@ -0,0 +1,136 @@
+import os
+
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap, InstructionProperties, Target
+from qiskit.transpiler.basepasses import TransformationPass
+from qiskit.transpiler.passes.utils import CheckMap
+from benchmarks.scripts import qcnn_circuit
+from ucc import StageCache, UCCDefault1, compile
+
+BASIS = ["rz", "rx", "ry", "h", "cx"]
+
+
+def _line_target(num_qubits=12):
+    return Target.from_configuration(
+        BASIS, coupling_map=CouplingMap.from_line(num_qubits)
+    )
+
+
+def _is_mapped(circuit, target):
+    analysis_pass = CheckMap(target.build_coupling_map())
+    analysis_pass.run(circuit_to_dag(circuit))
+    return analysis_pass.property_set["is_swap_mapped"]
+
+
+def test_staged_run_matches_pass_manager_run():
+    circuit = qcnn_circuit(8)
+    for target in (None, _line_target()):
+        expected = UCCDefault1(target_device=target).run(circuit)
+        cache = StageCache()
+        for expected_resume in (None, "final-basis"):
+            compiler = UCCDefault1(target_device=target)
+            compiled = compiler.run(circuit, stage_cache=cache)
+            assert compiler.resumed_from == expected_resume
+            assert compiled == expected
+            assert compiled.layout == expected.layout
+
+
+def test_routing_change_reuses_local_optimization():
+    circuit = qcnn_circuit(8)
+    target = _line_target()
+    cache = StageCache()
+    UCCDefault1(target_device=target).run(circuit, stage_cache=cache)
+
+    compiler = UCCDefault1(target_device=target, seed=5)
+    compiled = compiler.run(circuit, stage_cache=cache)
+    assert compiler.resumed_from == "local-opt"
+    assert _is_mapped(compiled, target)
+    assert compiled == UCCDefault1(target_device=target, seed=5).run(circuit)
+
+    # A different circuit shares nothing
+    other = qcnn_circuit(6)
+    compiler = UCCDefault1(target_device=target)
+    compiler.run(other, stage_cache=cache)
+    assert compiler.resumed_from is None
+
+
+def test_calibration_change_reruns_mapping():
+    circuit = qcnn_circuit(8)
+    cache = StageCache()
+    first = _line_target()
+    UCCDefault1(target_device=first).run(circuit, stage_cache=cache)
+
+    # Same coupling map, different error rates
+    recalibrated = _line_target()
+    for i, edge in enumerate(CouplingMap.from_line(12).get_edges()):
+        recalibrated.update_instruction_properties(
+            "cx", edge, InstructionProperties(error=0.001 * (i + 1))
+        )
+    compiler = UCCDefault1(target_device=recalibrated)
+    compiler.run(circuit, stage_cache=cache)
+    assert compiler.resumed_from == "local-opt"
+
+    compiler = UCCDefault1(target_device=_line_target())
+    compiler.run(circuit, stage_cache=cache)
+    assert compiler.resumed_from == "final-basis"
+
+
+def test_directory_cache_is_shared(tmp_path):
+    circuit = qcnn_circuit(6)
+    first = StageCache(str(tmp_path))
+    expected = UCCDefault1().run(circuit, stage_cache=first)
+    # No target device: only translate, local-opt and final-basis are stored
+    assert len(os.listdir(tmp_path)) == 3
+
+    compiler = UCCDefault1()
+    compiled = compiler.run(circuit, stage_cache=StageCache(str(tmp_path)))
+    assert compiler.resumed_from == "final-basis"
+    assert compiled == expected
+
+    first.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_custom_passes_run_after_resume():
+    class CountRuns(TransformationPass):
+        runs = 0
+
+        def run(self, dag):
+            CountRuns.runs += 1
+            return dag
+
+    circuit = qcnn_circuit(6)
+    cache = StageCache()
+    report = {}
+    for _ in range(2):
+        compile(
+            circuit,
+            custom_passes=[CountRuns()],
+            stage_cache=cache,
+            report=report,
+        )
+    assert CountRuns.runs == 2
+    assert report["resumed_from"] == "final-basis"
+
+
+def test_stage_cache_with_anonymous_bits():
+    # Bits without registers are compared by identity, so the DAG and the
+    # layouts must come back from the cache sharing the same bit objects
+    circuit = QuantumCircuit(QuantumCircuit(3).qubits)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.cx(1, 2)
+    circuit.cx(0, 2)
+    target = _line_target(5)
+    cache = StageCache()
+    expected = UCCDefault1(target_device=target).run(
+        circuit, stage_cache=cache
+    )
+    compiled = UCCDefault1(target_device=target).run(
+        circuit, stage_cache=cache
+    )
+    assert _is_mapped(compiled, target)
+    assert compiled.layout.initial_index_layout() == (
+        expected.layout.initial_index_layout()
+    )
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+from qiskit import qasm2
+from qiskit.quantum_info import Operator
+from benchmarks.scripts import random_clifford_circuit
+from ucc.streaming import StreamCompiler, _statements, compile_qasm_stream
+
+
+def test_stream_compiler_matches_circuit():
+    circuit = random_clifford_circuit(4, 120)
+    compiler = StreamCompiler(circuit, window_size=40, overlap=10)
+    compiled = circuit.copy_empty_like()
+    for instruction in compiler.compile(iter(circuit.data)):
+        compiled.append(instruction)
+    compiled.global_phase = compiler.global_phase
+    assert Operator(compiled).equiv(Operator(circuit))
+
+
+def test_compile_qasm_stream():
+    program = """OPENQASM 2.0;
+include "qelib1.inc";
+qreg q[3];
+creg c[3];
+h q[0]; // a comment; with a semicolon
+cx q[0], q[1];
+cx q[1], q[2]; h q[2];
+h q[2];
+rz(pi/4) q[0];
+"""
+    sink = io.StringIO()
+    phase = compile_qasm_stream(
+        io.StringIO(program), sink, window_size=2, overlap=1
+    )
+    compiled = qasm2.loads(sink.getvalue())
+    compiled.global_phase = phase
+    expected = qasm2.loads(program)
+    assert Operator(compiled).equiv(Operator(expected))
+
+    # Gates in different windows cancel through the overlap
+    sink = io.StringIO()
+    header = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[1];\n'
+    compile_qasm_stream(
+        io.StringIO(header + "h q[0];\nh q[0];\n"),
+        sink,
+        window_size=1,
+        overlap=5,
+    )
+    assert not qasm2.loads(sink.getvalue()).data
+
+    with pytest.raises(ValueError):
+        compile_qasm_stream(
+            io.StringIO(program + "qreg r[1];\n"), io.StringIO(), 2, 1
+        )
+
+
+def test_statements_keep_gate_definitions_whole():
+    lines = ["gate bell a, b {\n", "  h a; cx a, b;\n", "}\n", "h q[0];\n"]
+    assert list(_statements(lines)) == [
+        "gate bell a, b {\n  h a; cx a, b;\n}",
+        "h q[0];",
+    ]
@@ -0,0 +1,86 @@
+import cirq
+import pytest
+from qbraid.transpiler import transpile
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Operator
+from ucc import compile, translation
+from ucc.translation import (
+    conversion_path,
+    conversion_stats,
+    reset_conversion_stats,
+    translate,
+)
+
+
+def test_translate_matches_qbraid():
+    circuit = QuantumCircuit(2)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.rz(0.3, 1)
+
+    program = translate(circuit, "qasm2")
+    assert program == transpile(circuit, "qasm2")
+    assert translate(program, "qasm2") is program
+
+    cirq_circuit = translate(circuit, "cirq")
+    assert isinstance(cirq_circuit, cirq.Circuit)
+    assert Operator(translate(cirq_circuit, "qiskit")).equiv(circuit)
+
+
+def test_conversion_path_is_cached(monkeypatch):
+    path = conversion_path("qiskit", "cirq")
+    assert path[0][0] == "qiskit" and path[-1][1] == "cirq"
+    # Consecutive hops connect
+    assert all(a[1] == b[0] for a, b in zip(path, path[1:]))
+
+    # Later calls do not search the graph again
+    monkeypatch.setattr(translation, "_resolve", None)
+    assert conversion_path("qiskit", "cirq") == path
+    monkeypatch.undo()
+    assert conversion_path("qiskit", "not a format") is None
+
+
+def test_conversion_stats_and_report():
+    reset_conversion_stats()
+    circuit = QuantumCircuit(2)
+    circuit.cx(0, 1)
+    timings = []
+    translate(circuit, "cirq", timings)
+    translate(circuit, "cirq")
+
+    assert [hop[:2] for hop in timings] == conversion_path("qiskit", "cirq")
+    stats = conversion_stats()
+    for hop in conversion_path("qiskit", "cirq"):
+        assert stats[hop]["calls"] == 2
+        assert stats[hop]["total_time"] >= 0
+    reset_conversion_stats()
+    assert conversion_stats() == {}
+
+    report = {}
+    compile(cirq.Circuit(cirq.CNOT(*cirq.LineQubit.range(2))), report=report)
+    hops = [hop[:2] for hop in report["conversion_times"]]
+    assert hops == conversion_path("cirq", "qiskit") + conversion_path(
+        "qiskit", "cirq"
+    )
+
+
+def test_translate_falls_back_to_qbraid(monkeypatch):
+    circuit = QuantumCircuit(1)
+    circuit.x(0)
+    conversion_path("qiskit", "qasm2")
+
+    def broken(program):
+        program.h(0)
+        raise RuntimeError("converter failed")
+
+    monkeypatch.setitem(
+        translation._paths,
+        ("qiskit", "qasm2"),
+        (("qiskit", "qasm2", broken),),
+    )
+    assert translate(circuit, "qasm2") == transpile(circuit, "qasm2")
+    # The failed converter only modified a copy
+    assert circuit.count_ops() == {"x": 1}
+
+    with pytest.raises(Exception):
+        translate(object(), "qasm2")
@@ -0,0 +1,132 @@
+"""Cached conversion paths between circuit formats.
+
+``qbraid.transpiler.transpile`` builds a ``ConversionGraph`` and searches
+it for conversion paths on every call, which costs more than the conversion
+itself for small circuits. :func:`translate` resolves the chain of
+converters for each (source, target) pair once and then calls the
+converters directly. The time spent in each hop is recorded and available
+from :func:`conversion_stats`.
+
+As with ``transpile``, converters run on a copy of the program, so the
+caller's program is never modified. If a converter fails, the conversion is
+retried with qBraid's ``transpile``, which tries alternative paths.
+"""
+
+import copy
+import threading
+from time import perf_counter
+
+from qbraid.programs.alias_manager import get_program_type_alias
+from qbraid.transpiler import ConversionGraph, transpile
+
+_lock = threading.Lock()
+_graph = None
+# (source, target) -> tuple of (hop source, hop target, converter), or None
+# if qBraid has no path
+_paths = {}
+# (hop source, hop target) -> [number of calls, total seconds]
+_hop_stats = {}
+
+
+def _conversion_graph():
+    global _graph
+    if _graph is None:
+        _graph = ConversionGraph()
+    return _graph
+
+
+def _resolve(source, target):
+    graph = _conversion_graph()
+    if not (
+        graph.has_node(source)
+        and graph.has_node(target)
+        and graph.has_path(source, target)
+    ):
+        return None
+    # Each converter is a bound method of the qBraid Conversion of its hop
+    return tuple(
+        (convert.__self__.source, convert.__self__.target, convert)
+        for convert in graph.find_shortest_conversion_path(source, target)
+    )
+
+
+def conversion_path(source, target):
+    """Returns the chain of conversions used from ``source`` to ``target``.
+
+    Args:
+        source (str): The format of the program, e.g. "cirq".
+        target (str): The format to convert to.
+
+    Returns:
+        list[tuple[str, str]]: The (source, target) pair of each hop, or None
+        if qBraid has no conversion path.
+    """
+    key = (source, target)
+    with _lock:
+        if key not in _paths:
+            _paths[key] = _resolve(source, target)
+        hops = _paths[key]
+    if hops is None:
+        return None
+    return [(hop_source, hop_target) for hop_source, hop_target, _ in hops]
+
+
+def translate(program, target, timings=None):
+    """Converts ``program`` to the ``target`` format along a cached path.
+
+    The program is copied before it is converted, so converters that modify
+    their input leave ``program`` unchanged.
+
+    Args:
+        program (object): The program, in any format known to qBraid.
+        target (str): The format to convert to.
+        timings (list): (optional) Appended with a ``(source, target,
+            seconds)`` tuple for each hop.
+
+    Returns:
+        object: The program in the ``target`` format.
+    """
+    source = get_program_type_alias(program)
+    if source == target:
+        return program
+    conversion_path(source, target)
+    hops = _paths[(source, target)]
+    if hops is None:
+        # Let qBraid raise its error for unknown formats or missing paths
+        return transpile(program, target)
+
+    converted = copy.deepcopy(program)
+    try:
+        for hop_source, hop_target, convert in hops:
+            t1 = perf_counter()
+            converted = convert(converted)
+            elapsed = perf_counter() - t1
+            with _lock:
+                stats = _hop_stats.setdefault((hop_source, hop_target), [0, 0])
+                stats[0] += 1
+                stats[1] += elapsed
+            if timings is not None:
+                timings.append((hop_source, hop_target, elapsed))
+    except Exception:
+        return transpile(program, target)
+    return converted
+
+
+def conversion_stats():
+    """Returns how often each conversion hop ran and how long it took.
+
+    Returns:
+        dict[tuple[str, str], dict]: For each (source, target) hop, the
+        number of ``calls`` and their ``total_time`` in seconds.
+    """
+    with _lock:
+        return {
+            hop: {"calls": calls, "total_time": total_time}
+            for hop, (calls, total_time) in _hop_stats.items()
+        }
+
+
+def reset_conversion_stats():
+    """Clears the statistics returned by :func:`conversion_stats`."""
+    with _lock:
+        _hop_stats.clear()
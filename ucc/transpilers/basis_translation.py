@@ -0,0 +1,303 @@
+"""Precomputed basis-translation rules, cached per target basis.
+
+``BasisTranslator`` searches the equivalence graph of the
+``SessionEquivalenceLibrary`` on every run, although for a fixed target basis
+the resulting rules never change. This module runs that search once per
+target basis, stores the composed rule for each gate (gate -> circuit already
+in the target basis) in a small ``EquivalenceLibrary`` and reuses it for all
+subsequent translations. The rule sets can be written to disk so that new
+processes start warm, either explicitly via :func:`save_translation_cache` /
+:func:`load_translation_cache` or by pointing the ``UCC_TRANSLATION_CACHE``
+environment variable at a file.
+
+Cache files are pickles, and loading one can run arbitrary code, so only load
+files you wrote yourself and only point ``UCC_TRANSLATION_CACHE`` at a
+location other users can't write to.
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import weakref
+from collections import Counter
+
+from qiskit import __version__ as qiskit_version
+from qiskit.circuit import ParameterExpression, QuantumCircuit
+from qiskit.circuit.equivalence import EquivalenceLibrary
+from qiskit.circuit.equivalence_library import (
+    SessionEquivalenceLibrary as sel,
+)
+from qiskit.circuit.library import get_standard_gate_name_mapping
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.transpiler.basepasses import TransformationPass
+from qiskit.transpiler.exceptions import TranspilerError
+from qiskit.transpiler.passes import BasisTranslator
+
+
+CACHE_ENV_VAR = "UCC_TRANSLATION_CACHE"
+
+# Instructions BasisTranslator passes through untouched
+_BASIC_INSTRUCTIONS = {"measure", "reset", "barrier", "snapshot", "delay"}
+
+# Equivalence libraries are mutably borrowed by the Rust translation code, so
+# concurrent translations sharing a library must not overlap. Anything that
+# touches a shared library or the cache below holds this lock.
+_LIBRARY_LOCK = threading.RLock()
+
+# Maps (target basis, library fingerprint) -> precomputed EquivalenceLibrary
+_TRANSLATION_CACHE = {}
+_loaded_env_cache = False
+
+# Maps equivalence library -> (rule sizes, rule contents fingerprint)
+_LIBRARY_FINGERPRINTS = weakref.WeakKeyDictionary()
+
+# Per-thread private copies of the cached libraries, so that translations in
+# different threads never contend for the lock
+_thread_local = threading.local()
+
+
+def _bound_value(param, values):
+    if isinstance(param, ParameterExpression):
+        return complex(param.bind({p: values[p] for p in param.parameters}))
+    return param
+
+
+def _rule_fingerprint(edge):
+    # Parameters are bound to fixed values, so that the fingerprint is the
+    # same in every process, unlike the names and ids of the parameters
+    rule = edge.rule
+    values = {param: 0.1 + 0.37 * i for i, param in enumerate(rule.params)}
+    circuit = rule.circuit
+    return repr(
+        (
+            edge.source.name,
+            edge.source.num_qubits,
+            _bound_value(circuit.global_phase, values),
+            [
+                (
+                    instruction.operation.name,
+                    [circuit.find_bit(q).index for q in instruction.qubits],
+                    [
+                        _bound_value(param, values)
+                        for param in instruction.operation.params
+                    ],
+                )
+                for instruction in circuit.data
+            ],
+        )
+    )
+
+
+def _library_fingerprint(equivalence_library):
+    """Hashes the rules of ``equivalence_library``.
+
+    Hashing every rule takes longer than a small compilation, so the hash is
+    kept and only recomputed when the number or size of the rules of a gate
+    changes, as with ``add_equivalence``. Replacing rules with ``set_entry``
+    by rules of the same size isn't noticed; call
+    :func:`clear_translation_cache` afterwards.
+    """
+    edges = equivalence_library.graph.edges()
+    sizes = Counter(
+        (edge.source.name, edge.source.num_qubits, edge.num_gates)
+        for edge in edges
+    )
+    cached = _LIBRARY_FINGERPRINTS.get(equivalence_library)
+    if cached is not None and cached[0] == sizes:
+        return cached[1]
+    digest = hashlib.sha256(
+        "\n".join(sorted(_rule_fingerprint(edge) for edge in edges)).encode()
+    ).hexdigest()
+    _LIBRARY_FINGERPRINTS[equivalence_library] = (sizes, digest)
+    return digest
+
+
+def _cache_key(target_basis, equivalence_library):
+    return (
+        tuple(sorted(target_basis)),
+        _library_fingerprint(equivalence_library),
+    )
+
+
+def build_translation_library(target_basis, equivalence_library=sel):
+    """Computes the composed translation rule of every standard gate in
+    ``equivalence_library`` to ``target_basis``.
+
+    Args:
+        target_basis (list[str]): Gate names to translate to.
+        equivalence_library (EquivalenceLibrary): Library to search.
+
+    Returns:
+        EquivalenceLibrary: One rule per translatable gate, each mapping
+        directly onto gates in ``target_basis``.
+    """
+    translator = BasisTranslator(equivalence_library, target_basis)
+    gate_mapping = get_standard_gate_name_mapping()
+    library = EquivalenceLibrary()
+    for key in equivalence_library.keys():
+        gate = gate_mapping.get(key.name)
+        if (
+            key.name in target_basis
+            or gate is None
+            or gate.num_qubits != key.num_qubits
+        ):
+            continue
+        circuit = QuantumCircuit(gate.num_qubits)
+        circuit.append(gate, range(gate.num_qubits))
+        try:
+            translated = translator.run(circuit_to_dag(circuit))
+        except TranspilerError:
+            # Not reachable from this basis, leave it to the full search
+            continue
+        library.add_equivalence(gate, dag_to_circuit(translated))
+    return library
+
+
+def get_translation_library(target_basis, equivalence_library=sel):
+    """Returns the cached translation library for ``target_basis``, building
+    it on first use.
+
+    If the ``UCC_TRANSLATION_CACHE`` environment variable is set, the file it
+    points to is loaded before the first build, and rewritten whenever a new
+    rule set is built.
+
+    Args:
+        target_basis (list[str]): Gate names to translate to.
+        equivalence_library (EquivalenceLibrary): Library to search.
+
+    Returns:
+        EquivalenceLibrary: The precomputed rule set.
+    """
+    with _LIBRARY_LOCK:
+        return _get_translation_library(target_basis, equivalence_library)
+
+
+def _get_translation_library(target_basis, equivalence_library):
+    global _loaded_env_cache
+    key = _cache_key(target_basis, equivalence_library)
+    library = _TRANSLATION_CACHE.get(key)
+    if library is not None:
+        return library
+
+    cache_path = os.getenv(CACHE_ENV_VAR)
+    if cache_path and not _loaded_env_cache:
+        _loaded_env_cache = True
+        if os.path.exists(cache_path):
+            load_translation_cache(cache_path)
+        library = _TRANSLATION_CACHE.get(key)
+        if library is not None:
+            return library
+
+    library = build_translation_library(target_basis, equivalence_library)
+    _TRANSLATION_CACHE[key] = library
+    if cache_path:
+        save_translation_cache(cache_path)
+    return library
+
+
+def _thread_copy(library):
+    copies = getattr(_thread_local, "copies", None)
+    if copies is None:
+        copies = _thread_local.copies = {}
+    entry = copies.get(id(library))
+    if entry is None or entry[0] is not library:
+        with _LIBRARY_LOCK:
+            entry = (library, copy.deepcopy(library))
+        copies[id(library)] = entry
+    return entry[1]
+
+
+def save_translation_cache(path):
+    """Writes all in-memory translation rule sets to ``path``.
+
+    Args:
+        path (str): File to write to.
+    """
+    with _LIBRARY_LOCK, open(path, "wb") as f:
+        pickle.dump(
+            {"qiskit_version": qiskit_version, "cache": _TRANSLATION_CACHE}, f
+        )
+
+
+def load_translation_cache(path):
+    """Loads translation rule sets written by :func:`save_translation_cache`
+    into memory. Files written by a different Qiskit version are ignored.
+
+    The file is unpickled, which can run arbitrary code, so it must come
+    from a trusted source.
+
+    Args:
+        path (str): File to read from.
+
+    Returns:
+        bool: Whether the file was loaded.
+    """
+    with open(path, "rb") as f:
+        contents = pickle.load(f)
+    if contents.get("qiskit_version") != qiskit_version:
+        return False
+    with _LIBRARY_LOCK:
+        _TRANSLATION_CACHE.update(contents["cache"])
+    return True
+
+
+def clear_translation_cache():
+    """Drops all in-memory translation rule sets."""
+    with _LIBRARY_LOCK:
+        _TRANSLATION_CACHE.clear()
+        _LIBRARY_FINGERPRINTS.clear()
+
+
+class CachedBasisTranslator(TransformationPass):
+    """Translates gates to a target basis with the precomputed rule set from
+    :func:`get_translation_library` instead of searching the full equivalence
+    graph. Circuits containing gates not covered by the rule set fall back to
+    a regular ``BasisTranslator`` over the full library.
+
+    Each thread translates with its own copy of the rule set, so concurrent
+    compilations only serialize on the (rare) fallback path."""
+
+    def __init__(
+        self, equivalence_library, target_basis, target=None, min_qubits=0
+    ):
+        """
+        Args:
+            equivalence_library (EquivalenceLibrary): The full equivalence
+                library, used to build the rule set and as a fallback.
+            target_basis (list[str]): Target basis names to unroll to.
+            target (Target): The backend compilation target
+            min_qubits (int): The minimum number of qubits for operations in
+                the input dag to translate.
+        """
+        super().__init__()
+        self._target_basis = target_basis
+        self._target = target
+        self._min_qubits = min_qubits
+        self._cached_library = get_translation_library(
+            target_basis, equivalence_library
+        )
+        self._covered = set(target_basis) | _BASIC_INSTRUCTIONS
+        with _LIBRARY_LOCK:
+            self._covered.update(
+                key.name for key in self._cached_library.keys()
+            )
+        self._full_translator = BasisTranslator(
+            equivalence_library,
+            target_basis,
+            target=target,
+            min_qubits=min_qubits,
+        )
+
+    def run(self, dag):
+        if set(dag.count_ops(recurse=False)) <= self._covered:
+            translator = BasisTranslator(
+                _thread_copy(self._cached_library),
+                self._target_basis,
+                target=self._target,
+                min_qubits=self._min_qubits,
+            )
+            return translator.run(dag)
+        with _LIBRARY_LOCK:
+            return self._full_translator.run(dag)
@@ -0,0 +1,308 @@
+"""Mapping onto a region of a large device.
+
+On devices with thousands of qubits, running Sabre and VF2 on the whole
+coupling graph costs time and memory that grow with the device (Sabre builds a
+dense distance matrix over all physical qubits), even if the circuit only
+uses a few of them. In region mapping, :class:`SelectDeviceRegion` picks a
+connected, well-connected set of physical qubits slightly larger than the
+circuit. The layout and routing passes then run on a ``Target`` restricted to
+that region (see :class:`OnDeviceRegion`), and :class:`EmbedDeviceRegion`
+places the mapped circuit back onto the full device.
+"""
+
+import heapq
+import math
+from collections import deque
+from typing import NamedTuple
+
+from qiskit.circuit import QuantumRegister
+from qiskit.dagcircuit import DAGCircuit
+from qiskit.transpiler import Layout, Target
+from qiskit.transpiler.basepasses import AnalysisPass, TransformationPass
+from qiskit.transpiler.exceptions import TranspilerError
+
+
+class DeviceRegion(NamedTuple):
+    """A set of physical qubits of a device and the target restricted to it.
+
+    Qubit ``i`` of ``target`` is physical qubit ``qubits[i]`` of the device.
+    """
+
+    qubits: list
+    target: Target
+    num_device_qubits: int
+
+
+def _neighbors(coupling_map):
+    neighbors = {node: set() for node in coupling_map.physical_qubits}
+    for a, b in coupling_map.get_edges():
+        neighbors[a].add(b)
+        neighbors[b].add(a)
+    return neighbors
+
+
+def _bfs_distances(neighbors, source):
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbor in neighbors[node]:
+            if neighbor not in distances:
+                distances[neighbor] = distances[node] + 1
+                queue.append(neighbor)
+    return distances
+
+
+def _central_node(neighbors):
+    # Double sweep: the middle of a longest shortest path found from an
+    # arbitrary node approximates the center of the graph in O(V + E)
+    start = max(neighbors, key=lambda node: len(neighbors[node]))
+    distances = _bfs_distances(neighbors, start)
+    a = max(distances, key=distances.get)
+    distances_a = _bfs_distances(neighbors, a)
+    b = max(distances_a, key=distances_a.get)
+    distances_b = _bfs_distances(neighbors, b)
+    length = distances_a[b]
+    return min(
+        (node for node in distances_a if node in distances_b),
+        key=lambda node: (
+            abs(distances_a[node] - length / 2)
+            + abs(distances_b[node] - length / 2),
+            node,
+        ),
+    )
+
+
+def select_region(coupling_map, num_qubits):
+    """Selects ``num_qubits`` connected physical qubits around the center of
+    the coupling graph.
+
+    The region is grown greedily from the center, always adding the qubit
+    with the most couplings into the region (ties go to the qubit closest to
+    the center), which keeps the region compact. Only adjacency lists and
+    breadth-first searches are used, so the cost is linear in the size of
+    the device.
+
+    Args:
+        coupling_map (qiskit.transpiler.CouplingMap): The device connectivity.
+        num_qubits (int): The number of physical qubits to select.
+
+    Returns:
+        list[int]: The selected physical qubits, sorted. All qubits of the
+        device if the connected part around the center is too small.
+    """
+    neighbors = _neighbors(coupling_map)
+    if num_qubits >= len(neighbors):
+        return sorted(neighbors)
+    center = _central_node(neighbors)
+    distances = _bfs_distances(neighbors, center)
+    if len(distances) < num_qubits:
+        return sorted(neighbors)
+
+    region = {center}
+    links = {}
+    heap = []
+    node = center
+    while len(region) < num_qubits:
+        for neighbor in neighbors[node]:
+            if neighbor not in region:
+                links[neighbor] = links.get(neighbor, 0) + 1
+                heapq.heappush(
+                    heap, (-links[neighbor], distances[neighbor], neighbor)
+                )
+        while True:
+            negative_links, _, node = heapq.heappop(heap)
+            # Skip entries that are outdated or already in the region
+            if node not in region and -negative_links == links[node]:
+                break
+        region.add(node)
+    return sorted(region)
+
+
+def restrict_target(target, qubits):
+    """Returns the target restricted to ``qubits``, relabelled so that qubit
+    ``i`` of the result is ``qubits[i]``.
+
+    Instructions keep their properties; those acting on qubits outside the
+    region are dropped.
+
+    Args:
+        target (qiskit.transpiler.Target): The device target.
+        qubits (list[int]): The physical qubits to keep.
+
+    Returns:
+        qiskit.transpiler.Target: The restricted target.
+    """
+    index = {qubit: i for i, qubit in enumerate(qubits)}
+    qubit_properties = None
+    if target.qubit_properties is not None:
+        qubit_properties = [target.qubit_properties[q] for q in qubits]
+    restricted = Target(
+        num_qubits=len(qubits),
+        dt=target.dt,
+        granularity=target.granularity,
+        min_length=target.min_length,
+        pulse_alignment=target.pulse_alignment,
+        acquire_alignment=target.acquire_alignment,
+        qubit_properties=qubit_properties,
+    )
+    for name in target.operation_names:
+        instruction_properties = target[name]
+        operation = target.operation_from_name(name)
+        if None in instruction_properties:
+            # Global instruction, defined on all qubits
+            restricted.add_instruction(operation, name=name)
+            continue
+        properties = {
+            tuple(index[q] for q in qargs): props
+            for qargs, props in instruction_properties.items()
+            if all(q in index for q in qargs)
+        }
+        if properties:
+            restricted.add_instruction(operation, properties, name=name)
+    return restricted
+
+
+class SelectDeviceRegion(AnalysisPass):
+    """Selects the region of the device to map the circuit onto and stores it
+    as a :class:`DeviceRegion` in ``property_set["device_region"]``.
+
+    Args:
+        target (qiskit.transpiler.Target): The device target.
+        slack (float): Fraction of extra qubits beyond the circuit width, to
+            leave room for routing.
+    """
+
+    def __init__(self, target, slack=0.5):
+        super().__init__()
+        self.target = target
+        self.slack = slack
+
+    def run(self, dag):
+        num_qubits = dag.num_qubits()
+        if num_qubits > self.target.num_qubits:
+            raise TranspilerError(
+                f"The circuit has {num_qubits} qubits, more than the "
+                f"{self.target.num_qubits} of the target device."
+            )
+        size = min(
+            self.target.num_qubits,
+            max(num_qubits + 1, math.ceil(num_qubits * (1 + self.slack))),
+        )
+        qubits = select_region(self.target.build_coupling_map(), size)
+        self.property_set["device_region"] = DeviceRegion(
+            qubits=qubits,
+            target=restrict_target(self.target, qubits),
+            num_device_qubits=self.target.num_qubits,
+        )
+
+
+class OnDeviceRegion(TransformationPass):
+    """Runs a layout or routing pass against the target of the region in
+    ``property_set["device_region"]``.
+
+    The wrapped pass is created on each run, with the restricted target (or
+    its coupling map) passed as the ``device_arg`` keyword argument.
+
+    Args:
+        pass_class (type): The pass to run, e.g. ``SabreSwap``.
+        device_arg (str): "target" or "coupling_map".
+        **kwargs: Other keyword arguments for ``pass_class``.
+    """
+
+    def __init__(self, pass_class, device_arg="target", **kwargs):
+        super().__init__()
+        self.pass_class = pass_class
+        self.device_arg = device_arg
+        self.kwargs = kwargs
+
+    def run(self, dag):
+        region = self.property_set["device_region"]
+        device = region.target
+        if self.device_arg == "coupling_map":
+            device = device.build_coupling_map()
+        inner_pass = self.pass_class(
+            **{self.device_arg: device}, **self.kwargs
+        )
+        inner_pass.property_set = self.property_set
+        new_dag = inner_pass.run(dag)
+        # Analysis passes return None
+        return dag if new_dag is None else new_dag
+
+
+class EmbedDeviceRegion(TransformationPass):
+    """Places a circuit mapped onto the region in
+    ``property_set["device_region"]`` onto the full device, and translates
+    the layouts in the property set accordingly.
+    """
+
+    def run(self, dag):
+        region = self.property_set["device_region"]
+        device_qubits = QuantumRegister(region.num_device_qubits, "q")
+        # Region wire -> device wire
+        wires = {
+            bit: device_qubits[region.qubits[i]]
+            for i, bit in enumerate(dag.qubits)
+        }
+
+        new_dag = DAGCircuit()
+        new_dag.name = dag.name
+        new_dag.add_qreg(device_qubits)
+        for var in dag.iter_input_vars():
+            new_dag.add_input_var(var)
+        for var in dag.iter_captured_vars():
+            new_dag.add_captured_var(var)
+        for var in dag.iter_declared_vars():
+            new_dag.add_declared_var(var)
+        new_dag.metadata = dag.metadata
+        new_dag.add_clbits(dag.clbits)
+        for creg in dag.cregs.values():
+            new_dag.add_creg(creg)
+        for node in dag.topological_op_nodes():
+            new_dag.apply_operation_back(
+                node.op,
+                tuple(wires[q] for q in node.qargs),
+                node.cargs,
+                check=False,
+            )
+        new_dag.global_phase = dag.global_phase
+
+        self._embed_layouts(region, dag.qubits, device_qubits)
+        return new_dag
+
+    def _embed_layouts(self, region, region_qubits, device_qubits):
+        layout = self.property_set["layout"]
+        if layout is None:
+            return
+        inside = set(region.qubits)
+        outside = [
+            q for q in range(region.num_device_qubits) if q not in inside
+        ]
+        ancillas = QuantumRegister(len(outside), "region_ancilla")
+        physical_bits = layout.get_physical_bits()
+        device_layout = Layout(
+            {region.qubits[p]: v for p, v in physical_bits.items()}
+        )
+        device_layout.add_register(ancillas)
+        for physical, ancilla in zip(outside, ancillas):
+            device_layout[ancilla] = physical
+        for qreg in layout.get_registers():
+            device_layout.add_register(qreg)
+        self.property_set["layout"] = device_layout
+
+        original_qubit_indices = self.property_set["original_qubit_indices"]
+        if original_qubit_indices is not None:
+            start = len(original_qubit_indices)
+            for i, ancilla in enumerate(ancillas):
+                original_qubit_indices[ancilla] = start + i
+
+        final_layout = self.property_set["final_layout"]
+        if final_layout is not None:
+            # The final layout maps each output position to the wire whose
+            # state ends up there; both are region indices
+            wire_index = {bit: i for i, bit in enumerate(region_qubits)}
+            mapping = {q: device_qubits[q] for q in outside}
+            for position, bit in final_layout.get_physical_bits().items():
+                wire = region.qubits[wire_index[bit]]
+                mapping[region.qubits[position]] = device_qubits[wire]
+            self.property_set["final_layout"] = Layout(mapping)
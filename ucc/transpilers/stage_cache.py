@@ -0,0 +1,216 @@
+"""Content-addressed cache for the output of compilation stages.
+
+``UCCDefault1`` splits its pipeline into named stages (see ``STAGES``). When
+a :class:`StageCache` is passed to ``UCCDefault1.run``, the DAG and property
+set produced by each stage are stored under a key that hashes the input
+circuit together with the settings of that stage and of every stage before
+it. A later run resumes from the deepest stage whose key is already cached,
+so e.g. changing only the routing seed does not re-run the local
+optimizations.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import threading
+
+from qiskit import __version__ as qiskit_version
+from qiskit import qpy
+from qiskit.passmanager import PassManagerState, PropertySet, WorkflowStatus
+
+from .._version import __version__ as ucc_version
+
+# Named stages of the UCCDefault1 pipeline, in the order they run
+STAGES = (
+    "translate",
+    "local-opt",
+    "layout",
+    "route",
+    "post-route-opt",
+    "final-basis",
+)
+
+
+def circuit_key(circuit):
+    """Returns the cache key of an input circuit, hashing its QPY
+    serialization together with the ucc and qiskit versions.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The input circuit.
+
+    Returns:
+        str: A hex digest.
+    """
+    buffer = io.BytesIO()
+    qpy.dump(circuit, buffer)
+    digest = hashlib.sha256(f"{ucc_version}:{qiskit_version}".encode())
+    digest.update(buffer.getvalue())
+    return digest.hexdigest()
+
+
+def stage_key(previous_key, stage, settings):
+    """Returns the cache key of the output of ``stage``.
+
+    Args:
+        previous_key (str): Key of the previous stage's output, or of the
+            input circuit for the first stage.
+        stage (str): Name of the stage.
+        settings (dict): Settings that affect the output of the stage. Their
+            ``repr`` must be stable across processes.
+
+    Returns:
+        str: A hex digest.
+    """
+    digest = hashlib.sha256(previous_key.encode())
+    digest.update(stage.encode())
+    digest.update(repr(sorted(settings.items())).encode())
+    return digest.hexdigest()
+
+
+def run_stage(pass_manager, dag, properties, callback=None):
+    """Runs the passes of ``pass_manager`` on a DAG, starting from the
+    given property set instead of an empty one.
+
+    Args:
+        pass_manager (qiskit.transpiler.PassManager): The passes of the stage.
+        dag (qiskit.dagcircuit.DAGCircuit): The input DAG.
+        properties (dict): Property set left by the previous stage.
+        callback (callable): (optional) Called after each pass with the same
+            keyword arguments as the ``callback`` of ``PassManager.run``.
+
+    Returns:
+        tuple[DAGCircuit, PropertySet]: The output DAG and property set.
+    """
+    property_set = PropertySet()
+    property_set.update(properties)
+    state = PassManagerState(
+        workflow_status=WorkflowStatus(), property_set=property_set
+    )
+    if callback is not None:
+        callback = _pass_manager_callback(callback)
+    dag, state = pass_manager.to_flow_controller().execute(
+        passmanager_ir=dag, state=state, callback=callback
+    )
+    return dag, state.property_set
+
+
+def _pass_manager_callback(callback):
+    # Flow controllers call back with the generic pass manager arguments,
+    # translate them to the ones of qiskit.transpiler.PassManager.run
+    def _callback(task, passmanager_ir, property_set, running_time, count):
+        callback(
+            pass_=task,
+            dag=passmanager_ir,
+            time=running_time,
+            property_set=property_set,
+            count=count,
+        )
+
+    return _callback
+
+
+class StageCache:
+    """Stores the DAG and property set produced by each compilation stage.
+
+    Entries are pickled when stored, so later stages mutating their DAG do
+    not affect the cache. Without a ``directory`` the entries are kept in
+    memory; with one, each entry is a file named after its key, so the cache
+    is shared between processes. A cache can be shared between threads.
+
+    Args:
+        directory (str): (optional) Folder to persist the entries in. It is
+            created if it does not exist.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._entries = {}
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def __contains__(self, key):
+        if self.directory is None:
+            return key in self._entries
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Returns the ``(dag, properties)`` stored under ``key``, or None.
+
+        Args:
+            key (str): A key from :func:`stage_key`.
+
+        Returns:
+            tuple[DAGCircuit, dict] | None: The cached stage output.
+        """
+        if self.directory is None:
+            with self._lock:
+                data = self._entries.get(key)
+        else:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            # A corrupt or incompatible entry is treated as a miss
+            return None
+
+    def put(self, key, dag, properties):
+        """Stores the output of a stage under ``key``.
+
+        Args:
+            key (str): A key from :func:`stage_key`.
+            dag (qiskit.dagcircuit.DAGCircuit): The output DAG of the stage.
+            properties (dict): The property set after the stage.
+        """
+        # Pickled together, so bits shared by the DAG and the layouts in the
+        # property set stay identical objects when loaded
+        try:
+            data = pickle.dumps(
+                (dag, dict(properties)), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        except Exception:
+            data = pickle.dumps(
+                (dag, _picklable(properties)), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        if self.directory is None:
+            with self._lock:
+                self._entries[key] = data
+            return
+        # Write then rename, so concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def _picklable(properties):
+    # Analysis results that cannot be pickled are dropped; passes that need
+    # them recompute them
+    picklable = {}
+    for name, value in properties.items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        picklable[name] = value
+    return picklable
@@ -1,13 +1,15 @@
 # Construct a custom compiler
+import math
 import os
 from qiskit.utils.parallel import CPU_COUNT
+from qiskit.passmanager.flow_controllers import ConditionalController
 from qiskit.transpiler import PassManager
 from qiskit.circuit.equivalence_library import SessionEquivalenceLibrary as sel
-from qiskit import user_config
-from qiskit.transpiler import Target
+from qiskit import QuantumCircuit, user_config
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.transpiler import Target, TranspileLayout
 from qiskit.transpiler.passes import (
     ApplyLayout,
-    BasisTranslator,
     ConsolidateBlocks,
     CollectCliffords,
     HighLevelSynthesis,
@@ -21,24 +23,91 @@ from qiskit.transpiler.passes import (
     Optimize1qGatesDecomposition,
     VF2PostLayout,
 )
-from typing import Optional
+from qiskit.transpiler.passes.layout.vf2_post_layout import (
+    VF2PostLayoutStopReason,
+)
+from typing import Optional, Union
+
+from ..metrics import count_multi_qubit_gates
+from .basis_translation import CachedBasisTranslator
+from .device_region import (
+    EmbedDeviceRegion,
+    OnDeviceRegion,
+    SelectDeviceRegion,
+)
+from .stage_cache import STAGES, circuit_key, run_stage, stage_key
 
 
+# Read once at import and never mutated, so safe to share between threads
 CONFIG = user_config.get_config()
 
+# Trial count setting that picks the count for each circuit
+AUTO = "auto"
+
+# Devices with at least this many qubits are mapped one region at a time
+REGION_MAPPING_MIN_QUBITS = 1000
+# Bounds on the VF2 searches in region mapping, as in Qiskit's preset level 1
+VF2_CALL_LIMIT = 50_000
+VF2_MAX_TRIALS = 2500
+
 
 class UCCDefault1:
     def __init__(
-        self, local_iterations: int = 1, target_device: Optional[Target] = None
+        self,
+        local_iterations: int = 1,
+        target_device: Optional[Target] = None,
+        clifford_resynthesis: bool = True,
+        seed: int = 1,
+        region_mapping: Optional[bool] = None,
+        layout_trials: Optional[Union[int, str]] = None,
+        swap_trials: Optional[Union[int, str]] = None,
+        max_iterations: int = 4,
+        num_threads: Optional[int] = None,
     ):
         """
         Create a new instance of UCCDefault1 compiler
 
+        An instance holds its own pass manager and pass state, so it must not
+        be run from several threads at once. Create one instance per thread
+        (as ``ucc.compile`` does) to compile concurrently.
+
+        The passes are grouped into the named stages of ``STAGES``; passes
+        appended to ``pass_manager`` after construction form a final custom
+        stage. Stages that do not apply (e.g. routing without a target
+        device) are empty.
+
             Args:
                 local_iterations (int): Number of times to run the local passes
                 target_device (qiskit.transpiler.Target): (Optional) The target device to compile the circuit for
+                clifford_resynthesis (bool): Whether the local passes collect and resynthesize Clifford blocks
+                seed (int): Seed for the layout and routing passes
+                region_mapping (bool): Whether to map onto a region of the target device about the size of the circuit instead of the whole device (see ``ucc.transpilers.device_region``). Defaults to doing so for devices with at least ``REGION_MAPPING_MIN_QUBITS`` qubits
+                layout_trials (int | str): Number of Sabre layout trials, or "auto" to choose it for each circuit with ``auto_trial_count``. Defaults to 20, or to ``num_threads`` if higher and the ``sabre_all_threads`` user config or ``QISKIT_SABRE_ALL_THREADS`` environment variable is set
+                swap_trials (int | str): Number of Sabre routing trials, or "auto", with the same default as ``layout_trials``
+                max_iterations (int): Number of forward and backward passes of Sabre layout
+                num_threads (int): Sizing hint for the "auto" and default trial counts: the number of threads the Sabre trials are expected to run on. Defaults to the number of CPUs. It doesn't limit the threads used: Sabre runs its trials on Qiskit's Rayon thread pool, whose size is set by the ``RAYON_NUM_THREADS`` environment variable
         """
+        validate_trial_options(layout_trials, swap_trials, num_threads)
         self.pass_manager = PassManager()
+        self._clifford_resynthesis = clifford_resynthesis
+        self._seed = seed
+        self._region_mapping = region_mapping
+        self._num_threads = num_threads or CPU_COUNT
+        self._max_iterations = max_iterations
+        self._trial_settings = {
+            "layout_trials": layout_trials,
+            "swap_trials": swap_trials,
+        }
+        # Resolved trial counts; "auto" ones are set for each circuit in run()
+        self._trials = {
+            name: _get_trial_count(20, self._num_threads)
+            if value is None
+            else value
+            for name, value in self._trial_settings.items()
+        }
+        # Sabre passes (or their region wrappers), to update "auto" trials
+        self._sabre_layout = None
+        self._sabre_swap = None
         self._1q_basis = ["rz", "rx", "ry", "h"]
         self._2q_basis = ["cx"]
         self.target_basis = self._1q_basis + self._2q_basis
@@ -52,78 +121,390 @@ class UCCDefault1:
                 (1,): False,
             },
         }
-        self._add_local_passes(local_iterations)
+        # Stage name -> (index of its last task + 1, settings it depends on)
+        self._stage_ends = {}
+        self.resumed_from = None
+
+        if local_iterations > 0:
+            self.pass_manager.append(
+                CachedBasisTranslator(sel, target_basis=self.target_basis)
+            )
+        self._end_stage("translate", target_basis=self.target_basis)
+        if local_iterations > 0:
+            self._add_local_optimizations()
+            self._add_local_passes(local_iterations - 1)
+        self._end_stage(
+            "local-opt",
+            local_iterations=local_iterations,
+            clifford_resynthesis=clifford_resynthesis,
+        )
         self._add_map_passes(target_device)
         self.pass_manager.append(
-            BasisTranslator(sel, target_basis=self.target_basis)
+            CachedBasisTranslator(sel, target_basis=self.target_basis)
         )
+        self._end_stage("final-basis", target_basis=self.target_basis)
 
     @property
     def default_passes(self):
         return
 
+    def _end_stage(self, name, **settings):
+        self._stage_ends[name] = (len(self.pass_manager), settings)
+
     def _add_local_passes(self, local_iterations):
         for _ in range(local_iterations):
             self.pass_manager.append(
-                BasisTranslator(sel, target_basis=self.target_basis)
+                CachedBasisTranslator(sel, target_basis=self.target_basis)
             )
-            self.pass_manager.append(Optimize1qGatesDecomposition())
-            self.pass_manager.append(CommutativeCancellation())
-            self.pass_manager.append(Collect2qBlocks())
-            self.pass_manager.append(ConsolidateBlocks(force_consolidate=True))
-            self.pass_manager.append(
-                UnitarySynthesis(basis_gates=self.target_basis)
-            )
-            # self.pass_manager.append(Optimize1qGatesDecomposition(basis=self._1q_basis))
+            self._add_local_optimizations()
+
+    def _add_local_optimizations(self):
+        self.pass_manager.append(Optimize1qGatesDecomposition())
+        self.pass_manager.append(CommutativeCancellation())
+        self.pass_manager.append(Collect2qBlocks())
+        self.pass_manager.append(ConsolidateBlocks(force_consolidate=True))
+        self.pass_manager.append(
+            UnitarySynthesis(basis_gates=self.target_basis)
+        )
+        # self.pass_manager.append(Optimize1qGatesDecomposition(basis=self._1q_basis))
+        if self._clifford_resynthesis:
             self.pass_manager.append(CollectCliffords())
             self.pass_manager.append(
                 HighLevelSynthesis(hls_config=HLSConfig(clifford=["greedy"]))
             )
 
-            # Add following passes if merging single qubit rotations that are interrupted by a commuting 2 qubit gate is desired
-            # self.pass_manager.append(Optimize1qGatesSimpleCommutation(basis=self._1q_basis))
-            # self.pass_manager.append(BasisTranslator(sel, target_basis=self.target_basis))
+        # Add following passes if merging single qubit rotations that are interrupted by a commuting 2 qubit gate is desired
+        # self.pass_manager.append(Optimize1qGatesSimpleCommutation(basis=self._1q_basis))
+        # self.pass_manager.append(BasisTranslator(sel, target_basis=self.target_basis))
 
     def _add_map_passes(self, target_device: Optional[Target] = None):
         if target_device is not None:
-            coupling_map = target_device.build_coupling_map()
+            self._target_device = target_device
+            self._coupling_map = target_device.build_coupling_map()
+            if self._region_mapping is None:
+                self._region_mapping = (
+                    target_device.num_qubits >= REGION_MAPPING_MIN_QUBITS
+                )
+            device = _target_fingerprint(target_device)
+            if self._region_mapping:
+                self.pass_manager.append(SelectDeviceRegion(target_device))
             # self.pass_manager.append(ElidePermutations())
             # self.pass_manager.append(SpectralMapping(coupling_list))
             # self.pass_manager.append(SetLayout(pass_manager_config.initial_layout))
-            self.pass_manager.append(
-                SabreLayout(
-                    coupling_map,
-                    seed=1,
-                    max_iterations=4,
-                    swap_trials=_get_trial_count(20),
-                    layout_trials=_get_trial_count(20),
-                )
+            self._sabre_layout = self._device_pass(
+                SabreLayout,
+                "coupling_map",
+                seed=self._seed,
+                max_iterations=self._max_iterations,
+                swap_trials=self._trials["swap_trials"],
+                layout_trials=self._trials["layout_trials"],
             )
+            self.pass_manager.append(self._sabre_layout)
 
-            self.pass_manager.append(VF2Layout(target=target_device))
-            self.pass_manager.append(ApplyLayout())
             self.pass_manager.append(
-                SabreSwap(
-                    coupling_map,
-                    heuristic="decay",
-                    seed=1,
-                    trials=_get_trial_count(20),
+                self._device_pass(
+                    VF2Layout,
+                    "target",
+                    seed=self._seed,
+                    **self._vf2_limits(max_trials=VF2_MAX_TRIALS),
                 )
             )
-            # self.pass_manager.append(MapomaticLayout(coupling_map))
-            self.pass_manager.append(VF2PostLayout(target=target_device))
             self.pass_manager.append(ApplyLayout())
+            self._end_stage(
+                "layout",
+                device=device,
+                region_mapping=self._region_mapping,
+                seed=self._seed,
+                max_iterations=self._max_iterations,
+                num_threads=self._num_threads,
+                **self._trial_settings,
+            )
+            self._sabre_swap = self._device_pass(
+                SabreSwap,
+                "coupling_map",
+                heuristic="decay",
+                seed=self._seed,
+                trials=self._trials["swap_trials"],
+            )
+            self.pass_manager.append(self._sabre_swap)
+            self._end_stage(
+                "route",
+                device=device,
+                region_mapping=self._region_mapping,
+                seed=self._seed,
+                num_threads=self._num_threads,
+                swap_trials=self._trial_settings["swap_trials"],
+            )
+            # self.pass_manager.append(MapomaticLayout(coupling_map))
+            self._add_post_layout_passes()
             self._add_local_passes(1)
-            self.pass_manager.append(VF2PostLayout(target=target_device))
-            self.pass_manager.append(ApplyLayout())
+            self._add_post_layout_passes()
+            if self._region_mapping:
+                self.pass_manager.append(EmbedDeviceRegion())
+            self._end_stage(
+                "post-route-opt",
+                device=device,
+                region_mapping=self._region_mapping,
+                seed=self._seed,
+                clifford_resynthesis=self._clifford_resynthesis,
+            )
+
+    def _device_pass(self, pass_class, device_arg, **kwargs):
+        """Creates a pass that takes the device as ``device_arg`` ("target"
+        or "coupling_map"), on the selected region in region mapping."""
+        if self._region_mapping:
+            return OnDeviceRegion(pass_class, device_arg=device_arg, **kwargs)
+        if device_arg == "target":
+            return pass_class(target=self._target_device, **kwargs)
+        return pass_class(coupling_map=self._coupling_map, **kwargs)
+
+    def _vf2_limits(self, **limits):
+        # The search is only bounded in region mapping, to keep the results on
+        # smaller devices unchanged
+        if not self._region_mapping:
+            return {}
+        return {"call_limit": VF2_CALL_LIMIT, **limits}
+
+    def _add_post_layout_passes(self):
+        self.pass_manager.append(
+            self._device_pass(
+                VF2PostLayout, "target", seed=self._seed, **self._vf2_limits()
+            )
+        )
+        # Without a post layout, ApplyLayout would re-apply the initial layout
+        # to the already mapped circuit, so only run it if VF2 found one
+        self.pass_manager.append(
+            ConditionalController(
+                ApplyLayout(), condition=_vf2_post_layout_found
+            )
+        )
+
+    def run(self, circuits, callback=None, stage_cache=None):
+        """Compiles ``circuits``.
+
+        Args:
+            circuits (qiskit.QuantumCircuit | list[qiskit.QuantumCircuit]):
+                The circuit(s) to compile.
+            callback (callable): (optional) Called after each pass, as in
+                ``PassManager.run``.
+            stage_cache (ucc.StageCache): (optional) Cache of stage outputs.
+                If given, the compilation resumes after the deepest stage
+                already cached for this circuit and these settings, and the
+                output of every stage it runs is added to the cache. The name
+                of the stage it resumed after is stored in ``resumed_from``.
+
+        Returns:
+            qiskit.QuantumCircuit | list[qiskit.QuantumCircuit]: The compiled
+            circuit(s).
+        """
+        if not isinstance(circuits, QuantumCircuit) and (
+            stage_cache is not None or AUTO in self._trial_settings.values()
+        ):
+            return [
+                self.run(circuit, callback=callback, stage_cache=stage_cache)
+                for circuit in circuits
+            ]
+        if AUTO in self._trial_settings.values():
+            self._set_auto_trials(circuits)
+        if stage_cache is None:
+            return self.pass_manager.run(circuits, callback=callback)
+        return self._run_stages(circuits, callback, stage_cache)
+
+    def _set_auto_trials(self, circuit):
+        trials = auto_trial_count(circuit, self._num_threads)
+        for name, value in self._trial_settings.items():
+            if value == AUTO:
+                self._trials[name] = trials
+        sabre_trials = [
+            (
+                self._sabre_layout,
+                {
+                    "layout_trials": self._trials["layout_trials"],
+                    "swap_trials": self._trials["swap_trials"],
+                },
+            ),
+            (self._sabre_swap, {"trials": self._trials["swap_trials"]}),
+        ]
+        for sabre_pass, trial_counts in sabre_trials:
+            if isinstance(sabre_pass, OnDeviceRegion):
+                sabre_pass.kwargs.update(trial_counts)
+            elif sabre_pass is not None:
+                for name, count in trial_counts.items():
+                    setattr(sabre_pass, name, count)
+
+    def _stages(self):
+        """Yields ``(name, first task, end task, settings)`` of each stage."""
+        start = 0
+        for name in STAGES:
+            end, settings = self._stage_ends.get(name, (start, {}))
+            yield name, start, end, settings
+            start = end
+
+    def _run_stages(self, circuit, callback, stage_cache):
+        stages = []
+        key = circuit_key(circuit)
+        for name, start, end, settings in self._stages():
+            key = stage_key(key, name, settings)
+            stages.append((name, start, end, key))
+
+        dag, properties = None, {}
+        self.resumed_from = None
+        for i in reversed(range(len(stages))):
+            name, start, end, key = stages[i]
+            # Empty stages are never stored, the previous stage is looked up
+            cached = stage_cache.get(key) if start < end else None
+            if cached is not None:
+                dag, properties = cached
+                self.resumed_from = name
+                stages = stages[i + 1 :]
+                break
+        if dag is None:
+            dag = circuit_to_dag(circuit, copy_operations=True)
+
+        for name, start, end, key in stages:
+            if start == end:
+                continue
+            dag, properties = run_stage(
+                self.pass_manager[start:end], dag, properties, callback
+            )
+            stage_cache.put(key, dag, properties)
+
+        # Custom passes appended after construction are not cached
+        last_end = self._stage_ends["final-basis"][0]
+        if last_end < len(self.pass_manager):
+            dag, properties = run_stage(
+                self.pass_manager[last_end:], dag, properties, callback
+            )
+        self.pass_manager.property_set = properties
+        return _to_circuit(dag, properties, circuit)
+
+
+def _vf2_post_layout_found(property_set):
+    return (
+        property_set["VF2PostLayout_stop_reason"]
+        is VF2PostLayoutStopReason.SOLUTION_FOUND
+    )
+
+
+def _target_fingerprint(target):
+    # Parts of the target the mapping stages depend on, in a form whose repr
+    # is stable across processes. VF2Layout and VF2PostLayout pick layouts by
+    # error rate, so the calibration is part of it.
+    coupling_map = target.build_coupling_map()
+    edges = sorted(coupling_map.get_edges()) if coupling_map else None
+    calibration = sorted(
+        (
+            (
+                name,
+                qargs or (),
+                None if properties is None else properties.error,
+                None if properties is None else properties.duration,
+            )
+            for name in target.operation_names
+            for qargs, properties in target[name].items()
+        ),
+        key=lambda item: item[:2],
+    )
+    return (
+        target.num_qubits,
+        edges,
+        sorted(target.operation_names),
+        calibration,
+    )
+
+
+def _to_circuit(dag, properties, input_circuit):
+    # Same as the conversion at the end of PassManager.run
+    circuit = dag_to_circuit(dag, copy_operations=False)
+    if properties.get("layout") is not None:
+        circuit._layout = TranspileLayout(
+            initial_layout=properties["layout"],
+            input_qubit_mapping=properties["original_qubit_indices"],
+            final_layout=properties.get("final_layout"),
+            _input_qubit_count=len(input_circuit.qubits),
+            _output_qubit_list=circuit.qubits,
+        )
+    return circuit
+
+
+def validate_trial_options(
+    layout_trials=None, swap_trials=None, num_threads=None
+):
+    """Checks the Sabre trial options of ``UCCDefault1``.
+
+    Args:
+        layout_trials (int | str): Number of Sabre layout trials, or "auto".
+        swap_trials (int | str): Number of Sabre routing trials, or "auto".
+        num_threads (int): Number of threads the trials are expected to run
+            on.
+
+    Raises:
+        ValueError: If a trial count isn't a positive int or "auto", or
+            ``num_threads`` isn't a positive int. None stands for the
+            default of each.
+    """
+
+    def is_positive_int(value):
+        return (
+            isinstance(value, int)
+            and not isinstance(value, bool)
+            and value > 0
+        )
+
+    for name, value in (
+        ("layout_trials", layout_trials),
+        ("swap_trials", swap_trials),
+    ):
+        if (
+            value is not None
+            and value != "auto"
+            and not is_positive_int(value)
+        ):
+            raise ValueError(
+                f"{name} must be a positive int or 'auto', got {value!r}"
+            )
+    if num_threads is not None and not is_positive_int(num_threads):
+        raise ValueError(
+            f"num_threads must be a positive int, got {num_threads!r}"
+        )
+
+
+def auto_trial_count(circuit, num_threads=CPU_COUNT):
+    """Chooses the number of Sabre layout and routing trials for a circuit.
+
+    Extra trials mostly pay off on wide circuits with many multi-qubit gates
+    per qubit; on small or sparse circuits a few trials find results about
+    as good. As trials run in parallel, the count for all but small circuits
+    is rounded up to a multiple of ``num_threads`` when there are fewer
+    threads than trials, so larger circuits use every thread. With more
+    threads than trials, the count is left as is rather than grown to the
+    number of threads.
+
+    Args:
+        circuit (qiskit.QuantumCircuit): The circuit to be mapped.
+        num_threads (int): Sizing hint: the number of threads the trials are
+            expected to run on.
 
-    def run(self, circuits):
-        return self.pass_manager.run(circuits)
+    Returns:
+        int: The number of trials.
+    """
+    num_2q_gates = count_multi_qubit_gates(circuit)
+    if num_2q_gates == 0:
+        return 1
+    if circuit.num_qubits <= 5 or num_2q_gates < 50:
+        return 4
+    if num_2q_gates / circuit.num_qubits < 10:
+        trials = 8
+    else:
+        trials = 20
+    if num_threads > trials:
+        return trials
+    return math.ceil(trials / num_threads) * num_threads
 
 
-def _get_trial_count(default_trials=5):
+def _get_trial_count(default_trials=5, num_threads=CPU_COUNT):
     if CONFIG.get("sabre_all_threads", None) or os.getenv(
         "QISKIT_SABRE_ALL_THREADS"
     ):
-        return max(CPU_COUNT, default_trials)
+        return max(num_threads, default_trials)
     return default_trials